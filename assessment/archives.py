@@ -0,0 +1,90 @@
+import os
+import zipfile
+from typing import Iterable, Iterator
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import PracticalWork
+from .storage import works_storage
+
+COPY_BUFFER_SIZE = 64 * 1024
+# Kind of the operations preparing archive manifests
+ARCHIVE_OPERATION = 'works_archive'
+ZIP_MIN_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+class _Stream:
+    """
+    Write-only, non-seekable file object collecting the archive bytes
+    until the generator hands them over to the response.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _entry_name(work_id, title: str, file_name: str, name: str, last_name: str) -> str:
+    folder = get_valid_filename(f'{last_name}_{name}') or 'student'
+    extension = os.path.splitext(file_name)[1]
+    return f'{folder}/{get_valid_filename(title) or "work"}_{work_id}{extension}'
+
+
+def archive_entries(works: QuerySet[PracticalWork], chunk_size: int = 2000) -> Iterator[dict]:
+    """
+    Manifest of the archive: entry name, stored file name, size and date of every work with a file.
+    Works whose file is gone from the storage are skipped.
+    """
+    storage = works_storage()
+    rows = works.exclude(file='').exclude(file__isnull=True).values_list(
+        'id', 'title', 'file', 'submitting_date', 'student__name', 'student__last_name',
+    )
+    for work_id, title, file_name, submitting_date, name, last_name in rows.iterator(chunk_size=chunk_size):
+        try:
+            size = os.path.getsize(storage.path(file_name))
+        except OSError:
+            continue
+        yield {
+            'name': _entry_name(work_id, title, file_name, name, last_name),
+            'file': file_name,
+            'size': size,
+            'date_time': list(timezone.localtime(submitting_date).timetuple()[:6]),
+        }
+
+
+def entries_to_zip(entries: Iterable[dict], compression: int = zipfile.ZIP_STORED) -> Iterator[bytes]:
+    """
+    Streams a ZIP archive of `entries` piece by piece. Nothing is kept in memory
+    besides one copy buffer, sizes and CRCs go to data descriptors after each file.
+    """
+    storage = works_storage()
+    stream = _Stream()
+    with zipfile.ZipFile(stream, mode='w', compression=compression, allowZip64=True) as archive:
+        for entry in entries:
+            try:
+                source = open(storage.path(entry['file']), 'rb')
+            except OSError:
+                continue
+            info = zipfile.ZipInfo(entry['name'], date_time=max(tuple(entry['date_time']), ZIP_MIN_DATE))
+            info.compress_type = compression
+            info.file_size = entry['size']
+            with source, archive.open(info, mode='w') as target:
+                while data := source.read(COPY_BUFFER_SIZE):
+                    target.write(data)
+                    if chunk := stream.pop():
+                        yield chunk
+            yield stream.pop()
+    yield stream.pop()
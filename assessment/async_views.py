@@ -0,0 +1,128 @@
+"""
+Async-native versions of the hot endpoints. Under ASGI they run
+on the event loop instead of occupying a worker thread per request.
+"""
+import time
+from typing import AsyncIterator
+from uuid import UUID
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from assessment.fast_serializers import FastWorkSerializer, FastStudentSerializer
+from assessment.models import PracticalWork, Student, Operation
+from assessment.object_cache import etag_matches, representation_etag
+from assessment.serializers import WorkRequestSerializer, GetOperationQuerySerializer, OperationSerializer, \
+    OPERATION_MAX_WAIT
+from assessment.services.operations_service import OperationsService
+from assessment.services.students_service import StudentsService
+from assessment.services.work_check_service import WorkCheckService
+
+work_service = WorkCheckService()
+students_service = StudentsService()
+operations_service = OperationsService()
+
+
+def _json(data, status_code: int = status.HTTP_200_OK) -> JsonResponse:
+    return JsonResponse(data, status=status_code, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def _conditional_json(request: HttpRequest, data) -> HttpResponse:
+    etag = representation_etag(data)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+    else:
+        response = _json(data)
+    response['ETag'] = etag
+    return response
+
+
+# Like DRF's unauthenticated API views, which skip CSRF checks
+@csrf_exempt
+@require_POST
+async def create_work(request: HttpRequest) -> JsonResponse:
+    body = WorkRequestSerializer(data={**request.POST.dict(), **request.FILES.dict()})
+    if not body.is_valid():
+        return _json(body.errors, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        work = await work_service.aadd_work(PracticalWork(**body.validated_data))
+    except Student.DoesNotExist:
+        return _json({'student_id': ["Студент не найден"]}, status.HTTP_400_BAD_REQUEST)
+    return _json(FastWorkSerializer(work).data, status.HTTP_201_CREATED)
+
+
+@require_GET
+async def retrieve_work(request: HttpRequest, id: UUID) -> HttpResponse:
+    try:
+        work = await work_service.aget_work_by_id(id)
+    except PracticalWork.DoesNotExist:
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    return _conditional_json(request, FastWorkSerializer(work).data)
+
+
+@require_GET
+async def retrieve_student(request: HttpRequest, id: UUID) -> JsonResponse:
+    try:
+        student = await students_service.aget_student(id)
+    except Student.DoesNotExist:
+        return _json({'detail': "Студент не найден"}, status.HTTP_404_NOT_FOUND)
+    return _conditional_json(request, FastStudentSerializer(student).data)
+
+
+@require_GET
+async def works_status(request: HttpRequest) -> HttpResponse:
+    query = GetOperationQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _json(query.errors, status.HTTP_400_BAD_REQUEST)
+
+    wait = query.validated_data.get('wait')
+    if wait:
+        operation = await operations_service.await_operation(query.validated_data['id'], wait)
+    else:
+        operation = await operations_service.aget_operation(query.validated_data['id'])
+    if operation is None:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    return _json(OperationSerializer(operation).data)
+
+
+def _event(operation: Operation) -> str:
+    data = JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode(OperationSerializer(operation).data)
+    return f'event: operation\ndata: {data}\n\n'
+
+
+async def _operation_events(operation: Operation, timeout: float) -> AsyncIterator[str]:
+    heartbeat = getattr(settings, 'OPERATIONS_WAIT', {}).get('HEARTBEAT', 15)
+    deadline = time.monotonic() + timeout
+    yield _event(operation)
+    while not operation.done and (remaining := deadline - time.monotonic()) > 0:
+        operation = await operations_service.await_operation(operation.id, min(heartbeat, remaining))
+        if operation is None:
+            return
+        yield _event(operation) if operation.done else ': keep-alive\n\n'
+
+
+@require_GET
+async def works_status_stream(request: HttpRequest) -> HttpResponse:
+    """
+    Server-Sent Events stream of the operation: its current state right away
+    and the finished one as soon as it is done, for at most `wait` seconds.
+    """
+    query = GetOperationQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _json(query.errors, status.HTTP_400_BAD_REQUEST)
+
+    operation = await operations_service.aget_operation(query.validated_data['id'])
+    if operation is None:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+
+    timeout = query.validated_data.get('wait', OPERATION_MAX_WAIT)
+    response = StreamingHttpResponse(_operation_events(operation, timeout), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
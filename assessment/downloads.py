@@ -0,0 +1,134 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+from django.utils.text import get_valid_filename
+
+from .models import PracticalWork
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class _FileRange:
+    """
+    Reads at most `length` bytes of `file` starting at `start`.
+    Keeps `fileno()` so WSGI servers can still sendfile() the range
+    bounded by Content-Length.
+    """
+
+    def __init__(self, file, start: int, length: int) -> None:
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _etag(name: str, stat: os.stat_result) -> str:
+    # Content-addressed names are the SHA-256 of the file itself
+    digest = os.path.splitext(os.path.basename(name))[0]
+    if CONTENT_HASH_RE.match(digest):
+        return quote_etag(digest)
+    return quote_etag(f'{stat.st_size:x}-{int(stat.st_mtime_ns):x}')
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns `(start, end)` of a single `bytes=` range, both inclusive,
+    `None` for headers that should be ignored. Raises `ValueError` when unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError()
+    return start, end
+
+
+def download_file_name(work: PracticalWork) -> str:
+    extension = os.path.splitext(work.file.name)[1]
+    return (get_valid_filename(work.title) or 'work') + extension
+
+
+def work_file_response(request: HttpRequest, work: PracticalWork) -> HttpResponse:
+    """
+    Serves the file of `work` honouring `If-None-Match` and single `Range` requests.
+    With `WORK_FILES_SERVE['MODE']` set to `x-accel-redirect` or `x-sendfile`
+    only headers are returned and the front proxy sends the bytes.
+    """
+    config = getattr(settings, 'WORK_FILES_SERVE', {})
+    mode = config.get('MODE', 'python')
+    path = work.file.path
+    stat = os.stat(path)
+    etag = _etag(work.file.name, stat)
+    file_name = download_file_name(work)
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = config.get('X_ACCEL_PREFIX', '/protected/') + quote(work.file.name)
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = content_disposition_header(True, file_name)
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=file_name)
+    else:
+        start, end = byte_range
+        response = FileResponse(_FileRange(file, start, end - start + 1), as_attachment=True, filename=file_name,
+                                status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class OperationRejected(Exception):
+    """
+    Raised when an executor has no free worker and its queue is full.
+    """
+
+
+class OperationStats:
+    count: int
+    failed: int
+    wait_time: float
+    run_time: float
+    max_wait_time: float
+    max_run_time: float
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.failed = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+        self.max_wait_time = 0.0
+        self.max_run_time = 0.0
+
+    def add(self, wait_time: float, run_time: float, failed: bool) -> None:
+        self.count += 1
+        self.failed += failed
+        self.wait_time += wait_time
+        self.run_time += run_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        self.max_run_time = max(self.max_run_time, run_time)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "wait_time": self.wait_time,
+            "run_time": self.run_time,
+            "max_wait_time": self.max_wait_time,
+            "max_run_time": self.max_run_time,
+        }
+
+
+def _timed_call(func: Callable, kwargs: dict, enqueued_at: float) -> tuple[float, float, object]:
+    # Runs inside the worker, the wait is measured from the submitter's clock
+    started_at = time.time()
+    close_old_connections()
+    try:
+        result = func(**kwargs)
+    finally:
+        close_old_connections()
+    return started_at - enqueued_at, time.time() - started_at, result
+
+
+class OperationExecutor:
+    """
+    Bounded thread pool running operations.
+    At most `max_workers` jobs run and `max_queue` wait at a time;
+    further submissions wait up to `queue_timeout` seconds for a slot
+    and are rejected with `OperationRejected` after that.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 100, queue_timeout: float = 0) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._stats: dict[str, OperationStats] = {}
+        self._pool: ThreadPoolExecutor | None = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix='operation')
+            return self._pool
+
+    def submit(self, func: Callable, kwargs: dict = None, name: str = None) -> Future:
+        """
+        Schedules `func(**kwargs)` and returns a future of its result.
+        """
+        name = name or getattr(func, '__qualname__', repr(func))
+        if self.queue_timeout:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise OperationRejected(f"Операция {name} отклонена: очередь заполнена")
+
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        result_future = Future()
+        try:
+            inner = self.pool.submit(_timed_call, func, kwargs or {}, time.time())
+        except Exception:
+            self._release()
+            raise
+        inner.add_done_callback(lambda f: self._complete(name, f, result_future))
+        return result_future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _complete(self, name: str, inner: Future, result_future: Future) -> None:
+        self._release()
+        error = inner.exception()
+        wait_time, run_time, result = (0.0, 0.0, None) if error else inner.result()
+        with self._lock:
+            self._stats.setdefault(name, OperationStats()).add(wait_time, run_time, error is not None)
+        if error:
+            result_future.set_exception(error)
+        else:
+            result_future.set_result(result)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "operations": {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+_executors: dict[str, OperationExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(alias: str = 'default') -> OperationExecutor:
+    with _executors_lock:
+        if alias not in _executors:
+            config = getattr(settings, 'OPERATIONS_EXECUTORS', {'default': {}}).get(alias)
+            if config is None:
+                raise KeyError(f"Executor {alias} is not configured")
+            _executors[alias] = OperationExecutor(
+                max_workers=config.get('MAX_WORKERS', 4),
+                max_queue=config.get('MAX_QUEUE', 100),
+                queue_timeout=config.get('QUEUE_TIMEOUT', 0),
+            )
+        return _executors[alias]
+
+
+def all_executors() -> dict[str, OperationExecutor]:
+    with _executors_lock:
+        return dict(_executors)
@@ -0,0 +1,36 @@
+import csv
+from typing import Iterator
+
+from django.db.models import QuerySet
+from rest_framework.utils.encoders import JSONEncoder
+
+from .fast_serializers import FastWorkSerializer
+from .models import PracticalWork
+
+WORK_EXPORT_FIELDS = ['id', 'student', 'submitting_date', 'title', 'file', 'mark_date', 'mark']
+
+
+class _Echo:
+    """
+    File-like object handing every written row back to the caller.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _serialize(works: QuerySet[PracticalWork], chunk_size: int) -> Iterator[dict]:
+    return FastWorkSerializer().iter_representation(works, chunk_size=chunk_size)
+
+
+def works_to_ndjson(works: QuerySet[PracticalWork], chunk_size: int = 2000) -> Iterator[str]:
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for work in _serialize(works, chunk_size):
+        yield encoder.encode(work) + '\n'
+
+
+def works_to_csv(works: QuerySet[PracticalWork], chunk_size: int = 2000) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=WORK_EXPORT_FIELDS)
+    yield writer.writeheader()
+    for work in _serialize(works, chunk_size):
+        yield writer.writerow(work)
@@ -0,0 +1,140 @@
+from typing import Callable, Iterable, Iterator
+
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db.models import Model, QuerySet
+from django.db.models.fields.files import FieldFile
+from django.utils.encoding import filepath_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import WorkSerializer, StudentSerializer
+
+
+def _identity(value):
+    return value
+
+
+def _datetime_converter(field: serializers.DateTimeField) -> Callable:
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not value:
+            return None
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
+
+def _storage_url(storage: Storage) -> Callable[[str], str]:
+    if not isinstance(storage, FileSystemStorage):
+        return storage.url
+    base_url = storage.base_url
+
+    def url(name):
+        path = filepath_to_uri(name).lstrip('/')
+        # urljoin only differs from concatenation on dot segments
+        if '/.' in '/' + path:
+            return storage.url(name)
+        return base_url + path
+
+    return url
+
+
+def _file_converter(field: serializers.FileField, model_field, request) -> Callable:
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+    storage_url = _storage_url(model_field.storage)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage_url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return convert
+
+
+def _converter(field: serializers.Field, model_field, request) -> Callable:
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return _identity
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.FileField):
+        return _file_converter(field, model_field, request)
+    if isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.BooleanField)):
+        return _identity
+    return field.to_representation
+
+
+class FastModelSerializer:
+    """
+    Read-only counterpart of a `ModelSerializer` with the same output.
+    Field converters are resolved once per serializer instead of once per value,
+    and querysets are read with `.values_list()` without building model instances.
+    Accepts a queryset, `.values()` rows or model instances.
+    """
+    serializer_class: type[serializers.ModelSerializer]
+
+    def __init__(self, instance=None, many: bool = False, context: dict = None, fields: list[str] = None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+        serializer = self.serializer_class(context=self.context)
+        model = serializer.Meta.model
+        request = self.context.get('request')
+        self.names, self.columns, self.converters = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields and name not in fields):
+                continue
+            model_field = model._meta.get_field(field.source)
+            converter = _converter(field, model_field, request)
+            self.names.append(name)
+            self.columns.append(model_field.attname)
+            self.converters.append(converter)
+
+    def _convert(self, values: Iterable) -> dict:
+        return {
+            name: None if value is None else convert(value)
+            for name, convert, value in zip(self.names, self.converters, values)
+        }
+
+    def to_representation(self, obj: Model | dict) -> dict:
+        if isinstance(obj, dict):
+            return self._convert(obj[column] for column in self.columns)
+        values = []
+        for column in self.columns:
+            value = getattr(obj, column)
+            values.append(value.name if isinstance(value, FieldFile) else value)
+        return self._convert(values)
+
+    def iter_representation(self, objects: QuerySet | Iterable, chunk_size: int = None) -> Iterator[dict]:
+        if isinstance(objects, QuerySet):
+            rows = objects.values_list(*self.columns)
+            if chunk_size is not None:
+                rows = rows.iterator(chunk_size=chunk_size)
+            return map(self._convert, rows)
+        return map(self.to_representation, objects)
+
+    @property
+    def data(self) -> list[dict] | dict:
+        if self.many:
+            return list(self.iter_representation(self.instance))
+        return self.to_representation(self.instance)
+
+
+class FastWorkSerializer(FastModelSerializer):
+    serializer_class = WorkSerializer
+
+
+class FastStudentSerializer(FastModelSerializer):
+    serializer_class = StudentSerializer
@@ -0,0 +1,134 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .executors import OperationRejected, get_executor
+from .scheduler import get_scheduler, DateTrigger
+from .storage import works_storage
+
+logger = logging.getLogger(__name__)
+
+
+RETRY_JOB_ID = 'file-removal-retry'
+
+
+class FileRemover:
+    """
+    Deletes stored files in the background, in batches. Names are queued as
+    `FileRemoval` rows in the deleting transaction, so removals survive restarts:
+    rows left by a stopped process are picked up by the next removal in any process.
+    Failed deletions are retried after `retry_delay * 2 ** attempt` seconds,
+    `max_attempts` times at most.
+    """
+
+    def __init__(self) -> None:
+        config = getattr(settings, 'FILE_CLEANUP', {})
+        self.batch_size = config.get('BATCH_SIZE', 100)
+        self.max_attempts = config.get('MAX_ATTEMPTS', 5)
+        self.retry_delay = config.get('RETRY_DELAY', 5)
+        self._lock = threading.Lock()
+        self._requested = False
+        self._running = False
+
+    def remove_on_commit(self, names: Iterable[str]) -> None:
+        """
+        Queues `names` in the current transaction and removes them once it commits,
+        nothing is removed if it rolls back.
+        """
+        # Imported here, models register this remover in their receivers
+        from .models import FileRemoval
+
+        names = list(names)
+        if names:
+            FileRemoval.objects.bulk_create([FileRemoval(name=name) for name in names], batch_size=self.batch_size)
+            transaction.on_commit(self.wake)
+
+    def wake(self) -> None:
+        """
+        Starts removing due files on the executor unless a run is already going on.
+        """
+        with self._lock:
+            self._requested = True
+            if self._running:
+                return
+            self._running = True
+        try:
+            get_executor().submit(self.run, name='remove_files')
+        except OperationRejected:
+            with self._lock:
+                self._running = False
+            self._wake_at(timezone.now() + timedelta(seconds=self.retry_delay))
+
+    def run(self) -> int:
+        """
+        Removes due files until none are left and returns how many were handled.
+        """
+        handled = 0
+        try:
+            while True:
+                with self._lock:
+                    if not self._requested:
+                        break
+                    self._requested = False
+                while batch := self._next_batch():
+                    self._remove(batch)
+                    handled += len(batch)
+        finally:
+            with self._lock:
+                self._running = False
+        self._schedule_retry()
+        return handled
+
+    def _next_batch(self) -> list:
+        from .models import FileRemoval
+
+        return list(FileRemoval.objects.filter(next_attempt_date__lte=timezone.now())
+                    .order_by('next_attempt_date', 'id')[:self.batch_size])
+
+    def _remove(self, batch: list) -> None:
+        from .models import FileBlob, FileRemoval
+
+        storage = works_storage()
+        names = list({removal.name for removal in batch})
+        done, failed = [], []
+        with transaction.atomic():
+            # Writers of the same content wait for this transaction, a blob uploaded
+            # again since the delete has references and is kept
+            refcounts = FileBlob.lock(names)
+            for removal in batch:
+                if not refcounts.get(removal.name):
+                    try:
+                        storage.delete(removal.name)
+                    except OSError as e:
+                        if removal.attempts + 1 < self.max_attempts:
+                            failed.append(removal)
+                            continue
+                        logger.error("Could not remove file %s: %s", removal.name, e)
+                done.append(removal.id)
+            FileBlob.objects.filter(name__in=names, refcount=0).delete()
+            FileRemoval.objects.filter(id__in=done).delete()
+
+        now = timezone.now()
+        for removal in failed:
+            removal.attempts += 1
+            removal.next_attempt_date = now + timedelta(seconds=self.retry_delay * 2 ** removal.attempts)
+        FileRemoval.objects.bulk_update(failed, ['attempts', 'next_attempt_date'])
+
+    def _schedule_retry(self) -> None:
+        from .models import FileRemoval
+
+        next_date = FileRemoval.objects.aggregate(next=Min('next_attempt_date'))['next']
+        if next_date is not None:
+            self._wake_at(next_date)
+
+    def _wake_at(self, run_date) -> None:
+        get_scheduler().add_job(self.wake, trigger=DateTrigger(run_date), id=RETRY_JOB_ID, replace_existing=True)
+
+
+file_remover = FileRemover()
@@ -0,0 +1,49 @@
+import csv
+from typing import Iterator
+from uuid import UUID
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+
+def read_rows(request: Request) -> list[dict]:
+    """
+    Reads import rows from a JSON array body or from an uploaded CSV `file`
+    with a header line. Empty CSV cells are treated as missing values.
+    Raises `ValueError` if the file is not in UTF-8.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        reader = csv.DictReader(_decode_lines(upload))
+        return [{key: value for key, value in row.items() if value != ''} for row in reader]
+
+    if not isinstance(request.data, list):
+        raise ValidationError({'detail': "Ожидается JSON-массив или CSV-файл в поле file"})
+    return request.data
+
+
+def _decode_lines(upload) -> Iterator[str]:
+    # Line by line, so the error points at the line to fix
+    for number, line in enumerate(upload, start=1):
+        try:
+            yield line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise ValueError(f"Строка {number} файла не в кодировке UTF-8")
+
+
+def row_errors(errors: list[dict] | dict[int, dict]) -> list[dict]:
+    # DRF reports `many=True` errors as a list aligned with rows or, since 3.16, as a dict by row index
+    items = errors.items() if isinstance(errors, dict) else enumerate(errors)
+    return [{'row': i, 'errors': error} for i, error in items if error]
+
+
+def row_uuids(rows: list, key: str) -> set[UUID]:
+    ids = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        try:
+            ids.add(UUID(str(row.get(key))))
+        except ValueError:
+            pass
+    return ids
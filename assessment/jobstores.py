@@ -0,0 +1,111 @@
+import pickle
+from datetime import timedelta
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .models import ScheduledJob
+
+
+class DjangoJobStore(BaseJobStore):
+    """
+    APScheduler job store keeping jobs in the `ScheduledJob` table, so they survive restarts
+    and can be added by any process. Job functions must be importable by reference.
+
+    Due jobs are claimed by moving their next run time `claim_timeout` seconds ahead until
+    the scheduler stores the next one, so a run is taken by one scheduler even if two of them
+    think they lead; a run claimed by a process that stopped is taken again after the timeout.
+    """
+
+    def __init__(self, pickle_protocol: int = pickle.HIGHEST_PROTOCOL, claim_timeout: float = 60) -> None:
+        super().__init__()
+        self.pickle_protocol = pickle_protocol
+        self.claim_timeout = claim_timeout
+        self._stopped = True
+
+    def start(self, scheduler, alias) -> None:
+        super().start(scheduler, alias)
+        self._stopped = False
+
+    def shutdown(self) -> None:
+        # The scheduler thread looks for due jobs once more after shutdown
+        self._stopped = True
+
+    def lookup_job(self, job_id: str) -> Job | None:
+        state = ScheduledJob.objects.filter(id=job_id).values_list('job_state', flat=True).first()
+        return self._reconstitute_job(state) if state is not None else None
+
+    def get_due_jobs(self, now) -> list[Job]:
+        if self._stopped:
+            return []
+        claimed = []
+        claimed_until = now + timedelta(seconds=self.claim_timeout)
+        for job_id, next_run_time in ScheduledJob.objects.filter(next_run_time__lte=now).values_list(
+                'id', 'next_run_time'):
+            # Nothing is updated if another scheduler claimed or ran the job since the read
+            if ScheduledJob.objects.filter(id=job_id, next_run_time=next_run_time).update(
+                    next_run_time=claimed_until):
+                claimed.append(job_id)
+        # Jobs keep their due run time in the state, misfires are computed from it
+        return self._get_jobs(id__in=claimed) if claimed else []
+
+    def get_next_run_time(self):
+        if self._stopped:
+            return None
+        try:
+            return (ScheduledJob.objects.filter(next_run_time__isnull=False).order_by('next_run_time')
+                    .values_list('next_run_time', flat=True).first())
+        except DatabaseError:
+            # Unlike get_due_jobs, the scheduler thread does not survive errors here;
+            # the leader wakes the scheduler up on every lease renewal anyway
+            self._logger.exception('Unable to get the next run time')
+            return None
+
+    def get_all_jobs(self) -> list[Job]:
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job: Job) -> None:
+        try:
+            with transaction.atomic():
+                ScheduledJob.objects.create(id=job.id, next_run_time=job.next_run_time, job_state=self._state(job))
+        except IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job: Job) -> None:
+        if not ScheduledJob.objects.filter(id=job.id).update(next_run_time=job.next_run_time,
+                                                             job_state=self._state(job)):
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id: str) -> None:
+        if not ScheduledJob.objects.filter(id=job_id).delete()[0]:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self) -> None:
+        ScheduledJob.objects.all().delete()
+
+    def _state(self, job: Job) -> bytes:
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, state: bytes) -> Job:
+        job = Job.__new__(Job)
+        job.__setstate__(pickle.loads(bytes(state)))
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, **filters) -> list[Job]:
+        jobs, broken = [], []
+        rows = ScheduledJob.objects.filter(**filters).order_by('next_run_time').values_list('id', 'job_state')
+        for job_id, state in rows:
+            try:
+                jobs.append(self._reconstitute_job(state))
+            except Exception:
+                # E.g. the job function was renamed, the job could never run again
+                self._logger.exception('Unable to restore job "%s", removing it', job_id)
+                broken.append(job_id)
+        if broken:
+            ScheduledJob.objects.filter(id__in=broken).delete()
+        return jobs
@@ -0,0 +1,42 @@
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SchedulerLease
+
+
+class LeaderLease:
+    """
+    Leadership named `name`, held through a `SchedulerLease` row. The holder renews it
+    before `ttl` seconds pass and any process takes it over once it has expired,
+    so clocks of the processes must agree to well within `ttl`.
+    """
+
+    def __init__(self, name: str, ttl: float, owner: str = None) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self) -> bool:
+        """
+        Takes or renews the lease and returns whether this process holds it.
+        """
+        now = timezone.now()
+        expires_date = now + timedelta(seconds=self.ttl)
+        if SchedulerLease.objects.filter(Q(owner=self.owner) | Q(expires_date__lt=now), name=self.name).update(
+                owner=self.owner, expires_date=expires_date):
+            return True
+        try:
+            with transaction.atomic():
+                SchedulerLease.objects.create(name=self.name, owner=self.owner, expires_date=expires_date)
+            return True
+        except IntegrityError:
+            return False
+
+    def release(self) -> None:
+        SchedulerLease.objects.filter(name=self.name, owner=self.owner).delete()
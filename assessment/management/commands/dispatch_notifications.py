@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessment.services.notifications_service import NotificationsService
+
+
+class Command(BaseCommand):
+    help = "Delivers mark notifications from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the outbox once and exit")
+
+    def handle(self, *args, once: bool = False, **options):
+        service = NotificationsService()
+        while True:
+            processed = service.drain()
+            if once:
+                self.stdout.write(f"Обработано уведомлений: {processed}")
+                return
+            time.sleep(service.interval)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessment.services.reports_service import ReportsService
+
+
+class Command(BaseCommand):
+    help = "Runs scheduled reports while this process holds the reports lease"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', metavar='REPORT', help="Generate the report right away and exit")
+
+    def handle(self, *args, now: str = None, **options):
+        service = ReportsService()
+        if now:
+            result = service.generate_report(now)
+            self.stdout.write(f"Отчёт {result.name} сформирован: {result.generated_date:%Y-%m-%d %H:%M:%S}")
+            return
+        service.start()
+        try:
+            while True:
+                time.sleep(service.lease_ttl)
+        except KeyboardInterrupt:
+            service.stop()
@@ -0,0 +1,292 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+from .executors import all_executors
+from .object_cache import cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+INF_BOUND = 'le="+Inf"'
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """
+    Prometheus histogram with fixed upper bounds, one series per label values.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += 1
+            series[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, INF_BOUND)} {values[-2]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(values[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {values[-2]}')
+        return lines
+
+
+REQUEST_LABELS = ('view', 'method')
+
+requests_total = Counter('http_requests_total', "Handled requests.", REQUEST_LABELS + ('status',))
+request_duration = Histogram('http_request_duration_seconds', "Time until the response is returned.",
+                             REQUEST_LABELS)
+request_queries = Histogram('http_request_db_queries', "SQL queries run by a request.",
+                            REQUEST_LABELS, QUERIES_BUCKETS)
+request_db_duration = Histogram('http_request_db_duration_seconds', "Time spent in SQL queries by a request.",
+                                REQUEST_LABELS)
+request_render_duration = Histogram('http_request_render_duration_seconds',
+                                    "Time spent rendering the response body to JSON, "
+                                    "after serializers built the data.", REQUEST_LABELS)
+
+REQUEST_METRICS = (requests_total, request_duration, request_queries, request_db_duration,
+                   request_render_duration)
+
+
+def reset_metrics() -> None:
+    for metric in REQUEST_METRICS:
+        metric.reset()
+
+
+class RequestMetrics:
+    """
+    Counters of the request being handled, shared with `sync_to_async` threads through the context.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.stages: dict[str, float] = {}
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar('request_metrics', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started_at
+
+
+def _install_query_recorder(connection) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _install_on_connect(sender, connection, **kwargs) -> None:
+    # Connections are per thread, async views query from `sync_to_async` threads
+    _install_query_recorder(connection)
+
+
+@contextmanager
+def measure(stage: str):
+    """
+    Adds the time spent in the block to `stage` of the current request, if metrics are collected.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.stages[stage] = metrics.stages.get(stage, 0.0) + time.perf_counter() - started_at
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class MetricsMiddleware:
+    """
+    Records per view latency, SQL queries count and time and rendering time into the histograms
+    served by `/metrics`. Streaming responses are measured until their headers are returned.
+    Enabled by `METRICS['ENABLED']`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, 'METRICS', {}).get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_on_connect, dispatch_uid='assessment.metrics')
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._observe(request, response, metrics, time.perf_counter() - started_at)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._observe(request, response, metrics, time.perf_counter() - started_at)
+        return response
+
+    @staticmethod
+    def _observe(request, response, metrics: RequestMetrics, duration: float) -> None:
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unmatched', 'method': request.method}
+        requests_total.inc(**labels, status=response.status_code)
+        request_duration.observe(duration, **labels)
+        request_queries.observe(metrics.queries, **labels)
+        request_db_duration.observe(metrics.db_time, **labels)
+        request_render_duration.observe(metrics.stages.get('render', 0.0), **labels)
+
+
+def _gauge(name: str, help: str, type: str, labels: tuple[str, ...], values: dict[tuple, float]) -> list[str]:
+    lines = [f'# HELP {name} {help}', f'# TYPE {name} {type}']
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{_format_labels(labels, key)} {_format_value(value)}')
+    return lines
+
+
+def _executor_lines() -> list[str]:
+    executors = {alias: executor.metrics() for alias, executor in all_executors().items()}
+    operations = {(alias, name): stats for alias, metrics in executors.items()
+                  for name, stats in metrics['operations'].items()}
+    return [
+        *_gauge('operations_executor_in_flight', "Operations running or queued.", 'gauge', ('executor',),
+                {(alias,): metrics['in_flight'] for alias, metrics in executors.items()}),
+        *_gauge('operations_executor_queue_depth', "Operations waiting for a worker.", 'gauge', ('executor',),
+                {(alias,): metrics['queue_depth'] for alias, metrics in executors.items()}),
+        *_gauge('operations_executor_submitted_total', "Submitted operations.", 'counter', ('executor',),
+                {(alias,): metrics['submitted'] for alias, metrics in executors.items()}),
+        *_gauge('operations_executor_rejected_total', "Operations rejected by a full queue.", 'counter',
+                ('executor',), {(alias,): metrics['rejected'] for alias, metrics in executors.items()}),
+        *_gauge('operations_completed_total', "Completed operations.", 'counter', ('executor', 'operation'),
+                {key: stats['count'] for key, stats in operations.items()}),
+        *_gauge('operations_failed_total', "Failed operations.", 'counter', ('executor', 'operation'),
+                {key: stats['failed'] for key, stats in operations.items()}),
+        *_gauge('operations_wait_seconds_total', "Time operations spent queued.", 'counter',
+                ('executor', 'operation'), {key: stats['wait_time'] for key, stats in operations.items()}),
+        *_gauge('operations_run_seconds_total', "Time operations spent running.", 'counter',
+                ('executor', 'operation'), {key: stats['run_time'] for key, stats in operations.items()}),
+    ]
+
+
+def _cache_lines() -> list[str]:
+    stats = cache_stats()
+    return [
+        *_gauge('object_cache_hits_total', "Object cache hits.", 'counter', ('cache',),
+                {(name,): counters['hits'] for name, counters in stats.items()}),
+        *_gauge('object_cache_misses_total', "Object cache misses.", 'counter', ('cache',),
+                {(name,): counters['misses'] for name, counters in stats.items()}),
+    ]
+
+
+def render_metrics() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = [line for metric in REQUEST_METRICS for line in metric.collect()]
+    lines += _executor_lines()
+    lines += _cache_lines()
+    return '\n'.join(lines) + '\n'
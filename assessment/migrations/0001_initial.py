@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=20)),
+                ('last_name', models.CharField(max_length=20)),
+                ('submitted_works_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PracticalWork',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('submitting_date', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=200)),
+                ('file', models.FileField(null=True, upload_to='Uploaded Files/')),
+                ('mark_date', models.DateTimeField(null=True)),
+                ('mark', models.IntegerField(null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assessment.student')),
+            ],
+        ),
+    ]
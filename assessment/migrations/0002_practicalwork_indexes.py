@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='practicalwork',
+            index=models.Index(fields=['submitting_date', 'id'], name='work_submitting_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practicalwork',
+            index=models.Index(fields=['student', 'submitting_date', 'id'], name='work_student_submitting_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practicalwork',
+            index=models.Index(condition=models.Q(('mark__isnull', True)), fields=['submitting_date', 'id'], name='work_unmarked_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0002_practicalwork_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'id'], name='student_last_name_keyset_idx'),
+        ),
+    ]
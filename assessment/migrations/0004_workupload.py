@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0003_student_last_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('file_name', models.CharField(max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('chunk_size', models.IntegerField()),
+                ('checksum', models.CharField(max_length=64)),
+                ('received_chunks', models.JSONField(default=list)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assessment.student')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:19
+
+import assessment.storage
+from django.db import migrations, models
+
+
+def count_file_references(apps, schema_editor):
+    PracticalWork = apps.get_model('assessment', 'PracticalWork')
+    FileBlob = apps.get_model('assessment', 'FileBlob')
+    references = (
+        PracticalWork.objects.exclude(file__isnull=True).exclude(file='')
+        .values('file').annotate(refcount=models.Count('id'))
+    )
+    FileBlob.objects.bulk_create(
+        (FileBlob(name=row['file'], refcount=row['refcount']) for row in references.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0004_workupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('refcount', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='practicalwork',
+            name='file',
+            field=models.FileField(null=True, storage=assessment.storage.works_storage, upload_to='Uploaded Files/'),
+        ),
+        migrations.RunPython(count_file_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0005_content_addressed_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('mark', models.IntegerField()),
+                ('mark_date', models.DateTimeField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_date', models.DateTimeField(null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assessment.student')),
+                ('work', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assessment.practicalwork')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_date__isnull', True)), fields=['next_attempt_date', 'created_date'], name='notification_pending_idx')],
+            },
+        ),
+    ]
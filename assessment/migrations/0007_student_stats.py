@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_student_stats(apps, schema_editor):
+    PracticalWork = apps.get_model('assessment', 'PracticalWork')
+    StudentStats = apps.get_model('assessment', 'StudentStats')
+    rows = PracticalWork.objects.values('student_id').annotate(
+        works_count=models.Count('id'),
+        marked_count=models.Count('mark'),
+        marks_sum=Coalesce(models.Sum('mark'), 0),
+        last_submitted_date=models.Max('submitting_date'),
+    ).order_by()
+    StudentStats.objects.bulk_create((StudentStats(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0006_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='assessment.student')),
+                ('works_count', models.IntegerField(default=0)),
+                ('marked_count', models.IntegerField(default=0)),
+                ('marks_sum', models.BigIntegerField(default=0)),
+                ('last_submitted_date', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(fill_student_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:58
+
+import django.core.serializers.json
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0007_student_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.CharField(max_length=191, primary_key=True, serialize=False)),
+                ('next_run_time', models.DateTimeField(db_index=True, null=True)),
+                ('job_state', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=200)),
+                ('expires_date', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReportResult',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('generated_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', '-generated_date'], name='report_latest_idx')],
+            },
+        ),
+    ]
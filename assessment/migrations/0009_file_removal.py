@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0008_scheduled_reports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_date', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0009_file_removal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='claim',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+    ]
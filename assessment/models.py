@@ -1,8 +1,15 @@
-import os
 import uuid
 
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .file_cleanup import file_remover
+from .object_cache import student_cache, work_cache
+from .storage import works_storage
 
 
 class Student(models.Model):
@@ -11,6 +18,11 @@ class Student(models.Model):
     last_name = models.CharField(max_length=20)
     submitted_works_count = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_name', 'id'], name='student_last_name_keyset_idx'),
+        ]
+
     def __str__(self):
         return self.name + ' ' + self.last_name
 
@@ -20,39 +32,353 @@ class PracticalWork(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, null=False)
     submitting_date = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=200)
-    file = models.FileField(null=True, upload_to="Uploaded Files/")
+    file = models.FileField(null=True, upload_to="Uploaded Files/", storage=works_storage)
     mark_date = models.DateTimeField(auto_now_add=False, null=True)
     mark = models.IntegerField(blank=False, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['submitting_date', 'id'], name='work_submitting_keyset_idx'),
+            models.Index(fields=['student', 'submitting_date', 'id'], name='work_student_submitting_idx'),
+            models.Index(fields=['submitting_date', 'id'], condition=models.Q(mark__isnull=True),
+                         name='work_unmarked_idx'),
+        ]
+
     def __str__(self):
         return self.title + ' ' + self.submitting_date.__str__()
 
 
+class FileBlob(models.Model):
+    """
+    Number of works referencing a stored file.
+    """
+    name = models.CharField(primary_key=True, max_length=100)
+    refcount = models.IntegerField(default=0)
+
+    @classmethod
+    def acquire(cls, name: str, count: int = 1) -> None:
+        if cls.objects.filter(name=name).update(refcount=models.F('refcount') + count):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, refcount=count)
+        except IntegrityError:
+            cls.objects.filter(name=name).update(refcount=models.F('refcount') + count)
+
+    @classmethod
+    def lock(cls, names: list[str]) -> dict[str, int]:
+        """
+        Locks the blobs of `names` until the current transaction ends and returns their refcounts.
+        Missing blobs are created with no references, so writing and removing a file
+        are serialized even when nothing references it yet.
+        """
+        cls.objects.bulk_create([cls(name=name, refcount=0) for name in names], ignore_conflicts=True)
+        return dict(cls.objects.select_for_update().filter(name__in=names).values_list('name', 'refcount'))
+
+    @classmethod
+    def release(cls, name: str) -> bool:
+        """
+        Drops one reference and tells whether the file is no longer used.
+        Files without a blob row predate reference counting and are released at once.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return True
+            if blob.refcount > 1:
+                cls.objects.filter(name=name).update(refcount=models.F('refcount') - 1)
+                return False
+            blob.delete()
+            return True
+
+    @classmethod
+    def release_many(cls, counts: dict[str, int], batch_size: int = 500) -> list[str]:
+        """
+        Drops `counts` references from each blob and returns names of the files no longer used,
+        with a few queries per batch of names.
+        """
+        released = []
+        names = list(counts)
+        with transaction.atomic():
+            for start in range(0, len(names), batch_size):
+                batch = names[start:start + batch_size]
+                refcounts = dict(cls.objects.select_for_update().filter(name__in=batch).values_list('name', 'refcount'))
+                used = [name for name in refcounts if refcounts[name] > counts[name]]
+                if used:
+                    cls.objects.filter(name__in=used).update(refcount=models.F('refcount') - Case(
+                        *(When(name=name, then=Value(counts[name])) for name in used), default=Value(0),
+                    ))
+                freed = [name for name in batch if name not in used]
+                cls.objects.filter(name__in=freed).delete()
+                released += freed
+        return released
+
+    def __str__(self):
+        return self.name + ' ' + str(self.refcount)
+
+
+class FileRemoval(models.Model):
+    """
+    Stored file queued for removal by `FileRemover` in the transaction that released it.
+    """
+    name = models.CharField(max_length=100)
+    attempts = models.IntegerField(default=0)
+    next_attempt_date = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.name + ' ' + str(self.attempts)
+
+
+class StudentStats(models.Model):
+    """
+    Grade statistics of a student, kept up to date by the works service
+    in the transactions that change the works.
+    """
+    COUNTERS = ('works_count', 'marked_count', 'marks_sum')
+
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    works_count = models.IntegerField(default=0)
+    marked_count = models.IntegerField(default=0)
+    marks_sum = models.BigIntegerField(default=0)
+    last_submitted_date = models.DateTimeField(null=True)
+
+    @property
+    def unmarked_count(self) -> int:
+        return self.works_count - self.marked_count
+
+    @property
+    def average_mark(self) -> float | None:
+        return self.marks_sum / self.marked_count if self.marked_count else None
+
+    @staticmethod
+    def work_delta(work: PracticalWork) -> dict:
+        return {
+            'works_count': 1,
+            'marked_count': int(work.mark is not None),
+            'marks_sum': work.mark or 0,
+            'last_submitted_date': work.submitting_date,
+        }
+
+    @staticmethod
+    def merge(deltas: dict, student_id: uuid.UUID, delta: dict) -> None:
+        total = deltas.setdefault(student_id, {})
+        for field, value in delta.items():
+            if field == 'last_submitted_date':
+                total[field] = max(filter(None, (total.get(field), value)), default=None)
+            else:
+                total[field] = total.get(field, 0) + value
+
+    @classmethod
+    def apply(cls, deltas: dict[uuid.UUID, dict], create: bool = True, batch_size: int = 500) -> None:
+        """
+        Adds `deltas` (`{student id: {field: change}}`) to the counters
+        and moves `last_submitted_date` forward, with one UPDATE per batch of students.
+        Missing rows are created from the deltas unless `create` is False.
+        """
+        ids = list(deltas)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            changes = {}
+            for field in cls.COUNTERS:
+                whens = [When(student_id=id, then=Value(deltas[id][field])) for id in batch if deltas[id].get(field)]
+                if whens:
+                    changes[field] = models.F(field) + Case(*whens, default=Value(0))
+            whens = [When(student_id=id, then=Value(deltas[id]['last_submitted_date']))
+                     for id in batch if deltas[id].get('last_submitted_date')]
+            if whens:
+                latest = Case(*whens, default=models.F('last_submitted_date'), output_field=models.DateTimeField())
+                changes['last_submitted_date'] = Greatest(Coalesce(models.F('last_submitted_date'), latest), latest)
+            updated = cls.objects.filter(student_id__in=batch).update(**changes) if changes else len(batch)
+            if create and updated < len(batch):
+                cls._create_missing({id: deltas[id] for id in batch})
+
+    @classmethod
+    def _create_missing(cls, deltas: dict[uuid.UUID, dict]) -> None:
+        existing = set(cls.objects.filter(student_id__in=list(deltas)).values_list('student_id', flat=True))
+        missing = {id: delta for id, delta in deltas.items() if id not in existing}
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([cls(student_id=id, **delta) for id, delta in missing.items()])
+        except IntegrityError:
+            # Created concurrently, the rows exist now
+            cls.apply(missing)
+
+    def __str__(self):
+        return str(self.student_id) + ' ' + str(self.works_count)
+
+
+@receiver(models.signals.post_delete, sender=PracticalWork)
+def update_stats_on_delete(sender, instance, origin=None, **kwargs):
+    # Stats of a deleted student go away with it
+    if isinstance(origin, Student) or getattr(origin, 'model', None) is Student:
+        return
+    delta = StudentStats.work_delta(instance)
+    StudentStats.apply({instance.student_id: {field: -delta[field] for field in StudentStats.COUNTERS}},
+                       create=False)
+    StudentStats.objects.filter(student_id=instance.student_id, last_submitted_date=instance.submitting_date).update(
+        last_submitted_date=models.Subquery(
+            PracticalWork.objects.filter(student_id=models.OuterRef('student_id'))
+            .order_by('-submitting_date').values('submitting_date')[:1]
+        )
+    )
+
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Student)
+def invalidate_cached_student(sender, instance, **kwargs):
+    student_cache.invalidate(instance.pk)
+
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=PracticalWork)
+def invalidate_cached_work(sender, instance, **kwargs):
+    work_cache.invalidate(instance.pk)
+
+
+@receiver(models.signals.post_save, sender=PracticalWork)
+def acquire_file_on_create(sender, instance, created, **kwargs):
+    if created and instance.file:
+        FileBlob.acquire(instance.file.name)
+
+
 @receiver(models.signals.post_delete, sender=PracticalWork)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
     """
-    Deletes file from filesystem
-    when corresponding `MediaFile` object is deleted.
+    Deletes file from filesystem in the background, after the transaction commits,
+    when the last `PracticalWork` referencing it is deleted.
     """
     if instance.file:
-        if os.path.isfile(instance.file.path):
-            os.remove(instance.file.path)
+        if FileBlob.release(instance.file.name):
+            file_remover.remove_on_commit([instance.file.name])
+
+
+class WorkUpload(models.Model):
+    """
+    Chunked upload of a work file; the work is created on finalize.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, null=False)
+    title = models.CharField(max_length=200)
+    file_name = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    checksum = models.CharField(max_length=64)
+    received_chunks = models.JSONField(default=list)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def chunks_count(self) -> int:
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    @property
+    def missing_chunks(self) -> list[int]:
+        received = set(self.received_chunks)
+        return [index for index in range(self.chunks_count) if index not in received]
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def __str__(self):
+        return self.file_name + ' ' + self.created_date.__str__()
+
+
+class Notification(models.Model):
+    """
+    Outbox of mark notifications. Rows are written in the transaction of the mark
+    and delivered later by `NotificationsService`. A dispatcher sets `claim` and moves
+    `next_attempt_date` past the time it needs to send them.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, null=False)
+    work = models.ForeignKey(PracticalWork, on_delete=models.CASCADE, null=False)
+    mark = models.IntegerField()
+    mark_date = models.DateTimeField()
+    created_date = models.DateTimeField(auto_now_add=True)
+    attempts = models.IntegerField(default=0)
+    next_attempt_date = models.DateTimeField(default=timezone.now)
+    sent_date = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True, default='')
+    claim = models.UUIDField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_date', 'created_date'], condition=models.Q(sent_date__isnull=True),
+                         name='notification_pending_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.work_id) + ' ' + str(self.mark)
+
+
+class ScheduledJob(models.Model):
+    """
+    APScheduler job persisted by `DjangoJobStore`, shared by all processes.
+    """
+    id = models.CharField(primary_key=True, max_length=191)
+    next_run_time = models.DateTimeField(null=True, db_index=True)
+    job_state = models.BinaryField()
+
+    def __str__(self):
+        return self.id + ' ' + str(self.next_run_time)
+
+
+class SchedulerLease(models.Model):
+    """
+    Leadership of a scheduler: only `owner` runs its jobs until `expires_date`.
+    """
+    name = models.CharField(primary_key=True, max_length=100)
+    owner = models.CharField(max_length=200)
+    expires_date = models.DateTimeField()
+
+    def __str__(self):
+        return self.name + ' ' + self.owner
+
+
+class ReportResult(models.Model):
+    """
+    Precomputed result of a report, served as is until the next run.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    generated_date = models.DateTimeField(default=timezone.now)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', '-generated_date'], name='report_latest_idx'),
+        ]
+
+    def __str__(self):
+        return self.name + ' ' + str(self.generated_date)
 
 
 class Operation:
     id: uuid.UUID
     done: bool
+    next_cursor: str | None
+    error: str | None
+    kind: str | None
 
-    def __init__(self, id: uuid.UUID, done: bool = False, result=None) -> None:
+    def __init__(self, id: uuid.UUID, done: bool = False, result=None, next_cursor: str = None,
+                 error: str = None, kind: str = None) -> None:
         self.id = id
         self.done = done
         self.result = result
+        self.next_cursor = next_cursor
+        self.error = error
+        # What started the operation, so results are only read by the matching endpoint
+        self.kind = kind
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
 
     def __eq__(self, other: "Operation") -> bool:
         return (
             self.id == other.id
             and self.done == other.done
             and self.result == other.result
+            and self.next_cursor == other.next_cursor
+            and self.error == other.error
+            and self.kind == other.kind
         )
 
     def __repr__(self) -> str:
@@ -61,5 +387,8 @@ class Operation:
                 "id": self.id,
                 "done": self.done,
                 "result": self.result,
+                "next_cursor": self.next_cursor,
+                "error": self.error,
+                "kind": self.kind,
             }
         )
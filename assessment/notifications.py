@@ -0,0 +1,51 @@
+import sys
+import threading
+from typing import TextIO
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Notification, Student
+
+
+class NotificationSink:
+    """
+    Delivery channel of mark notifications. Gets every pending
+    notification of one student at once.
+    """
+
+    def send(self, student: Student, notifications: list[Notification]) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def format(student: Student, notifications: list[Notification]) -> str:
+        lines = [f"Студенту {student.last_name} выставлены оценки:"]
+        lines += [f"  {notification.work.title}: {notification.mark} в {notification.mark_date}"
+                  for notification in notifications]
+        return '\n'.join(lines) + '\n'
+
+
+class ConsoleNotificationSink(NotificationSink):
+    def __init__(self, stream: TextIO = None) -> None:
+        self.stream = stream
+
+    def send(self, student: Student, notifications: list[Notification]) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(self.format(student, notifications))
+        stream.flush()
+
+
+class FileNotificationSink(NotificationSink):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, student: Student, notifications: list[Notification]) -> None:
+        with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(self.format(student, notifications))
+
+
+def get_notification_sink() -> NotificationSink:
+    config = getattr(settings, 'NOTIFICATIONS', {}).get('SINK', {})
+    sink_class = import_string(config.get('BACKEND', 'assessment.notifications.ConsoleNotificationSink'))
+    return sink_class(**config.get('OPTIONS', {}))
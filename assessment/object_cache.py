@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework.utils.encoders import JSONEncoder
+
+T = TypeVar('T')
+
+
+class ObjectCache:
+    """
+    Read-through cache of single model instances by primary key.
+    Entries are dropped by model signals, both right away and once the transaction commits,
+    so a concurrent reader cannot put the pre-commit row back.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'OBJECT_CACHE', {}).get('CACHE_ALIAS', 'default')]
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'OBJECT_CACHE', {}).get('TTL', 300)
+
+    def _key(self, pk: Hashable) -> str:
+        return f'object:{self.name}:{pk}'
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, pk: Hashable, loader: Callable[[], T]) -> T:
+        value = self.cache.get(self._key(pk))
+        self._count(value is not None)
+        if value is None:
+            value = loader()
+            self.cache.set(self._key(pk), value, self.ttl)
+        return value
+
+    async def aget(self, pk: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        value = await self.cache.aget(self._key(pk))
+        self._count(value is not None)
+        if value is None:
+            value = await loader()
+            await self.cache.aset(self._key(pk), value, self.ttl)
+        return value
+
+    def invalidate(self, *pks: Hashable) -> None:
+        keys = [self._key(pk) for pk in pks]
+        if not keys:
+            return
+        self.cache.delete_many(keys)
+        transaction.on_commit(lambda: self.cache.delete_many(keys))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+student_cache = ObjectCache('student')
+work_cache = ObjectCache('work')
+
+
+def cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in (student_cache, work_cache)}
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in parse_etags(if_none_match)
+
+
+def representation_etag(data) -> str:
+    """
+    Strong ETag of a serialized representation.
+    """
+    content = JSONEncoder(ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode(data)
+    return '"' + hashlib.sha1(content.encode()).hexdigest() + '"'
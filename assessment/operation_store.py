@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Operation
+
+
+def encode_operation(operation: Operation) -> str:
+    return json.dumps(
+        {
+            "id": str(operation.id),
+            "done": operation.done,
+            "result": operation.result,
+            "next_cursor": operation.next_cursor,
+            "error": operation.error,
+            "kind": operation.kind,
+        },
+        cls=JSONEncoder,
+        separators=(',', ':'),
+    )
+
+
+def decode_operation(payload: str) -> Operation:
+    data = json.loads(payload)
+    return Operation(UUID(data["id"]), data["done"], data["result"], data["next_cursor"], data.get("error"),
+                     data.get("kind"))
+
+
+class OperationStore:
+    """
+    Keeps operations as compact JSON payloads for a limited time.
+    """
+
+    def save(self, operation: Operation) -> None:
+        raise NotImplementedError
+
+    def get(self, op_id: UUID) -> Operation | None:
+        raise NotImplementedError
+
+    async def aget(self, op_id: UUID) -> Operation | None:
+        # Stores may block or query the database, which is not allowed on the event loop
+        return await sync_to_async(self.get)(op_id)
+
+    def delete(self, op_id: UUID) -> None:
+        raise NotImplementedError
+
+
+class InMemoryOperationStore(OperationStore):
+    """
+    Per-process LRU store: keeps at most `max_size` operations,
+    each for `ttl` seconds since its last update.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 60 * 60, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._operations: OrderedDict[UUID, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, operation: Operation) -> None:
+        payload = encode_operation(operation)
+        with self._lock:
+            self._operations[operation.id] = (self.clock() + self.ttl, payload)
+            self._operations.move_to_end(operation.id)
+            while len(self._operations) > self.max_size:
+                self._operations.popitem(last=False)
+
+    def get(self, op_id: UUID) -> Operation | None:
+        with self._lock:
+            entry = self._operations.get(op_id)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= self.clock():
+                del self._operations[op_id]
+                return None
+            self._operations.move_to_end(op_id)
+        return decode_operation(payload)
+
+    async def aget(self, op_id: UUID) -> Operation | None:
+        # A dict lookup, cheaper than a thread hop
+        return self.get(op_id)
+
+    def delete(self, op_id: UUID) -> None:
+        with self._lock:
+            self._operations.pop(op_id, None)
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+
+class CacheOperationStore(OperationStore):
+    """
+    Store shared between worker processes through Django's cache framework.
+    Size-based eviction is up to the cache backend (`MAX_ENTRIES`, `maxmemory`),
+    so `cache_alias` must point at a shared backend (database, file, Redis)
+    when several workers serve the API.
+    """
+
+    def __init__(self, ttl: float = 60 * 60, cache_alias: str = 'default', key_prefix: str = 'operation:'):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, op_id: UUID) -> str:
+        return f'{self.key_prefix}{op_id}'
+
+    def save(self, operation: Operation) -> None:
+        self.cache.set(self._key(operation.id), encode_operation(operation), timeout=self.ttl)
+
+    def get(self, op_id: UUID) -> Operation | None:
+        payload = self.cache.get(self._key(op_id))
+        return None if payload is None else decode_operation(payload)
+
+    async def aget(self, op_id: UUID) -> Operation | None:
+        payload = await self.cache.aget(self._key(op_id))
+        return None if payload is None else decode_operation(payload)
+
+    def delete(self, op_id: UUID) -> None:
+        self.cache.delete(self._key(op_id))
+
+
+_store: OperationStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_operation_store() -> OperationStore:
+    """
+    Returns the process-wide store, so sync and async views see the same operations.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = getattr(settings, 'OPERATIONS_STORE', {})
+            store_class = import_string(config.get('BACKEND', 'assessment.operation_store.InMemoryOperationStore'))
+            _store = store_class(**config.get('OPTIONS', {}))
+        return _store
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+
+
+class Page:
+    """
+    Slice of an ordered result set together with the cursor
+    pointing right after its last item (`None` on the last page).
+    """
+    items: list
+    next_cursor: str | None
+
+    def __init__(self, items: list, next_cursor: str | None = None) -> None:
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __eq__(self, other: "Page") -> bool:
+        return self.items == other.items and self.next_cursor == other.next_cursor
+
+    def __repr__(self) -> str:
+        return str({"items": self.items, "next_cursor": self.next_cursor})
+
+
+def _encode(values: list[str]) -> str:
+    raw = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(cursor: str) -> list[str]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Некорректный курсор")
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Некорректный курсор")
+    return values
+
+
+def encode_cursor(submitting_date: datetime, id: UUID) -> str:
+    return _encode([submitting_date.isoformat(), str(id)])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        submitting_date, id = _decode(cursor)
+        return datetime.fromisoformat(submitting_date), UUID(id)
+    except (TypeError, ValueError):
+        raise ValueError("Некорректный курсор")
+
+
+def encode_student_cursor(last_name: str, id: UUID) -> str:
+    return _encode([last_name, str(id)])
+
+
+def decode_student_cursor(cursor: str) -> tuple[str, UUID]:
+    try:
+        last_name, id = _decode(cursor)
+        return last_name, UUID(id)
+    except (TypeError, ValueError):
+        raise ValueError("Некорректный курсор")
@@ -0,0 +1,34 @@
+from typing import Callable
+
+from django.db.models import Count, Min
+
+from .models import PracticalWork
+
+
+class Report:
+    def __init__(self, name: str, title: str, build: Callable[[], object]) -> None:
+        self.name = name
+        self.title = title
+        self.build = build
+
+
+def ungraded_works() -> list[dict]:
+    """
+    Students with unmarked works, most unmarked and longest waiting first.
+    """
+    rows = (PracticalWork.objects.filter(mark__isnull=True)
+            .values('student_id', 'student__name', 'student__last_name')
+            .annotate(ungraded_count=Count('id'), oldest_submitting_date=Min('submitting_date'))
+            .order_by('-ungraded_count', 'oldest_submitting_date'))
+    return [{
+        'student_id': row['student_id'],
+        'name': row['student__name'],
+        'last_name': row['student__last_name'],
+        'ungraded_count': row['ungraded_count'],
+        'oldest_submitting_date': row['oldest_submitting_date'],
+    } for row in rows]
+
+
+REPORTS: dict[str, Report] = {report.name: report for report in (
+    Report('ungraded_works', "Непроверенные работы по студентам", ungraded_works),
+)}
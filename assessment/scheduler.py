@@ -1,5 +1,58 @@
+import threading
+
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.db import close_old_connections
 
 scheduler = BackgroundScheduler()
-scheduler.start()
+_start_lock = threading.Lock()
+
+
+def get_scheduler() -> BackgroundScheduler:
+    """
+    Returns the scheduler for delayed jobs, starting it on first use
+    instead of on import.
+    """
+    with _start_lock:
+        if not scheduler.running:
+            scheduler.start()
+    return scheduler
+
+
+class DatabaseScheduler(BackgroundScheduler):
+    """
+    Background scheduler with jobs in the database. Its thread looks for due jobs outside
+    of any request, so stale connections are closed around each pass as after a request.
+    """
+
+    def _process_jobs(self):
+        close_old_connections()
+        try:
+            return super()._process_jobs()
+        finally:
+            close_old_connections()
+
+
+_reports_scheduler: BackgroundScheduler | None = None
+
+
+def get_reports_scheduler() -> BackgroundScheduler:
+    """
+    Returns the scheduler of jobs persisted in the database. It starts paused:
+    any process can add jobs, only the holder of the scheduler lease resumes it and runs them.
+    Missed runs are run once as soon as a leader is up.
+    """
+    global _reports_scheduler
+    with _start_lock:
+        if _reports_scheduler is None:
+            # Imported here, models import this module
+            from .jobstores import DjangoJobStore
+
+            _reports_scheduler = DatabaseScheduler(
+                jobstores={'default': DjangoJobStore()},
+                job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': None},
+            )
+            _reports_scheduler.start(paused=True)
+    return _reports_scheduler
@@ -1,10 +1,20 @@
+from uuid import UUID
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from assessment.models import Student, PracticalWork
+from assessment.models import Student, PracticalWork, WorkUpload, StudentStats, ReportResult
+from assessment.pagination import decode_cursor, decode_student_cursor
+
+STUDENT_FIELDS = ['id', 'name', 'last_name', 'submitted_works_count']
+OPERATION_MAX_WAIT = 60
 
 
 class GetOperationQuerySerializer(serializers.Serializer):
     id = serializers.UUIDField(required=True)
+    wait = serializers.FloatField(required=False, min_value=0, max_value=OPERATION_MAX_WAIT,
+                                  help_text="Seconds to wait for the operation to finish")
 
 
 class GetWorksQuerySerializer(serializers.Serializer):
@@ -13,6 +23,26 @@ class GetWorksQuerySerializer(serializers.Serializer):
     from_date = serializers.DateField(required=False)
     to_date = serializers.DateField(required=False)
     student_id = serializers.UUIDField(required=False)
+    marked = serializers.BooleanField(required=False, allow_null=True, default=None)
+    cursor = serializers.CharField(required=False)
+
+    def validate_cursor(self, value: str) -> str:
+        try:
+            decode_cursor(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+
+class FilterWorksQuerySerializer(serializers.Serializer):
+    from_date = serializers.DateField(required=False)
+    to_date = serializers.DateField(required=False)
+    student_id = serializers.UUIDField(required=False)
+    marked = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+
+class ExportWorksQuerySerializer(FilterWorksQuerySerializer):
+    export_format = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
 
 
 class NewStudentSerializer(serializers.Serializer):
@@ -20,11 +50,60 @@ class NewStudentSerializer(serializers.Serializer):
     last_name = serializers.CharField(max_length=20)
 
 
+class GetStudentsQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    cursor = serializers.CharField(required=False)
+    name = serializers.CharField(required=False, max_length=20)
+    fields = serializers.CharField(required=False)
+
+    def validate_cursor(self, value: str) -> str:
+        try:
+            decode_student_cursor(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+    def validate_fields(self, value: str) -> list[str]:
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = set(fields) - set(STUDENT_FIELDS)
+        if unknown:
+            raise serializers.ValidationError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+        return fields
+
+
 class StudentSerializer(serializers.ModelSerializer):
+    """
+    Accepts an optional `fields` list to output only some of the fields.
+    """
+
     class Meta:
         model = Student
         fields = '__all__'
 
+    def __init__(self, *args, fields: list[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class StudentStatsSerializer(serializers.ModelSerializer):
+    unmarked_count = serializers.IntegerField(read_only=True)
+    average_mark = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = StudentStats
+        fields = ['student', 'works_count', 'marked_count', 'unmarked_count', 'average_mark', 'last_submitted_date']
+
+
+class BulkDeleteStudentsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=5000)
+
+
+class StudentsPageSerializer(serializers.Serializer):
+    results = StudentSerializer(many=True)
+    next_cursor = serializers.CharField(allow_null=True)
+
 
 class WorkSerializer(serializers.ModelSerializer):
     class Meta:
@@ -38,11 +117,109 @@ class WorkRequestSerializer(serializers.Serializer):
     file = serializers.FileField()
 
 
+class BulkWorkSerializer(serializers.Serializer):
+    """
+    Row of a works import. Existing student ids can be passed
+    in the `student_ids` context to check all rows with one query.
+    """
+    student_id = serializers.UUIDField()
+    title = serializers.CharField(max_length=200)
+    file = serializers.CharField(max_length=100, required=False, allow_null=True)
+    mark = serializers.IntegerField(min_value=0, max_value=100, required=False, allow_null=True)
+
+    def validate_student_id(self, value: UUID) -> UUID:
+        student_ids = self.context.get('student_ids')
+        if student_ids is not None and value not in student_ids:
+            raise serializers.ValidationError("Студент не найден")
+        return value
+
+
+class NewUploadSerializer(serializers.Serializer):
+    student_id = serializers.UUIDField()
+    title = serializers.CharField(max_length=200)
+    file_name = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$', help_text="SHA-256 of the whole file")
+    chunk_size = serializers.IntegerField(min_value=1024, max_value=64 * 1024 * 1024, default=4 * 1024 * 1024)
+
+    def validate_student_id(self, value: UUID) -> UUID:
+        if not Student.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Студент не найден")
+        return value
+
+    def validate_size(self, value: int) -> int:
+        if value > settings.UPLOADS['MAX_SIZE']:
+            raise serializers.ValidationError(f"Размер файла не должен превышать {settings.UPLOADS['MAX_SIZE']} байт")
+        return value
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    chunks_count = serializers.IntegerField(read_only=True)
+    missing_chunks = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = WorkUpload
+        fields = '__all__'
+
+
 class MarkWorkQuerySerializer(serializers.Serializer):
     mark = serializers.IntegerField()
 
 
+class BulkMarkSerializer(serializers.DictField):
+    """
+    `{work id: mark}` map of a bulk grading request.
+    """
+    max_marks = 5000
+
+    def __init__(self, **kwargs):
+        super().__init__(child=serializers.IntegerField(), allow_empty=False, **kwargs)
+
+    def to_internal_value(self, data) -> dict[UUID, int]:
+        marks = super().to_internal_value(data)
+        if len(marks) > self.max_marks:
+            raise serializers.ValidationError(f"Не более {self.max_marks} оценок за запрос")
+        try:
+            return {UUID(id): mark for id, mark in marks.items()}
+        except ValueError:
+            raise serializers.ValidationError("Некорректный идентификатор работы")
+
+
+@extend_schema_field(WorkSerializer(many=True))
+class WorkPayloadListField(serializers.ListField):
+    """
+    Works already serialized with `WorkSerializer` when the operation finished.
+    """
+    child = serializers.DictField()
+
+
 class OperationSerializer(serializers.Serializer):
     id = serializers.UUIDField(required=True)
     done = serializers.BooleanField()
-    result = serializers.ListField(child=WorkSerializer())
+    result = WorkPayloadListField(allow_null=True)
+    next_cursor = serializers.CharField(allow_null=True)
+    failed = serializers.BooleanField(help_text="The operation is done without a result")
+    error = serializers.CharField(allow_null=True)
+
+
+class ReportSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    title = serializers.CharField()
+    schedule = serializers.CharField(allow_null=True)
+    next_run_time = serializers.DateTimeField(allow_null=True)
+    last_generated_date = serializers.DateTimeField(allow_null=True)
+
+
+class ReportResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportResult
+        fields = '__all__'
+
+
+class ScheduleReportSerializer(serializers.Serializer):
+    run_date = serializers.DateTimeField(required=False, help_text="Right away when omitted")
+
+
+class ScheduledReportSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    run_date = serializers.DateTimeField(source='next_run_time')
@@ -0,0 +1,142 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from itertools import groupby
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from ..executors import OperationRejected, get_executor
+from ..models import Notification, PracticalWork
+from ..notifications import NotificationSink, get_notification_sink
+from ..scheduler import get_scheduler, DateTrigger
+
+logger = logging.getLogger(__name__)
+
+RETRY_JOB_ID = 'notifications-retry'
+
+
+class NotificationsService:
+    # One drain at a time per process, both retries and commit wake-ups go through it
+    _drain_lock = threading.Lock()
+
+    def __init__(self, sink: NotificationSink = None):
+        self._sink = sink
+        config = getattr(settings, 'NOTIFICATIONS', {})
+        self.batch_size = config.get('BATCH_SIZE', 100)
+        self.max_attempts = config.get('MAX_ATTEMPTS', 5)
+        self.retry_delay = config.get('RETRY_DELAY', 30)
+        self.interval = config.get('INTERVAL', 10)
+        self.claim_timeout = config.get('CLAIM_TIMEOUT', 300)
+
+    @property
+    def sink(self) -> NotificationSink:
+        if self._sink is None:
+            self._sink = get_notification_sink()
+        return self._sink
+
+    def enqueue(self, works: Iterable[PracticalWork]) -> None:
+        """
+        Writes notifications about the marks of `works` to the outbox.
+        Must be called inside the transaction saving the marks,
+        the dispatcher is woken up once it commits.
+        """
+        Notification.objects.bulk_create([
+            Notification(student_id=work.student_id, work_id=work.id, mark=work.mark, mark_date=work.mark_date)
+            for work in works
+        ])
+        transaction.on_commit(self.wake)
+
+    def wake(self) -> None:
+        """
+        Runs one delivery pass on the executor. Due retries are picked up by a later pass,
+        scheduled only while failed notifications are waiting.
+        """
+        try:
+            get_executor().submit(self.deliver, name='notifications_drain')
+        except OperationRejected:
+            self._wake_at(timezone.now() + timedelta(seconds=self.retry_delay))
+
+    def deliver(self) -> int:
+        """
+        Drains the outbox and schedules the next pass for the earliest retry.
+        """
+        processed = self.drain()
+        next_date = (Notification.objects.filter(sent_date__isnull=True, attempts__lt=self.max_attempts)
+                     .aggregate(next=Min('next_attempt_date'))['next'])
+        if next_date is not None:
+            self._wake_at(next_date)
+        return processed
+
+    def _wake_at(self, run_date) -> None:
+        get_scheduler().add_job(self.wake, trigger=DateTrigger(run_date), id=RETRY_JOB_ID, replace_existing=True)
+
+    def drain(self) -> int:
+        """
+        Dispatches batches until the due part of the outbox is empty.
+        Returns the number of processed notifications, 0 if another drain is running.
+        """
+        if not self._drain_lock.acquire(blocking=False):
+            return 0
+        try:
+            total = 0
+            while processed := self.dispatch():
+                total += processed
+                if processed < self.batch_size:
+                    break
+            return total
+        finally:
+            self._drain_lock.release()
+
+    def dispatch(self) -> int:
+        """
+        Sends one batch of due notifications. Marks of one student are coalesced
+        into a single message, only the latest mark of each work is reported.
+        Failed messages are retried with exponential backoff up to `max_attempts` times.
+
+        The batch is claimed for `claim_timeout` seconds in a short transaction and sent
+        after it commits; notifications of a dispatcher that stopped mid-batch are sent again.
+        """
+        now = timezone.now()
+        claim = uuid.uuid4()
+        with transaction.atomic():
+            ids = list(
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(sent_date__isnull=True, attempts__lt=self.max_attempts, next_attempt_date__lte=now)
+                .order_by('next_attempt_date', 'created_date')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            # SQLite ignores skip_locked, the condition leaves out rows claimed by another dispatcher since
+            Notification.objects.filter(id__in=ids, sent_date__isnull=True, next_attempt_date__lte=now).update(
+                claim=claim, next_attempt_date=now + timedelta(seconds=self.claim_timeout),
+            )
+        batch = list(Notification.objects.select_related('student', 'work').filter(id__in=ids, claim=claim))
+        batch.sort(key=lambda notification: (str(notification.student_id), notification.mark_date))
+
+        sent = []
+        for _, group in groupby(batch, key=lambda notification: notification.student_id):
+            group = list(group)
+            latest = sorted({notification.work_id: notification for notification in group}.values(),
+                            key=lambda notification: notification.mark_date)
+            try:
+                self.sink.send(group[0].student, latest)
+            except Exception as e:
+                logger.warning("Notification to student %s failed: %s", group[0].student_id, e)
+                attempts = max(notification.attempts for notification in group)
+                Notification.objects.filter(id__in=[notification.id for notification in group]).update(
+                    attempts=F('attempts') + 1,
+                    next_attempt_date=timezone.now() + timedelta(seconds=self.retry_delay * 2 ** attempts),
+                    last_error=str(e),
+                )
+            else:
+                sent += [notification.id for notification in group]
+        if sent:
+            Notification.objects.filter(id__in=sent).update(sent_date=timezone.now())
+        return len(batch)
+
+    def get_pending_count(self) -> int:
+        return Notification.objects.filter(sent_date__isnull=True, attempts__lt=self.max_attempts).count()
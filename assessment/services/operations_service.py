@@ -1,44 +1,197 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
 from uuid import UUID, uuid4
 from typing import Callable
 from datetime import datetime
 
+from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.serializers import Serializer
 
+from ..executors import OperationRejected, get_executor
 from ..models import Operation
-from ..scheduler import scheduler, DateTrigger
+from ..operation_store import OperationStore, get_operation_store
+from ..pagination import Page
+from ..scheduler import get_scheduler, DateTrigger
+
+logger = logging.getLogger(__name__)
+
+# Details of unexpected errors stay in the log
+OPERATION_FAILED = "Операция завершилась с ошибкой"
+
+
+class OperationSignals:
+    """
+    In-process wake-ups for clients waiting on operations.
+    Callbacks run in the thread finishing the operation.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._callbacks: dict[UUID, list[Callable[[], None]]] = defaultdict(list)
+
+    def subscribe(self, op_id: UUID, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._callbacks[op_id].append(callback)
+
+    def unsubscribe(self, op_id: UUID, callback: Callable[[], None]) -> None:
+        with self._lock:
+            callbacks = self._callbacks.get(op_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop(op_id, None)
+
+    def publish(self, op_id: UUID) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks.get(op_id, []))
+        for callback in callbacks:
+            callback()
+
+
+signals = OperationSignals()
 
 
 class OperationsService:
 
-    def __init__(self):
-        self.operations: dict[UUID, Operation] = {}
+    def __init__(self, store: OperationStore = None):
+        self.store = store if store is not None else get_operation_store()
+        # Operations finished by other workers only show up in the shared store
+        self.poll_interval = getattr(settings, 'OPERATIONS_WAIT', {}).get('POLL_INTERVAL', 1)
 
     def execute_operation(
         self,
         func: Callable,
         run_date: datetime | str = None,
         args: list | tuple | dict = (),
+        serializer_class: type[Serializer] = None,
+        executor: str = 'default',
+        kind: str = None,
     ) -> UUID:
+        """
+        Runs `func(**args)` on the `executor` pool, right away
+        or at `run_date`, and returns the id of the operation.
+        Raises `OperationRejected` when the pool is saturated.
+        """
         op_id = uuid4()
-        self.operations[op_id] = Operation(op_id)
+        self.store.save(Operation(op_id, kind=kind))
+
+        def __submit() -> None:
+            future = get_executor(executor).submit(func, dict(args))
+            future.add_done_callback(lambda f: self.__finish(op_id, f, serializer_class))
 
-        def __exec_func() -> None:
-            res = func(**args)
-            self.finish_operation(op_id, res)
+        def __submit_scheduled() -> None:
+            try:
+                __submit()
+            except OperationRejected as e:
+                logger.warning("Scheduled operation %s rejected", op_id)
+                self.fail_operation(op_id, str(e))
+            except Exception:
+                logger.exception("Scheduled operation %s could not be submitted", op_id)
+                self.fail_operation(op_id, OPERATION_FAILED)
 
-        scheduler.add_job(
-            __exec_func,
-            trigger=DateTrigger(timezone.now() if run_date is None else run_date),
-        )
+        if isinstance(run_date, str):
+            run_date = parse_datetime(run_date)
+        if run_date is None or run_date <= timezone.now():
+            try:
+                __submit()
+            except Exception:
+                self.store.delete(op_id)
+                raise
+        else:
+            get_scheduler().add_job(__submit_scheduled, trigger=DateTrigger(run_date))
         return op_id
 
-    def finish_operation(self, op_id: UUID, result) -> bool:
-        op: Operation = self.operations.get(op_id)
+    def __finish(self, op_id: UUID, future: Future, serializer_class: type[Serializer] = None) -> None:
+        try:
+            self.finish_operation(op_id, future.result(), serializer_class)
+        except Exception:
+            logger.exception("Operation %s failed", op_id)
+            self.fail_operation(op_id, OPERATION_FAILED)
+
+    def finish_operation(self, op_id: UUID, result, serializer_class: type[Serializer] = None) -> bool:
+        op: Operation = self.store.get(op_id)
         if op is None:
             return False
+        if isinstance(result, Page):
+            op.next_cursor = result.next_cursor
+            result = result.items
+        if serializer_class is not None:
+            result = serializer_class(result, many=True).data
         op.result = result
         op.done = True
+        self.store.save(op)
+        signals.publish(op_id)
+        return True
+
+    def fail_operation(self, op_id: UUID, error: str) -> bool:
+        """
+        Marks the operation done without a result, so waiting clients stop waiting.
+        """
+        op: Operation = self.store.get(op_id)
+        if op is None:
+            return False
+        op.result = None
+        op.error = error
+        op.done = True
+        self.store.save(op)
+        signals.publish(op_id)
         return True
 
     def get_operation(self, op_id: UUID) -> Operation | None:
-        return self.operations.get(op_id)
+        return self.store.get(op_id)
+
+    async def aget_operation(self, op_id: UUID) -> Operation | None:
+        return await self.store.aget(op_id)
+
+    def wait_operation(self, op_id: UUID, timeout: float) -> Operation | None:
+        """
+        Returns the operation as soon as it is done or `timeout` seconds pass.
+        Finishing in this process wakes the waiter at once,
+        other workers are noticed by re-reading the store every `poll_interval` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        event = threading.Event()
+        signals.subscribe(op_id, event.set)
+        try:
+            while True:
+                op = self.store.get(op_id)
+                remaining = deadline - time.monotonic()
+                if op is None or op.done or remaining <= 0:
+                    return op
+                event.wait(min(remaining, self.poll_interval))
+                event.clear()
+        finally:
+            signals.unsubscribe(op_id, event.set)
+
+    async def await_operation(self, op_id: UUID, timeout: float) -> Operation | None:
+        """
+        Same as `wait_operation` without holding a thread while waiting.
+        """
+        deadline = time.monotonic() + timeout
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake() -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+        signals.subscribe(op_id, wake)
+        try:
+            while True:
+                op = await self.store.aget(op_id)
+                remaining = deadline - time.monotonic()
+                if op is None or op.done or remaining <= 0:
+                    return op
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            signals.unsubscribe(op_id, wake)
@@ -0,0 +1,167 @@
+import logging
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+from apscheduler.job import Job
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Max
+from django.http import Http404
+from django.utils import timezone
+
+from ..leader import LeaderLease
+from ..models import ReportResult
+from ..reports import REPORTS, Report
+from ..scheduler import get_scheduler, get_reports_scheduler, CronTrigger, DateTrigger, IntervalTrigger
+
+logger = logging.getLogger(__name__)
+
+LEADER_JOB_ID = 'reports-leader'
+LEASE_NAME = 'reports'
+RECURRING_PREFIX = 'report:'
+ONCE_PREFIX = 'report-once:'
+
+
+def run_report(name: str) -> None:
+    # Persisted jobs reference this function by its import path
+    close_old_connections()
+    try:
+        ReportsService().generate_report(name)
+    finally:
+        close_old_connections()
+
+
+class ReportsService:
+    """
+    Scheduled reports. Jobs are kept in the database and run by the one process holding
+    the reports lease; results are stored, so reading a report never computes it.
+    """
+    _lock = threading.Lock()
+    _lease: LeaderLease | None = None
+    _leading = False
+
+    def __init__(self) -> None:
+        config = getattr(settings, 'REPORTS', {})
+        self.autostart = config.get('AUTOSTART', False)
+        self.lease_ttl = config.get('LEASE_TTL', 60)
+        self.keep = config.get('KEEP', 7)
+        self.schedules = config.get('SCHEDULES', {})
+
+    @property
+    def lease(self) -> LeaderLease:
+        if ReportsService._lease is None:
+            ReportsService._lease = LeaderLease(LEASE_NAME, self.lease_ttl)
+        return ReportsService._lease
+
+    def start(self) -> None:
+        """
+        Makes this process compete for the lease, renewing it every `lease_ttl / 3` seconds.
+        """
+        scheduler = get_scheduler()
+        if scheduler.get_job(LEADER_JOB_ID) is None:
+            scheduler.add_job(self._renew, trigger=IntervalTrigger(seconds=self.lease_ttl / 3), id=LEADER_JOB_ID,
+                              replace_existing=True, max_instances=1, coalesce=True, next_run_time=timezone.now())
+
+    def stop(self) -> None:
+        scheduler = get_scheduler()
+        if scheduler.get_job(LEADER_JOB_ID) is not None:
+            scheduler.remove_job(LEADER_JOB_ID)
+        with self._lock:
+            if ReportsService._leading:
+                get_reports_scheduler().pause()
+                ReportsService._leading = False
+            self.lease.release()
+
+    def _renew(self) -> None:
+        # Runs in a scheduler thread, like run_report
+        close_old_connections()
+        try:
+            self.elect()
+        finally:
+            close_old_connections()
+
+    def elect(self) -> bool:
+        """
+        Takes or renews the lease and returns whether this process leads.
+        The leader runs the persisted jobs, the other processes keep their scheduler paused.
+        """
+        with self._lock:
+            try:
+                leading = self.lease.acquire()
+            except DatabaseError:
+                logger.exception("Could not renew the reports lease")
+                leading = False
+            scheduler = get_reports_scheduler()
+            if leading and not ReportsService._leading:
+                self.sync_schedules()
+                scheduler.resume()
+            elif leading:
+                # Jobs added by other processes are only noticed when the scheduler wakes up
+                scheduler.wakeup()
+            elif ReportsService._leading:
+                scheduler.pause()
+            ReportsService._leading = leading
+            return leading
+
+    def sync_schedules(self) -> None:
+        """
+        Makes the recurring jobs match `REPORTS['SCHEDULES']`. Unchanged jobs are kept
+        with their next run time, so a run missed while no process was leading still happens.
+        """
+        scheduler = get_reports_scheduler()
+        for name, fields in self.schedules.items():
+            self._report(name)
+            trigger = CronTrigger(**fields)
+            job = scheduler.get_job(RECURRING_PREFIX + name)
+            if job is None or str(job.trigger) != str(trigger):
+                scheduler.add_job(run_report, trigger=trigger, args=[name], id=RECURRING_PREFIX + name,
+                                  replace_existing=True)
+        for job in scheduler.get_jobs():
+            if job.id.startswith(RECURRING_PREFIX) and job.id[len(RECURRING_PREFIX):] not in self.schedules:
+                job.remove()
+
+    def schedule_report(self, name: str, run_date: datetime = None) -> Job:
+        """
+        Persists a one-off run of the report at `run_date`, right away by default.
+        """
+        self._report(name)
+        return get_reports_scheduler().add_job(run_report, trigger=DateTrigger(run_date or timezone.now()),
+                                               args=[name], id=f'{ONCE_PREFIX}{name}:{uuid4().hex}')
+
+    def generate_report(self, name: str) -> ReportResult:
+        report = self._report(name)
+        result = ReportResult.objects.create(name=name, data=report.build())
+        stale = ReportResult.objects.filter(name=name).order_by('-generated_date').values_list('id', flat=True)
+        ReportResult.objects.filter(id__in=list(stale[self.keep:])).delete()
+        return result
+
+    def get_latest_result(self, name: str) -> ReportResult:
+        self._report(name)
+        result = ReportResult.objects.filter(name=name).order_by('-generated_date').first()
+        if result is None:
+            raise Http404("Отчёт ещё не сформирован")
+        return result
+
+    def get_reports(self) -> list[dict]:
+        generated = dict(ReportResult.objects.values('name').annotate(last=Max('generated_date'))
+                         .values_list('name', 'last'))
+        scheduler = get_reports_scheduler()
+        reports = []
+        for name, report in REPORTS.items():
+            job = scheduler.get_job(RECURRING_PREFIX + name)
+            reports.append({
+                'name': name,
+                'title': report.title,
+                'schedule': str(CronTrigger(**self.schedules[name])) if name in self.schedules else None,
+                'next_run_time': job.next_run_time if job else None,
+                'last_generated_date': generated.get(name),
+            })
+        return reports
+
+    @staticmethod
+    def _report(name: str) -> Report:
+        report = REPORTS.get(name)
+        if report is None:
+            raise Http404("Отчёт не найден")
+        return report
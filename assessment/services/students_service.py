@@ -1,8 +1,19 @@
 from uuid import UUID
 
+from django.db import transaction
+from django.db.models import Q, QuerySet
 from django.shortcuts import get_object_or_404
 
-from assessment.models import Student
+from assessment.file_cleanup import file_remover
+from assessment.models import Student, StudentStats, PracticalWork, WorkUpload, FileBlob, Notification
+from assessment.object_cache import student_cache, work_cache
+from assessment.pagination import Page, encode_student_cursor, decode_student_cursor
+from assessment.services.uploads_service import UploadsService
+
+
+# Every model with a foreign key to Student or PracticalWork, all filtered by `student_id`.
+# `delete_students` skips Django's cascades, so new relations must be added here
+STUDENT_RELATED_MODELS = (Notification, StudentStats, WorkUpload, PracticalWork)
 
 
 class StudentsService:
@@ -10,11 +21,90 @@ class StudentsService:
         student.save()
         return Student.objects.get(id=student.id)
 
+    def add_students(self, students: list[Student], batch_size: int = 1000) -> list[Student]:
+        with transaction.atomic():
+            return Student.objects.bulk_create(students, batch_size=batch_size)
+
+    def get_existing_ids(self, ids: set[UUID], batch_size: int = 500) -> set[UUID]:
+        ids = list(ids)
+        existing = set()
+        for start in range(0, len(ids), batch_size):
+            existing.update(Student.objects.filter(id__in=ids[start:start + batch_size]).values_list('id', flat=True))
+        return existing
+
     def get_student(self, id: UUID) -> Student | Student.DoesNotExist:
-        return Student.objects.get(id=id)
+        return student_cache.get(id, lambda: Student.objects.get(id=id))
+
+    async def aget_student(self, id: UUID) -> Student | Student.DoesNotExist:
+        return await student_cache.aget(id, lambda: Student.objects.aget(id=id))
+
+    def get_student_stats(self, id: UUID) -> StudentStats:
+        stats = StudentStats.objects.filter(student_id=id).first()
+        if stats is None:
+            # Rows appear with the first work
+            stats = StudentStats(student=get_object_or_404(Student, id=id))
+        return stats
 
     def get_all_students(self) -> list[Student]:
         return Student.objects.all()
 
+    def get_students_page(
+            self, limit: int, cursor: str = None, name: str = None, fields: list[str] = None
+    ) -> Page:
+        """
+        Returns students ordered by `(last_name, id)` starting right after `cursor`.
+        `name` matches first or last name, `fields` limits the loaded columns.
+        """
+        students = Student.objects.order_by('last_name', 'id')
+        if name:
+            students = students.filter(Q(name__icontains=name) | Q(last_name__icontains=name))
+        if fields:
+            students = students.only(*{*fields, 'last_name'})
+        if cursor:
+            last_name, id = decode_student_cursor(cursor)
+            students = students.filter(
+                Q(last_name__gt=last_name) | Q(last_name=last_name, id__gt=id),
+                last_name__gte=last_name,
+            )
+
+        items = list(students[:limit + 1])
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_student_cursor(items[-1].last_name, items[-1].id)
+        return Page(items, next_cursor)
+
     def delete_student(self, id: UUID) -> None:
-        Student.objects.filter(id=id).delete()
+        self.delete_students([id])
+
+    def delete_students(self, ids: list[UUID]) -> int:
+        """
+        Deletes students with their works, uploads, notifications and stats
+        using one DELETE per table instead of loading and signalling every row.
+        Files no longer referenced are removed in the background after commit.
+        """
+        with transaction.atomic():
+            # Locked first: a work added concurrently is either committed and collected below,
+            # or waits and then fails on the missing student
+            ids = list(Student.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True))
+            work_ids, files = [], {}
+            for work_id, name in PracticalWork.objects.filter(student_id__in=ids).values_list('id', 'file').iterator():
+                work_ids.append(work_id)
+                if name:
+                    files[name] = files.get(name, 0) + 1
+            upload_ids = list(WorkUpload.objects.filter(student_id__in=ids).values_list('id', flat=True))
+            released = FileBlob.release_many(files)
+
+            for model in STUDENT_RELATED_MODELS:
+                _raw_delete(model.objects.filter(student_id__in=ids))
+            deleted = _raw_delete(Student.objects.filter(id__in=ids))
+
+            student_cache.invalidate(*ids)
+            work_cache.invalidate(*work_ids)
+            file_remover.remove_on_commit(released + [UploadsService.part_name(id) for id in upload_ids])
+        return deleted
+
+
+def _raw_delete(queryset: QuerySet) -> int:
+    # Skips the collector: no cascades and no signals, the caller handles both
+    return queryset._raw_delete(queryset.db)
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from typing import BinaryIO
+from uuid import UUID
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from ..models import PracticalWork, WorkUpload
+from .work_check_service import WorkCheckService
+
+UPLOAD_DIR = 'Uploaded Files/'
+COPY_BUFFER_SIZE = 64 * 1024
+# Verified chunks larger than this are buffered on disk
+SPOOL_SIZE = 4 * 1024 * 1024
+
+
+class UploadsService:
+    """
+    Resumable upload protocol for work files: init, any number of
+    (re)tried chunks, finalize. Chunks are written in place into
+    a preallocated `.part` file next to the uploaded files.
+    Uploads not finalized within `UPLOADS['EXPIRY']` seconds are removed.
+    """
+    work_service = WorkCheckService()
+
+    @staticmethod
+    def part_name(upload_id: UUID) -> str:
+        return f'{UPLOAD_DIR}{upload_id}.part'
+
+    def part_path(self, upload: WorkUpload) -> str:
+        return os.path.join(settings.MEDIA_ROOT, self.part_name(upload.id))
+
+    @staticmethod
+    def expiry() -> timedelta:
+        return timedelta(seconds=settings.UPLOADS['EXPIRY'])
+
+    def _active_uploads(self) -> QuerySet:
+        return WorkUpload.objects.filter(created_date__gt=timezone.now() - self.expiry())
+
+    def delete_expired_uploads(self) -> int:
+        """
+        Removes uploads that were not finalized in time together with their part files.
+        """
+        expired = list(WorkUpload.objects.filter(created_date__lte=timezone.now() - self.expiry()))
+        for upload in expired:
+            part_path = self.part_path(upload)
+            upload.delete()
+            if os.path.isfile(part_path):
+                os.remove(part_path)
+        return len(expired)
+
+    def init_upload(self, upload: WorkUpload) -> WorkUpload:
+        # Abandoned uploads are cleaned up as new ones arrive
+        self.delete_expired_uploads()
+        upload.file_name = get_valid_filename(os.path.basename(upload.file_name))
+        upload.save(force_insert=True)
+        os.makedirs(os.path.dirname(self.part_path(upload)), exist_ok=True)
+        with open(self.part_path(upload), 'wb') as part:
+            part.truncate(upload.size)
+        return upload
+
+    def get_upload(self, id: UUID) -> WorkUpload:
+        return get_object_or_404(self._active_uploads(), id=id)
+
+    def write_chunk(self, id: UUID, index: int, stream: BinaryIO, checksum: str) -> WorkUpload:
+        """
+        Writes chunk `index` into its place in the part file. The chunk is buffered
+        and only copied into place once its length and sha256 match, so a corrupt
+        retry of a received chunk never overwrites its good data.
+        """
+        upload = self.get_upload(id)
+        if not 0 <= index < upload.chunks_count:
+            raise ValueError(f"Номер части должен быть от 0 до {upload.chunks_count - 1}")
+
+        expected = upload.chunk_length(index)
+        digest = hashlib.sha256()
+        written = 0
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+            while data := stream.read(min(COPY_BUFFER_SIZE, expected - written + 1)):
+                written += len(data)
+                if written > expected:
+                    raise ValueError(f"Размер части больше {expected} байт")
+                digest.update(data)
+                buffer.write(data)
+            if written != expected:
+                raise ValueError(f"Размер части должен быть {expected} байт")
+            if digest.hexdigest() != checksum.lower():
+                raise ValueError("Контрольная сумма части не совпадает")
+
+            buffer.seek(0)
+            with transaction.atomic():
+                # Concurrent writes of the same chunk go one at a time
+                upload = get_object_or_404(self._active_uploads().select_for_update(), id=upload.id)
+                with open(self.part_path(upload), 'r+b') as part:
+                    part.seek(index * upload.chunk_size)
+                    shutil.copyfileobj(buffer, part, COPY_BUFFER_SIZE)
+                if index not in upload.received_chunks:
+                    upload.received_chunks.append(index)
+                    upload.save(update_fields=['received_chunks'])
+        return upload
+
+    def finalize_upload(self, id: UUID) -> PracticalWork:
+        upload = self.get_upload(id)
+        if upload.missing_chunks:
+            raise ValueError(f"Не загружены части: {upload.missing_chunks}")
+
+        digest = hashlib.sha256()
+        try:
+            with open(self.part_path(upload), 'rb') as part:
+                while data := part.read(COPY_BUFFER_SIZE):
+                    digest.update(data)
+        except FileNotFoundError:
+            # Finalized or deleted by a concurrent request
+            raise Http404
+        if digest.hexdigest() != upload.checksum.lower():
+            raise ValueError("Контрольная сумма файла не совпадает")
+
+        part_path = self.part_path(upload)
+        storage = PracticalWork.file.field.storage
+        content_addressed = hasattr(storage, 'adopt')
+        if content_addressed:
+            name = storage.blob_name(UPLOAD_DIR + upload.file_name, digest.hexdigest())
+        else:
+            name = storage.get_available_name(UPLOAD_DIR + upload.file_name)
+        with transaction.atomic():
+            # A concurrent finalize of the same upload waits here and then finds it gone
+            upload = get_object_or_404(self._active_uploads().select_for_update(), id=upload.id)
+            work = self.work_service.add_work(
+                PracticalWork(student_id=upload.student_id, title=upload.title, file=name)
+            )
+            upload.delete()
+            if content_addressed:
+                storage.adopt(part_path, UPLOAD_DIR + upload.file_name, digest.hexdigest())
+            else:
+                os.replace(part_path, storage.path(name))
+        return work
+
+    def delete_upload(self, id: UUID) -> None:
+        upload = self.get_upload(id)
+        part_path = self.part_path(upload)
+        upload.delete()
+        if os.path.isfile(part_path):
+            os.remove(part_path)
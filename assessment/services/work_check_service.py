@@ -1,55 +1,218 @@
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from typing import Set, List
 from uuid import UUID
 
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import QuerySet, Q, F, Case, When, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from ..models import Student, PracticalWork
+from ..archives import archive_entries
+from ..file_cleanup import file_remover
+from ..models import Student, PracticalWork, FileBlob, StudentStats
+from ..object_cache import student_cache, work_cache
+from ..pagination import Page, encode_cursor, decode_cursor
+from .notifications_service import NotificationsService
+
+# Keeps CASE ... WHEN updates under the SQLite bound parameters limit
+_UPDATE_BATCH_SIZE = 500
 
 
 class WorkCheckService:
+    notifications_service = NotificationsService()
+
     def add_work(self, work: PracticalWork) -> PracticalWork:
-        student_id = work.student_id
-        student = Student.objects.get(id=student_id)
-        student.submitted_works_count += 1
-        student.save()
-        work.save()
-        return PracticalWork.objects.get(id=work.id)
+        uploaded = bool(work.file) and not work.file._committed
+        try:
+            with transaction.atomic():
+                updated = Student.objects.filter(id=work.student_id).update(
+                    submitted_works_count=F('submitted_works_count') + 1
+                )
+                if not updated:
+                    raise Student.DoesNotExist(f"Student {work.student_id} does not exist")
+                student_cache.invalidate(work.student_id)
+                work.save(force_insert=True)
+                StudentStats.apply({work.student_id: StudentStats.work_delta(work)})
+        except Exception:
+            if uploaded and work.file._committed:
+                # Stored by save(), but no work references it; kept if other works share the content
+                file_remover.remove_on_commit([work.file.name])
+            raise
+        return work
+
+    def add_works(self, works: list[PracticalWork], batch_size: int = 1000) -> list[PracticalWork]:
+        """
+        Inserts works in batches and bumps `submitted_works_count`
+        of their students with one UPDATE per batch of students.
+        """
+        counts: dict[UUID, int] = {}
+        files: dict[str, int] = {}
+        for work in works:
+            counts[work.student_id] = counts.get(work.student_id, 0) + 1
+            if work.file:
+                files[work.file.name] = files.get(work.file.name, 0) + 1
+
+        with transaction.atomic():
+            created = PracticalWork.objects.bulk_create(works, batch_size=batch_size)
+            stats: dict[UUID, dict] = {}
+            for work in created:
+                StudentStats.merge(stats, work.student_id, StudentStats.work_delta(work))
+            StudentStats.apply(stats, batch_size=_UPDATE_BATCH_SIZE)
+            # bulk_create sends no post_save, so file references are counted here
+            for name, count in files.items():
+                FileBlob.acquire(name, count)
+            student_ids = list(counts)
+            for start in range(0, len(student_ids), _UPDATE_BATCH_SIZE):
+                batch = student_ids[start:start + _UPDATE_BATCH_SIZE]
+                Student.objects.filter(id__in=batch).update(
+                    submitted_works_count=F('submitted_works_count') + Case(
+                        *(When(id=student_id, then=Value(counts[student_id])) for student_id in batch),
+                        default=Value(0),
+                    )
+                )
+            # Queryset updates send no signals
+            student_cache.invalidate(*student_ids)
+        return created
+
+    async def aadd_work(self, work: PracticalWork) -> PracticalWork:
+        # Django has no async transactions, the counter update and insert stay one sync atomic block
+        return await sync_to_async(self.add_work)(work)
 
     def get_work_by_id(self, id: UUID) -> PracticalWork:
-        return PracticalWork.objects.get(id=id)
+        return work_cache.get(id, lambda: PracticalWork.objects.get(id=id))
+
+    async def aget_work_by_id(self, id: UUID) -> PracticalWork:
+        return await work_cache.aget(id, lambda: PracticalWork.objects.aget(id=id))
 
     def mark_work(self, id: UUID, mark: int) -> None:
-        work: PracticalWork = get_object_or_404(PracticalWork, id=id)
+        with transaction.atomic():
+            work: PracticalWork = get_object_or_404(PracticalWork.objects.select_for_update(), id=id)
+
+            if 0 <= mark <= 100:
+                StudentStats.apply({work.student_id: _mark_delta(work.mark, mark)})
+                work.mark = mark
+                work.mark_date = timezone.now()
+                work.save(update_fields=['mark', 'mark_date'])
+                self.notifications_service.enqueue([work])
+            else:
+                raise ValueError("Оценка должна быть от 0 до 100")
 
-        if 0 <= mark <= 100:
-            work.mark = mark
-            work.mark_date = timezone.now()
-            self.send_notification(work)
-            work.save()
-        else:
-            raise ValueError("Оценка должна быть от 0 до 100")
+    def mark_works(self, marks: dict[UUID, int]) -> int:
+        """
+        Applies all `marks` with one `bulk_update` in one transaction, nothing is changed
+        if any mark is out of range or any work is missing.
+        Notifications go to the outbox in the same transaction.
+        """
+        invalid = [str(id) for id, mark in marks.items() if not 0 <= mark <= 100]
+        if invalid:
+            raise ValueError(f"Оценка должна быть от 0 до 100: {', '.join(invalid)}")
 
-    def send_notification(self, work: PracticalWork) -> None:
-        student = Student.objects.get(pk=work.student_id)
-        print(f"\nСтуденту {student.last_name} была выставлена оценка {work.mark} в {work.mark_date}")
+        with transaction.atomic():
+            works = PracticalWork.objects.only('id', 'student_id', 'mark', 'mark_date').select_for_update().in_bulk(
+                list(marks)
+            )
+            missing = [str(id) for id in marks if id not in works]
+            if missing:
+                raise Http404(f"Работы не найдены: {', '.join(missing)}")
+
+            now = timezone.now()
+            stats: dict[UUID, dict] = {}
+            for id, work in works.items():
+                StudentStats.merge(stats, work.student_id, _mark_delta(work.mark, marks[id]))
+                work.mark = marks[id]
+                work.mark_date = now
+            StudentStats.apply(stats, batch_size=_UPDATE_BATCH_SIZE)
+            PracticalWork.objects.bulk_update(works.values(), ['mark', 'mark_date'], batch_size=_UPDATE_BATCH_SIZE)
+            work_cache.invalidate(*works)
+            self.notifications_service.enqueue(works.values())
+        return len(works)
+
+    def filter_submitted_works(
+            self, from_date: date | datetime = None, to_date: date | datetime = None,
+            student_id: UUID = None, marked: bool = None
+    ) -> QuerySet[PracticalWork]:
+        """
+        Builds the works queryset with every given filter applied
+        and a stable `(submitting_date, id)` ordering.
+        Plain dates cover the whole day, so `to_date` is inclusive.
+        `marked=False` selects ungraded works only.
+        """
+        works = PracticalWork.objects.all()
+        if student_id:
+            works = works.filter(student_id=student_id)
+        if from_date:
+            works = works.filter(submitting_date__gte=_day_start(from_date))
+        if to_date:
+            if isinstance(to_date, datetime):
+                works = works.filter(submitting_date__lte=to_date)
+            else:
+                works = works.filter(submitting_date__lt=_day_start(to_date + timedelta(days=1)))
+        if marked is not None:
+            works = works.filter(mark__isnull=not marked)
+        return works.order_by('submitting_date', 'id')
+
+    def get_archive_manifest(
+            self, from_date: date | datetime = None, to_date: date | datetime = None,
+            student_id: UUID = None, marked: bool = None
+    ) -> list[dict]:
+        """
+        Collects the entries of the works archive ahead of time,
+        so large archives can be prepared as an operation and streamed later.
+        """
+        works = self.filter_submitted_works(from_date=from_date, to_date=to_date, student_id=student_id,
+                                            marked=marked)
+        return list(archive_entries(works))
 
     def get_submitted_works(
             self, offset: int, limit: int,
-            from_date: datetime = None, to_date: datetime = None,
-            student_id: UUID = None
+            from_date: date | datetime = None, to_date: date | datetime = None,
+            student_id: UUID = None, marked: bool = None
     ) -> list[PracticalWork]:
-        works = []
-        if student_id:
-            works = PracticalWork.objects.filter(student_id=student_id)
-        elif from_date and to_date:
-            print((from_date, to_date))
-            if student_id:
-                works = PracticalWork.objects.filter(student_id=student_id, submitting_date__range=[from_date, to_date])
+        works = self.filter_submitted_works(from_date=from_date, to_date=to_date, student_id=student_id,
+                                            marked=marked)
+        return list(works[offset:offset + limit])
+
+    def get_submitted_works_page(
+            self, limit: int, offset: int = 0, cursor: str = None,
+            from_date: date | datetime = None, to_date: date | datetime = None,
+            student_id: UUID = None, marked: bool = None, values: bool = False
+    ) -> Page:
+        """
+        Returns a page of works and the cursor of the next one.
+        With `cursor` the page starts right after the `(submitting_date, id)`
+        it encodes (keyset pagination) and `offset` is ignored.
+        With `values` the page holds `.values()` rows instead of model instances.
+        """
+        works = self.filter_submitted_works(from_date=from_date, to_date=to_date, student_id=student_id,
+                                            marked=marked)
+        if cursor:
+            submitting_date, id = decode_cursor(cursor)
+            works = works.filter(
+                Q(submitting_date__gt=submitting_date) | Q(submitting_date=submitting_date, id__gt=id),
+                submitting_date__gte=submitting_date,
+            )
+            offset = 0
+
+        works = works[offset:offset + limit + 1]
+        items = list(works.values() if values else works)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            if values:
+                next_cursor = encode_cursor(last['submitting_date'], last['id'])
             else:
-                works = PracticalWork.objects.filter(submitting_date__range=[from_date, to_date])
-        else:
-            works = PracticalWork.objects.all()
+                next_cursor = encode_cursor(last.submitting_date, last.id)
+        return Page(items, next_cursor)
+
+
+def _day_start(value: date | datetime) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime.combine(value, time.min))
+
 
-        return list(works)[offset:offset + limit]
+def _mark_delta(old_mark: int | None, mark: int) -> dict:
+    return {'marked_count': int(old_mark is None), 'marks_sum': mark - (old_mark or 0)}
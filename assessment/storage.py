@@ -0,0 +1,79 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content:
+    `<upload dir>/<hash[:2]>/<hash><ext>`. Identical uploads share one blob,
+    referenced through `FileBlob` rows. Files should be written in the transaction
+    that references them: the blob row stays locked until then, so a concurrent
+    removal of the same content waits and sees the new reference. Files saved
+    outside a transaction hold the lock only while they are moved into place.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save, so they never need a suffix
+        return name
+
+    def blob_name(self, name: str, digest: str) -> str:
+        directory, file_name = os.path.split(name)
+        extension = os.path.splitext(file_name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension).replace('\\', '/')
+
+    def _temp_path(self, name: str) -> str:
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f'.tmp-{uuid.uuid4().hex}')
+
+    def _save(self, name: str, content: File) -> str:
+        digest = hashlib.sha256()
+        temp_path = self._temp_path(name)
+        try:
+            with open(temp_path, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(COPY_BUFFER_SIZE):
+                    digest.update(chunk)
+                    temp.write(chunk)
+            return self.adopt(temp_path, name, digest.hexdigest())
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def adopt(self, path: str, name: str, digest: str = None) -> str:
+        """
+        Moves an existing local file into the storage under its content name.
+        Pass `digest` when the SHA-256 of the file is already known.
+        """
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as file:
+                while data := file.read(COPY_BUFFER_SIZE):
+                    hasher.update(data)
+            digest = hasher.hexdigest()
+
+        # Imported here, models use this storage
+        from .models import FileBlob
+
+        blob_name = self.blob_name(name, digest)
+        blob_path = self.path(blob_name)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # A savepoint in the writer's transaction, which keeps the lock until it commits
+        with transaction.atomic():
+            FileBlob.lock([blob_name])
+            os.replace(path, blob_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(blob_path, self.file_permissions_mode)
+        return blob_name
+
+
+def works_storage():
+    return storages['works']
@@ -1,16 +1,104 @@
+import csv
+import hashlib
+import importlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
 import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import timedelta
-from unittest import TestCase
+from unittest import TestCase, mock
 
+from asgiref.sync import sync_to_async
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.core.cache.backends.db import DatabaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connections, transaction
+from django.db.utils import ConnectionHandler
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.request import Request
 from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.utils.encoders import JSONEncoder
 
-from assessment.models import Student, PracticalWork
+from assessment import async_views
+from assessment.archives import ARCHIVE_OPERATION
+from assessment.executors import OperationExecutor, OperationRejected
+from assessment.jobstores import DjangoJobStore
+from assessment.leader import LeaderLease
+from assessment.file_cleanup import FileRemover, file_remover
+from assessment.metrics import reset_metrics
+from assessment.fast_serializers import FastWorkSerializer, FastStudentSerializer
+from assessment.models import Student, PracticalWork, Operation, FileBlob, Notification, StudentStats, WorkUpload, \
+    ReportResult, ScheduledJob, SchedulerLease, FileRemoval
+from assessment.notifications import FileNotificationSink, NotificationSink
+from assessment.object_cache import student_cache
+from assessment.operation_store import InMemoryOperationStore, CacheOperationStore, OperationStore, \
+    decode_operation, get_operation_store
+from assessment.pagination import Page
+from assessment.scheduler import DatabaseScheduler
 from assessment.serializers import StudentSerializer, WorkSerializer
-from assessment.services.students_service import StudentsService
+from assessment.services.notifications_service import NotificationsService
+from assessment.services.operations_service import OperationsService
+from assessment.services.reports_service import ReportsService, run_report
+from assessment.services.students_service import StudentsService, STUDENT_RELATED_MODELS
+from assessment.services.uploads_service import UploadsService
 from assessment.services.work_check_service import WorkCheckService
-from assessment.views import StudentsViewSet, WorksViewSet
+from assessment.storage import works_storage
+from assessment.views import StudentsViewSet, WorksViewSet, WorkUploadsViewSet
+from benchmarks.seed import seed
+from distance_education_system import settings as project_settings
+from distance_education_system.database import database_config
+
+
+class QueryBudgetMixin:
+    """
+    `assertMaxQueries` fails when the block runs more SQL queries than its budget, listing them.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int, using: str = 'default'):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        queries = '\n'.join(f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1))
+        self.assertLessEqual(len(context), budget,
+                             f"{len(context)} queries executed, at most {budget} expected\n{queries}")
+
+
+class MediaRootMixin:
+    """
+    Stores files in a temporary MEDIA_ROOT removed after each test, with `self.student` to own works.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media = media.name
+
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+
+    def _add_work(self, content: bytes, file_name: str = 'work.txt', student: Student = None,
+                  title: str = "Template") -> PracticalWork:
+        work = PracticalWork(student_id=(student or self.student).id, title=title)
+        work.file.save(file_name, ContentFile(content), save=False)
+        return WorkCheckService().add_work(work)
 
 
 class StudentServiceTests(TestCase):
@@ -51,6 +139,12 @@ class WorkCheckServiceTests(TestCase):
         added_work = self.service.add_work(work)
         self.assertEqual(work, added_work)
 
+    def test_add_work_student_not_found(self):
+        work = PracticalWork(student_id=uuid.uuid4(), title="New Title", file='Uploaded Files/test_work.txt')
+        with self.assertRaises(Student.DoesNotExist):
+            self.service.add_work(work)
+        self.assertFalse(PracticalWork.objects.filter(id=work.id).exists())
+
     def test_get_work(self):
         id = self.work.id
         found_work = self.service.get_work_by_id(id)
@@ -62,8 +156,11 @@ class WorkCheckServiceTests(TestCase):
             self.service.get_work_by_id(id)
 
     def test_mark_work(self):
-        self.service.mark_work(self.work.id, 50)
+        with mock.patch.object(NotificationsService, 'wake') as wake:
+            self.service.mark_work(self.work.id, 50)
         self.assertEqual(PracticalWork.objects.get(id=self.work.id).mark, 50)
+        self.assertTrue(Notification.objects.filter(work_id=self.work.id, mark=50).exists())
+        wake.assert_called_once()
 
     def test_mark_work_invalid(self):
         with self.assertRaises(ValueError):
@@ -105,6 +202,308 @@ class WorkCheckServiceTests(TestCase):
                                                           to_date=timezone.now())
         self.assertEqual(returned_works, [work1, work2])
 
+    def test_get_submitted_works_by_student_id_and_date(self):
+        student = Student(name='TestName3', last_name="TestLastName3")
+        student.save()
+
+        old_work = PracticalWork(student_id=student.id, title="Old", file='Uploaded Files/work1.txt')
+        old_work.save()
+        PracticalWork.objects.filter(id=old_work.id).update(submitting_date=timezone.now() - timedelta(days=30))
+        new_work = PracticalWork(student_id=student.id, title="New", file='Uploaded Files/work2.txt')
+        new_work.save()
+        other_work = PracticalWork(student_id=self.student.id, title="Other", file='Uploaded Files/work3.txt')
+        other_work.save()
+
+        today = timezone.localdate()
+        returned_works = self.service.get_submitted_works(offset=0, limit=10, student_id=student.id,
+                                                          from_date=today - timedelta(days=5), to_date=today)
+        self.assertEqual(returned_works, [new_work])
+
+    def test_get_submitted_works_paging(self):
+        student = Student(name='TestName4', last_name="TestLastName4")
+        student.save()
+        works = []
+        for i in range(5):
+            work = PracticalWork(student_id=student.id, title=f"Work {i}", file='Uploaded Files/work.txt')
+            work.save()
+            works.append(work)
+
+        first_page = self.service.get_submitted_works(offset=0, limit=2, student_id=student.id)
+        second_page = self.service.get_submitted_works(offset=2, limit=2, student_id=student.id)
+        last_page = self.service.get_submitted_works(offset=4, limit=2, student_id=student.id)
+        self.assertEqual(first_page + second_page + last_page, works)
+
+    def test_get_submitted_works_unmarked(self):
+        student = Student(name='TestName6', last_name="TestLastName6")
+        student.save()
+        marked_work = PracticalWork(student_id=student.id, title="Marked", file='Uploaded Files/work1.txt', mark=90)
+        marked_work.save()
+        unmarked_work = PracticalWork(student_id=student.id, title="Unmarked", file='Uploaded Files/work2.txt')
+        unmarked_work.save()
+
+        returned_works = self.service.get_submitted_works(offset=0, limit=10, student_id=student.id, marked=False)
+        self.assertEqual(returned_works, [unmarked_work])
+
+    def test_get_submitted_works_page_by_cursor(self):
+        student = Student(name='TestName5', last_name="TestLastName5")
+        student.save()
+        works = []
+        for i in range(5):
+            work = PracticalWork(student_id=student.id, title=f"Work {i}", file='Uploaded Files/work.txt')
+            work.save()
+            works.append(work)
+
+        returned_works = []
+        page = self.service.get_submitted_works_page(limit=2, student_id=student.id)
+        returned_works += page.items
+        while page.next_cursor:
+            page = self.service.get_submitted_works_page(limit=2, cursor=page.next_cursor, student_id=student.id)
+            returned_works += page.items
+        self.assertEqual(returned_works, works)
+
+    def test_get_submitted_works_page_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.service.get_submitted_works_page(limit=2, cursor='not a cursor')
+
+
+class WorkSubmissionStressTests(TransactionTestCase):
+    works_count = int(os.environ.get('STRESS_WORKS', 2000))
+    threads = 16
+    max_retries = 1000
+
+    def setUp(self) -> None:
+        self.service = WorkCheckService()
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+
+    def _submit(self, i: int) -> None:
+        for attempt in range(self.max_retries):
+            try:
+                self.service.add_work(PracticalWork(student_id=self.student.id, title=f"Work {i}",
+                                                    file='Uploaded Files/test_work.txt'))
+                return
+            except OperationalError:
+                # SQLite rejects concurrent writers instead of waiting; the transaction was rolled back.
+                # Random backoff, so a writer is not outrun by the others every time
+                time.sleep(random.uniform(0, min(0.001 * 2 ** attempt, 0.05)))
+        # The pool re-raises the failure in the test thread
+        self.fail(f"Work {i} was not added after {self.max_retries} attempts")
+
+    def test_concurrent_add_work(self):
+        with ThreadPoolExecutor(self.threads) as pool:
+            list(pool.map(self._submit, range(self.works_count)))
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.submitted_works_count, self.works_count)
+        self.assertEqual(PracticalWork.objects.filter(student_id=self.student.id).count(), self.works_count)
+        self.assertEqual(StudentStats.objects.get(student=self.student).works_count, self.works_count)
+
+
+class BenchmarkSeedTests(APITestCase):
+    def test_seed_with_files(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            student_ids = seed(3, 20, files=2, file_size=16)
+
+        self.assertEqual(len(student_ids), 3)
+        self.assertEqual(PracticalWork.objects.count(), 20)
+        self.assertEqual(FileBlob.objects.count(), 2)
+        self.assertEqual(sum(FileBlob.objects.values_list('refcount', flat=True)), 20)
+        self.assertEqual(sum(Student.objects.values_list('submitted_works_count', flat=True)), 20)
+
+
+class FastSerializersTests(APITestCase):
+    def setUp(self) -> None:
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.works = [
+            PracticalWork(student_id=self.student.id, title="File", file='Uploaded Files/test work.txt'),
+            PracticalWork(student_id=self.student.id, title="No file", file=None),
+            PracticalWork(student_id=self.student.id, title="Marked", file='', mark=0, mark_date=timezone.now()),
+        ]
+        for work in self.works:
+            work.save()
+        self.queryset = PracticalWork.objects.filter(student_id=self.student.id).order_by('submitting_date')
+
+    def test_works_same_output(self):
+        expected = WorkSerializer(self.queryset, many=True).data
+        self.assertEqual(FastWorkSerializer(self.queryset, many=True).data, expected)
+        self.assertEqual(FastWorkSerializer(list(self.queryset), many=True).data, expected)
+        self.assertEqual(FastWorkSerializer(list(self.queryset.values()), many=True).data, expected)
+        self.assertEqual(FastWorkSerializer(self.works[0]).data, WorkSerializer(self.works[0]).data)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_works_same_output_with_request(self):
+        context = {'request': Request(APIRequestFactory().get('/works'))}
+        self.assertEqual(FastWorkSerializer(self.queryset, many=True, context=context).data,
+                         WorkSerializer(self.queryset, many=True, context=context).data)
+
+    def test_students_same_output(self):
+        students = Student.objects.filter(id=self.student.id)
+        self.assertEqual(FastStudentSerializer(students, many=True).data, StudentSerializer(students, many=True).data)
+        self.assertEqual(FastStudentSerializer(students, many=True, fields=['id', 'name']).data,
+                         StudentSerializer(students, many=True, fields=['id', 'name']).data)
+
+
+class OperationStoreTests(APITestCase):
+    def setUp(self) -> None:
+        self.now = 0
+        self.store = InMemoryOperationStore(max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_save_and_get(self):
+        operation = Operation(uuid.uuid4(), True, [{'title': 'Test title'}], 'cursor')
+        self.store.save(operation)
+        self.assertEqual(self.store.get(operation.id), operation)
+
+        failed = Operation(uuid.uuid4(), True, error="Операция завершилась с ошибкой")
+        self.store.save(failed)
+        self.assertEqual(self.store.get(failed.id), failed)
+
+    def test_get_not_found(self):
+        self.assertIsNone(self.store.get(uuid.uuid4()))
+
+    def test_ttl_eviction(self):
+        operation = Operation(uuid.uuid4())
+        self.store.save(operation)
+        self.now = 10
+        self.assertIsNone(self.store.get(operation.id))
+        self.assertEqual(len(self.store), 0)
+
+    def test_lru_eviction(self):
+        first, second, third = Operation(uuid.uuid4()), Operation(uuid.uuid4()), Operation(uuid.uuid4())
+        self.store.save(first)
+        self.store.save(second)
+        self.store.get(first.id)
+        self.store.save(third)
+        self.assertIsNone(self.store.get(second.id))
+        self.assertEqual(self.store.get(first.id), first)
+        self.assertEqual(self.store.get(third.id), third)
+
+    def test_cache_store(self):
+        store = CacheOperationStore(ttl=10)
+        operation = Operation(uuid.uuid4(), True, [{'title': 'Test title'}])
+        store.save(operation)
+        self.assertEqual(store.get(operation.id), operation)
+        store.delete(operation.id)
+        self.assertIsNone(store.get(operation.id))
+
+
+class OperationsServiceTests(APITestCase):
+    def setUp(self) -> None:
+        self.service = OperationsService(InMemoryOperationStore())
+
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.work = PracticalWork(student_id=self.student.id, title="Test title", file='Uploaded Files/test_work.txt')
+        self.work.save()
+
+    def test_finish_operation_serializes_result(self):
+        op_id = uuid.uuid4()
+        self.service.store.save(Operation(op_id))
+        self.service.finish_operation(op_id, Page([self.work], 'cursor'), WorkSerializer)
+
+        operation = self.service.get_operation(op_id)
+        self.assertTrue(operation.done)
+        self.assertEqual(operation.next_cursor, 'cursor')
+        self.assertEqual(operation.result[0]['id'], str(self.work.id))
+        self.assertEqual(operation.result[0]['student'], str(self.student.id))
+
+    def test_finish_operation_not_found(self):
+        self.assertFalse(self.service.finish_operation(uuid.uuid4(), []))
+
+    def test_wait_operation_woken_on_finish(self):
+        op_id = uuid.uuid4()
+        self.service.store.save(Operation(op_id))
+        threading.Timer(0.1, self.service.finish_operation, (op_id, [])).start()
+
+        started = time.monotonic()
+        operation = self.service.wait_operation(op_id, 10)
+        self.assertTrue(operation.done)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_wait_operation_polls_shared_store(self):
+        op_id = uuid.uuid4()
+        self.service.store.save(Operation(op_id))
+        self.service.poll_interval = 0.05
+        # Finished by another worker: the store changes, no signal is published here
+        threading.Timer(0.1, self.service.store.save, (Operation(op_id, done=True, result=[]),)).start()
+
+        self.assertTrue(self.service.wait_operation(op_id, 10).done)
+
+    def test_failed_operation(self):
+        def fail():
+            raise RuntimeError("secret details")
+
+        with mock.patch('assessment.services.operations_service.get_executor', return_value=InlineExecutor()), \
+                self.assertLogs('assessment.services.operations_service', 'ERROR'):
+            op_id = self.service.execute_operation(fail)
+
+        operation = self.service.wait_operation(op_id, 0)
+        self.assertTrue(operation.done)
+        self.assertTrue(operation.failed)
+        self.assertIsNone(operation.result)
+        self.assertNotIn("secret", operation.error)
+
+    def test_scheduled_operation_rejected(self):
+        scheduler = mock.Mock()
+        executor = mock.Mock(**{'submit.side_effect': OperationRejected("Очередь заполнена")})
+        with mock.patch('assessment.services.operations_service.get_scheduler', return_value=scheduler), \
+                mock.patch('assessment.services.operations_service.get_executor', return_value=executor), \
+                self.assertLogs('assessment.services.operations_service', 'WARNING'):
+            op_id = self.service.execute_operation(list, run_date=timezone.now() + timedelta(minutes=1))
+            self.assertFalse(self.service.get_operation(op_id).done)
+            scheduler.add_job.call_args.args[0]()
+
+        operation = self.service.get_operation(op_id)
+        self.assertTrue(operation.done)
+        self.assertEqual(operation.error, "Очередь заполнена")
+
+    def test_wait_operation_timeout(self):
+        op_id = uuid.uuid4()
+        self.service.store.save(Operation(op_id))
+        self.assertFalse(self.service.wait_operation(op_id, 0.1).done)
+        self.assertIsNone(self.service.wait_operation(uuid.uuid4(), 0.1))
+
+
+class OperationExecutorTests(APITestCase):
+    def setUp(self) -> None:
+        self.executor = OperationExecutor(max_workers=1, max_queue=1)
+        self.release = threading.Event()
+
+    def tearDown(self) -> None:
+        self.release.set()
+        self.executor.shutdown()
+
+    def test_submit(self):
+        future = self.executor.submit(lambda a, b: a + b, {'a': 1, 'b': 2}, name='sum')
+        self.assertEqual(future.result(timeout=5), 3)
+
+        metrics = self.executor.metrics()
+        self.assertEqual(metrics['submitted'], 1)
+        self.assertEqual(metrics['operations']['sum']['count'], 1)
+
+    def test_submit_failed(self):
+        def fail():
+            raise RuntimeError()
+
+        future = self.executor.submit(fail, name='fail')
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        self.assertEqual(self.executor.metrics()['operations']['fail']['failed'], 1)
+
+    def test_reject_when_saturated(self):
+        running = self.executor.submit(self.release.wait)
+        queued = self.executor.submit(self.release.wait)
+        self.assertEqual(self.executor.metrics()['queue_depth'], 1)
+
+        with self.assertRaises(OperationRejected):
+            self.executor.submit(self.release.wait)
+        self.assertEqual(self.executor.metrics()['rejected'], 1)
+
+        self.release.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        self.assertEqual(self.executor.metrics()['in_flight'], 0)
+
 
 # Компонентные тесты
 class DistanceEducationSystemTests(APITestCase):
@@ -144,12 +543,69 @@ class DistanceEducationSystemTests(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_students_list(self):
-        students = [self.student1, self.student2]
+        students = [self.student2, self.student1]
         serialized = StudentSerializer(students, many=True).data
         request = self.factory.get(f'/students')
         response = StudentsViewSet.as_view({'get': 'list'})(request)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertListEqual(response.data, serialized)
+        self.assertListEqual(response.data['results'], serialized)
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_get_students_list_by_cursor(self):
+        request = self.factory.get(f'/students', {'limit': 1})
+        response = StudentsViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.data['results'], StudentSerializer([self.student2], many=True).data)
+
+        request = self.factory.get(f'/students', {'limit': 1, 'cursor': response.data['next_cursor']})
+        response = StudentsViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.data['results'], StudentSerializer([self.student1], many=True).data)
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_get_students_list_filtered_and_projected(self):
+        request = self.factory.get(f'/students', {'name': 'wic', 'fields': 'id,last_name'})
+        response = StudentsViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': str(self.student1.id), 'last_name': 'Wick'}])
+
+    def test_get_students_list_unknown_field(self):
+        request = self.factory.get(f'/students', {'fields': 'id,password'})
+        response = StudentsViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_students_bulk_create_json(self):
+        data = [{'name': 'Bulk1', 'last_name': 'Student1'}, {'name': 'Bulk2', 'last_name': 'Student2'}]
+        request = self.factory.post('/students/bulk', data, format='json')
+        response = StudentsViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 2})
+        self.assertEqual(Student.objects.filter(name__startswith='Bulk').count(), 2)
+
+    def test_students_bulk_create_csv(self):
+        file = SimpleUploadedFile('students.csv', b'name,last_name\nCsv1,Student1\nCsv2,Student2\n')
+        request = self.factory.post('/students/bulk', {'file': file}, format='multipart')
+        response = StudentsViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Student.objects.filter(name__startswith='Csv').count(), 2)
+
+    def test_students_bulk_create_csv_not_utf8(self):
+        file = SimpleUploadedFile('students.csv', 'name,last_name\nCsv1,Student1\nИван,Иванов\n'.encode('cp1251'))
+        request = self.factory.post('/students/bulk', {'file': file}, format='multipart')
+        response = StudentsViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(response.data, {'detail': "Строка 3 файла не в кодировке UTF-8"})
+        self.assertFalse(Student.objects.filter(name='Csv1').exists())
+
+    def test_students_bulk_create_fail(self):
+        data = [{'name': 'Bulk1', 'last_name': 'Student1'}, {'name': 'Bulk2'}]
+        request = self.factory.post('/students/bulk', data, format='json')
+        response = StudentsViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual([error['row'] for error in response.data], [1])
+        self.assertFalse(Student.objects.filter(name__startswith='Bulk').exists())
 
     def test_student_deletion_success(self):
         request = self.factory.delete(f'/students/{self.student2.id}')
@@ -157,7 +613,8 @@ class DistanceEducationSystemTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_work_creation_success(self):
-        with open('media/Uploaded Files/test_work.txt') as file:
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            file = SimpleUploadedFile('test_work.txt', b'work')
             data = {'student_id': f'{self.student1.id}', 'title': "TO_DELETE", 'file': file}
             request = self.factory.post("/works", data, format='multipart')
             response = WorksViewSet.as_view({'post': 'create'})(request)
@@ -170,6 +627,60 @@ class DistanceEducationSystemTests(APITestCase):
         response = WorksViewSet.as_view({'post': 'create'})(request)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_works_bulk_create(self):
+        data = [
+            {'student_id': str(self.student1.id), 'title': 'Bulk1', 'file': 'Uploaded Files/test_work.txt'},
+            {'student_id': str(self.student1.id), 'title': 'Bulk2', 'mark': 70},
+            {'student_id': str(self.student2.id), 'title': 'Bulk3'},
+        ]
+        request = self.factory.post('/works/bulk', data, format='json')
+        response = WorksViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 3})
+        self.student1.refresh_from_db()
+        self.student2.refresh_from_db()
+        self.assertEqual(self.student1.submitted_works_count, 2)
+        self.assertEqual(self.student2.submitted_works_count, 1)
+        self.assertIsNotNone(PracticalWork.objects.get(title='Bulk2').mark_date)
+
+    def test_works_bulk_create_fail(self):
+        data = [
+            {'student_id': str(self.student1.id), 'title': 'Bulk1'},
+            {'student_id': str(uuid.uuid4()), 'title': 'Bulk2'},
+            {'student_id': str(self.student1.id), 'title': 'Bulk3', 'mark': 500},
+        ]
+        request = self.factory.post('/works/bulk', data, format='json')
+        response = WorksViewSet.as_view({'post': 'bulk_create'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['row'] for error in response.data], [1, 2])
+        self.assertFalse(PracticalWork.objects.filter(title__startswith='Bulk').exists())
+
+    def test_export_works_ndjson(self):
+        request = self.factory.get('/works/export', {'student_id': self.student1.id})
+        response = WorksViewSet.as_view({'get': 'export_works'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [str(self.work.id)])
+
+    def test_export_works_csv(self):
+        request = self.factory.get('/works/export', {'student_id': self.student1.id, 'export_format': 'csv'})
+        response = WorksViewSet.as_view({'get': 'export_works'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['id'] for row in rows], [str(self.work.id)])
+        self.assertEqual(rows[0]['title'], self.work.title)
+
+    def test_export_works_invalid_format(self):
+        request = self.factory.get('/works/export', {'export_format': 'xml'})
+        response = WorksViewSet.as_view({'get': 'export_works'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_work_success(self):
         request = self.factory.get(f'/works/{self.work.id}')
         response = WorksViewSet.as_view({'get': 'retrieve'})(request, self.work.id)
@@ -196,8 +707,1033 @@ class DistanceEducationSystemTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
 
+    def _bulk_mark(self, marks):
+        request = self.factory.patch('/works/bulk', marks, format='json')
+        return WorksViewSet.as_view({'patch': 'bulk_mark'})(request)
+
+    def test_bulk_mark_success(self):
+        service = WorkCheckService()
+        work1 = service.add_work(PracticalWork(student_id=self.student1.id, title="First"))
+        work2 = service.add_work(PracticalWork(student_id=self.student2.id, title="Second"))
+
+        with mock.patch.object(NotificationsService, 'wake') as wake:
+            with self.captureOnCommitCallbacks(execute=True):
+                # SELECT, stats UPDATE, works UPDATE and outbox INSERT inside the savepoint
+                with self.assertNumQueries(6):
+                    response = self._bulk_mark({str(work1.id): 90, str(work2.id): 75})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marked'], 2)
+        work1.refresh_from_db()
+        work2.refresh_from_db()
+        self.assertEqual((work1.mark, work2.mark), (90, 75))
+        self.assertEqual(work1.mark_date, work2.mark_date)
+        wake.assert_called_once()
+        self.assertEqual(Notification.objects.filter(sent_date__isnull=True).count(), 2)
+
+    def test_bulk_mark_fail(self):
+        response = self._bulk_mark({str(self.work.id): 101})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        response = self._bulk_mark({str(self.work.id): 50, str(uuid.uuid4()): 50})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.work.refresh_from_db()
+        self.assertIsNone(self.work.mark)
+
+        response = self._bulk_mark({'not-an-id': 50})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_request_works(self):
         request = self.factory.get('/works/request', {'offset': 0, 'limit': 10})
+        # The operation must not query the database from another thread during the test transaction
+        with mock.patch('assessment.services.operations_service.get_executor', return_value=InlineExecutor()):
+            response = WorksViewSet.as_view({'get': 'request_works'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('next_cursor', response.data)
+        self.assertTrue(response.data['done'])
+        self.assertFalse(response.data['failed'])
+        self.assertEqual(response.data['result'][0]['id'], str(self.work.id))
+
+    def test_request_works_invalid_cursor(self):
+        request = self.factory.get('/works/request', {'limit': 10, 'cursor': '%%%'})
         response = WorksViewSet.as_view({'get': 'request_works'})(request)
 
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_works_status_wait(self):
+        op_id = uuid.uuid4()
+        service = WorksViewSet.operations_service
+        # Finished from another thread, which does not see the test transaction of a database store
+        with mock.patch.object(service, 'store', InMemoryOperationStore()):
+            service.store.save(Operation(op_id))
+            threading.Timer(0.1, service.finish_operation, (op_id, [])).start()
+
+            request = self.factory.get('/works/status', {'id': str(op_id), 'wait': 10})
+            response = WorksViewSet.as_view({'get': 'list'})(request)
+        self.assertTrue(response.data['done'])
+
+    def test_default_operation_store_shared_between_workers(self):
+        operation = Operation(uuid.uuid4(), True, [])
+        get_operation_store().save(operation)
+
+        # Another worker process has its own cache backend instance reading the same table
+        other_worker = DatabaseCache('operations_cache', {})
+        self.assertEqual(decode_operation(other_worker.get(f'operation:{operation.id}')), operation)
+
+    def test_request_works_rejected(self):
+        request = self.factory.get('/works/request', {'offset': 0, 'limit': 10})
+        with mock.patch.object(OperationsService, 'execute_operation', side_effect=OperationRejected()):
+            response = WorksViewSet.as_view({'get': 'request_works'})(request)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class WorkUploadsTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+        self.content = os.urandom(2500)
+
+    def _init(self, checksum: str = None):
+        data = {'student_id': str(self.student.id), 'title': 'Chunked', 'file_name': 'project.zip',
+                'size': len(self.content), 'chunk_size': 1024,
+                'checksum': checksum or hashlib.sha256(self.content).hexdigest()}
+        request = self.factory.post('/works/uploads', data, format='json')
+        return WorkUploadsViewSet.as_view({'post': 'create'})(request)
+
+    def _put_chunk(self, id, index: int, data: bytes, checksum: str = None):
+        request = self.factory.put(f'/works/uploads/{id}/chunks/{index}', data,
+                                   content_type='application/octet-stream',
+                                   HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest())
+        return WorkUploadsViewSet.as_view({'put': 'upload_chunk'})(request, id=id, index=index)
+
+    def _finalize(self, id):
+        request = self.factory.post(f'/works/uploads/{id}/finalize')
+        return WorkUploadsViewSet.as_view({'post': 'finalize'})(request, id=id)
+
+    def test_upload_success(self):
+        response = self._init()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        id = response.data['id']
+        self.assertEqual(response.data['missing_chunks'], [0, 1, 2])
+
+        for index in (2, 0, 1):
+            chunk = self.content[index * 1024:(index + 1) * 1024]
+            response = self._put_chunk(id, index, chunk)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing_chunks'], [])
+
+        response = self._finalize(id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        work = PracticalWork.objects.get(id=response.data['id'])
+        with open(work.file.path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.submitted_works_count, 1)
+
+    def test_concurrent_finalize(self):
+        id = self._init().data['id']
+        for index in range(3):
+            self._put_chunk(id, index, self.content[index * 1024:(index + 1) * 1024])
+        service = UploadsService()
+        stale = service.get_upload(id)
+        part_path = service.part_path(stale)
+        self.assertEqual(self._finalize(id).status_code, status.HTTP_201_CREATED)
+
+        # The other request read the upload before it was finalized
+        with mock.patch.object(UploadsService, 'get_upload', return_value=stale):
+            self.assertEqual(self._finalize(id).status_code, status.HTTP_404_NOT_FOUND)
+            with open(part_path, 'wb') as part:
+                part.write(self.content)
+            self.assertEqual(self._finalize(id).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(PracticalWork.objects.filter(title='Chunked').count(), 1)
+
+    def test_upload_chunk_retry(self):
+        id = self._init().data['id']
+        chunk = self.content[:1024]
+
+        response = self._put_chunk(id, 0, chunk, checksum='0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._put_chunk(id, 0, chunk[:100])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._put_chunk(id, 0, chunk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing_chunks'], [1, 2])
+
+    def test_upload_corrupt_retry_of_received_chunk(self):
+        id = self._init().data['id']
+        for index in range(3):
+            self._put_chunk(id, index, self.content[index * 1024:(index + 1) * 1024])
+
+        corrupt = os.urandom(1024)
+        response = self._put_chunk(id, 1, corrupt, checksum=hashlib.sha256(self.content[1024:2048]).hexdigest())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self._finalize(id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with open(PracticalWork.objects.get(id=response.data['id']).file.path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    @override_settings(UPLOADS={'MAX_SIZE': 2000, 'EXPIRY': 60})
+    def test_upload_size_limit(self):
+        response = self._init()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('size', response.data)
+
+    def test_expired_upload_removed(self):
+        id = self._init().data['id']
+        part_path = UploadsService().part_path(WorkUpload.objects.get(id=id))
+        WorkUpload.objects.filter(id=id).update(created_date=timezone.now() - timedelta(days=2))
+
+        response = self._put_chunk(id, 0, self.content[:1024])
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self._init()
+        self.assertFalse(WorkUpload.objects.filter(id=id).exists())
+        self.assertFalse(os.path.exists(part_path))
+
+    def test_finalize_incomplete(self):
+        id = self._init().data['id']
+        self._put_chunk(id, 0, self.content[:1024])
+
+        response = self._finalize(id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PracticalWork.objects.filter(title='Chunked').exists())
+
+    def test_finalize_checksum_mismatch(self):
+        id = self._init(checksum='0' * 64).data['id']
+        for index in range(3):
+            self._put_chunk(id, index, self.content[index * 1024:(index + 1) * 1024])
+
+        response = self._finalize(id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PracticalWork.objects.filter(title='Chunked').exists())
+
+
+class InlineExecutor:
+    """
+    Runs submitted functions right away, so background work happens in the test thread.
+    """
+
+    def submit(self, func, kwargs: dict = None, name: str = None) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(**(kwargs or {})))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ContentAddressedStorageTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = mock.patch('assessment.file_cleanup.get_executor', return_value=InlineExecutor())
+        self.executor.start()
+        self.service = WorkCheckService()
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def test_same_content_stored_once(self):
+        work1 = self._add_work(b'template', 'first.txt')
+        work2 = self._add_work(b'template', 'second.txt')
+        work3 = self._add_work(b'other')
+
+        self.assertEqual(work1.file.name, work2.file.name)
+        self.assertNotEqual(work1.file.name, work3.file.name)
+        self.assertEqual(work1.file.name, f"Uploaded Files/{hashlib.sha256(b'template').hexdigest()[:2]}/"
+                                          f"{hashlib.sha256(b'template').hexdigest()}.txt")
+        self.assertEqual(FileBlob.objects.get(name=work1.file.name).refcount, 2)
+        blobs = [name for _, _, names in os.walk(self.media) for name in names]
+        self.assertEqual(len(blobs), 2)
+
+    def test_blob_deleted_with_last_reference(self):
+        work1 = self._add_work(b'template')
+        work2 = self._add_work(b'template')
+        path = work1.file.path
+
+        work1.delete()
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(FileBlob.objects.get(name=work2.file.name).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            work2.delete()
+            self.assertTrue(os.path.isfile(path))
+        self.assertFalse(os.path.isfile(path))
+        self.assertFalse(FileBlob.objects.filter(name=work2.file.name).exists())
+
+    def test_bulk_works_counted(self):
+        work = self._add_work(b'template')
+        self.service.add_works([PracticalWork(student_id=self.student.id, title="Bulk", file=work.file.name)])
+        self.assertEqual(FileBlob.objects.get(name=work.file.name).refcount, 2)
+
+    def test_orphan_blob_removed_when_add_work_fails(self):
+        shared = self._add_work(b'template')
+        for content in (b'template', b'orphan'):
+            work = PracticalWork(student_id=self.student.id, title="Failed", file=ContentFile(content, name='work.txt'))
+            with self.captureOnCommitCallbacks(execute=True), \
+                    mock.patch.object(StudentStats, 'apply', side_effect=RuntimeError), \
+                    self.assertRaises(RuntimeError):
+                self.service.add_work(work)
+
+        self.assertTrue(os.path.isfile(shared.file.path))
+        self.assertFalse(os.path.isfile(work.file.path))
+        self.assertEqual(list(FileBlob.objects.values_list('name', 'refcount')), [(shared.file.name, 1)])
+        self.assertFalse(FileRemoval.objects.exists())
+
+
+class ContentAddressedStorageAutocommitTests(TransactionTestCase):
+    def test_save_outside_transaction(self):
+        locked_in_transaction = []
+        lock = FileBlob.lock
+
+        def check_lock(names):
+            locked_in_transaction.append(connections['default'].in_atomic_block)
+            return lock(names)
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), \
+                mock.patch.object(FileBlob, 'lock', side_effect=check_lock):
+            name = works_storage().save('Uploaded Files/work.txt', ContentFile(b'template'))
+            self.assertTrue(works_storage().exists(name))
+        self.assertEqual(locked_in_transaction, [True])
+        self.assertEqual(FileBlob.objects.get(name=name).refcount, 0)
+
+
+class FileCleanupTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = mock.patch('assessment.file_cleanup.get_executor', return_value=InlineExecutor())
+        self.executor.start()
+        self.wake = mock.patch.object(NotificationsService, 'wake')
+        self.wake.start()
+
+        self.factory = APIRequestFactory()
+        self.service = WorkCheckService()
+
+    def tearDown(self):
+        self.wake.stop()
+        self.executor.stop()
+
+    def _files(self) -> set[str]:
+        return {name for _, _, names in os.walk(self.media) for name in names}
+
+    def test_removed_after_commit_only(self):
+        work = self._add_work(b'template')
+        path = work.file.path
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                work.delete()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertTrue(os.path.isfile(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PracticalWork.objects.get(title="Template").delete()
+        self.assertFalse(os.path.isfile(path))
+
+    def test_failed_removal_retried(self):
+        FileRemoval.objects.create(name='Uploaded Files/locked.txt')
+        with mock.patch('assessment.storage.ContentAddressedStorage.delete', side_effect=OSError), \
+                mock.patch('assessment.file_cleanup.get_scheduler') as scheduler:
+            file_remover.wake()
+        removal = FileRemoval.objects.get()
+        self.assertEqual(removal.attempts, 1)
+        self.assertGreater(removal.next_attempt_date, timezone.now())
+        job = scheduler.return_value.add_job
+        job.assert_called_once()
+        self.assertEqual(job.call_args.kwargs['trigger'].run_date, removal.next_attempt_date)
+
+        FileRemoval.objects.update(attempts=file_remover.max_attempts - 1, next_attempt_date=timezone.now())
+        with mock.patch('assessment.storage.ContentAddressedStorage.delete', side_effect=OSError), \
+                mock.patch('assessment.file_cleanup.get_scheduler') as scheduler, \
+                self.assertLogs('assessment.file_cleanup', 'ERROR'):
+            file_remover.wake()
+        self.assertFalse(FileRemoval.objects.exists())
+        scheduler.assert_not_called()
+
+    def test_pending_removal_survives_restart(self):
+        work = self._add_work(b'template')
+        path = work.file.path
+        with mock.patch.object(FileRemover, 'wake'):
+            with self.captureOnCommitCallbacks(execute=True):
+                PracticalWork.objects.get(id=work.id).delete()
+        self.assertTrue(os.path.isfile(path))
+
+        # A new process finds the removal queued by the stopped one
+        FileRemover().wake()
+        self.assertFalse(os.path.isfile(path))
+        self.assertFalse(FileRemoval.objects.exists())
+        self.assertFalse(FileBlob.objects.exists())
+
+    def test_reused_blob_kept(self):
+        work = self._add_work(b'template')
+        FileRemoval.objects.create(name=work.file.name)
+        file_remover.wake()
+        self.assertTrue(os.path.isfile(work.file.path))
+        self.assertEqual(FileBlob.objects.get(name=work.file.name).refcount, 1)
+        self.assertFalse(FileRemoval.objects.exists())
+
+    def test_bulk_delete(self):
+        other = Student(name='Jane', last_name='Doe')
+        other.save()
+        kept = Student(name='Kept', last_name='Student')
+        kept.save()
+        work = self._add_work(b'template')
+        self._add_work(b'own')
+        self._add_work(b'template', student=other)
+        self._add_work(b'template', student=kept)
+        self.service.mark_work(work.id, 90)
+        upload = UploadsService().init_upload(WorkUpload(
+            student_id=other.id, title="Upload", file_name='upload.txt', size=10, chunk_size=1024, checksum='0' * 64,
+        ))
+        part = UploadsService().part_path(upload)
+
+        request = self.factory.delete('/students/bulk', {'ids': [str(self.student.id), str(other.id)]}, format='json')
+        # Student lock, works, uploads, blob release, one DELETE per table and the removal outbox INSERT
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(16):
+            response = StudentsViewSet.as_view({'delete': 'bulk_destroy'})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': 2})
+
+        self.assertEqual(list(Student.objects.all()), [kept])
+        self.assertEqual(PracticalWork.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(WorkUpload.objects.exists())
+        self.assertEqual(list(StudentStats.objects.values_list('student_id', flat=True)), [kept.id])
+        self.assertEqual(FileBlob.objects.get().refcount, 1)
+        self.assertEqual(self._files(), {f"{hashlib.sha256(b'template').hexdigest()}.txt"})
+        self.assertFalse(os.path.isfile(part))
+
+    def test_bulk_delete_covers_related_models(self):
+        # Bulk delete skips cascades: a model missing from the list would keep rows of deleted students
+        related = {relation.related_model for model in (Student, PracticalWork)
+                   for relation in model._meta.related_objects}
+        self.assertLessEqual(related, set(STUDENT_RELATED_MODELS))
+        for model in STUDENT_RELATED_MODELS:
+            self.assertEqual(model._meta.get_field('student').related_model, Student)
+
+    def test_bulk_delete_invalid(self):
+        request = self.factory.delete('/students/bulk', {'ids': []}, format='json')
+        response = StudentsViewSet.as_view({'delete': 'bulk_destroy'})(request)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class WorkDownloadsTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+        self.content = bytes(range(256)) * 8
+        self.work = self._add_work(self.content, 'lab.bin', title="Lab work 1")
+
+    def _download(self, **headers):
+        request = self.factory.get(f'/works/{self.work.id}/file', **headers)
+        return WorksViewSet.as_view({'get': 'download'})(request, id=self.work.id)
+
+    def test_download_full(self):
+        response = self._download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        self.assertIn('Lab_work_1.bin', response['Content-Disposition'])
+
+    def test_download_not_modified(self):
+        etag = self._download()['ETag']
+        response = self._download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_download_range(self):
+        response = self._download(HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:300])
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '200')
+
+        response = self._download(HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self._download(HTTP_RANGE='bytes=100-199', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self._download(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    @override_settings(WORK_FILES_SERVE={'MODE': 'x-accel-redirect', 'X_ACCEL_PREFIX': '/protected/'})
+    def test_download_offloaded(self):
+        response = self._download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/' + self.work.file.name.replace(' ', '%20'))
+        self.assertEqual(response.content, b'')
+
+
+class WorksArchiveTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+        self.works = [
+            self._add_work(content, 'lab.bin', title=f"Lab {index}")
+            for index, content in enumerate([b'first', os.urandom(200 * 1024)])
+        ]
+        WorkCheckService().add_work(PracticalWork(student_id=self.student.id, title="No file"))
+
+    def _archive(self, **params):
+        request = self.factory.get('/works/archive', params)
+        return WorksViewSet.as_view({'get': 'archive_works'})(request)
+
+    def _download_archive(self, op_id):
+        request = self.factory.get(f'/works/archive/{op_id}')
+        return WorksViewSet.as_view({'get': 'download_archive'})(request, id=uuid.UUID(str(op_id)))
+
+    def _assert_archive(self, response):
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(len(archive.namelist()), len(self.works))
+        for work in self.works:
+            name = f'Wick_John/Lab_{work.title[-1]}_{work.id}.bin'
+            with open(work.file.path, 'rb') as file:
+                self.assertEqual(archive.read(name), file.read())
+
+    def test_archive_streamed(self):
+        response = self._archive(student_id=str(self.student.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self._assert_archive(response)
+
+    @override_settings(WORKS_ARCHIVE={'SYNC_LIMIT': 1})
+    def test_archive_prepared_as_operation(self):
+        with mock.patch('assessment.services.operations_service.get_executor', return_value=InlineExecutor()):
+            response = self._archive()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        op_id = response.data['id']
+        self.assertEqual(response['Location'], f'/works/archive/{op_id}')
+
+        response = self._download_archive(op_id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self._assert_archive(response)
+
+    def test_download_archive_of_other_operation(self):
+        service = WorksViewSet.operations_service
+        op_id = uuid.uuid4()
+        service.store.save(Operation(op_id, done=True, result=[{'title': 'Test title'}]))
+        self.assertEqual(self._download_archive(op_id).status_code, status.HTTP_404_NOT_FOUND)
+
+        service.store.save(Operation(op_id, done=True, error="Операция завершилась с ошибкой", kind=ARCHIVE_OPERATION))
+        self.assertEqual(self._download_archive(op_id).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationsTests(APITestCase):
+    class ListSink(NotificationSink):
+        def __init__(self, fail: bool = False):
+            self.fail = fail
+            self.messages = []
+            self.atomic_depths = []
+
+        def send(self, student, notifications):
+            self.atomic_depths.append(len(connections['default'].atomic_blocks))
+            if self.fail:
+                raise ConnectionError("sink is down")
+            self.messages.append((student.last_name, [(n.work.title, n.mark) for n in notifications]))
+
+    def setUp(self):
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.works = [PracticalWork(student_id=self.student.id, title=f"Lab {i}") for i in range(3)]
+        for work in self.works:
+            work.save()
+        self.work_service = WorkCheckService()
+
+    def _mark(self, marks: dict):
+        with mock.patch.object(NotificationsService, 'wake'):
+            self.work_service.mark_works(marks)
+
+    def test_marks_coalesced(self):
+        self._mark({self.works[0].id: 50, self.works[1].id: 60})
+        self._mark({self.works[0].id: 70})
+        sink = self.ListSink()
+
+        self.assertEqual(NotificationsService(sink).drain(), 3)
+        self.assertEqual(sink.messages, [('Wick', [('Lab 1', 60), ('Lab 0', 70)])])
+        self.assertFalse(Notification.objects.filter(sent_date__isnull=True).exists())
+        self.assertEqual(NotificationsService(sink).drain(), 0)
+
+    def test_failed_delivery_retried(self):
+        self._mark({self.works[2].id: 90})
+        service = NotificationsService(self.ListSink(fail=True))
+        service.max_attempts = 2
+
+        with self.assertLogs('assessment.services.notifications_service', 'WARNING'):
+            service.dispatch()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn("sink is down", notification.last_error)
+        self.assertGreater(notification.next_attempt_date, timezone.now())
+        self.assertEqual(service.dispatch(), 0)
+
+        Notification.objects.update(next_attempt_date=timezone.now())
+        with self.assertLogs('assessment.services.notifications_service', 'WARNING'):
+            service.dispatch()
+        self.assertEqual(Notification.objects.get().attempts, 2)
+        self.assertEqual(service.get_pending_count(), 0)
+
+    def test_claimed_notifications_skipped(self):
+        self._mark({self.works[0].id: 50})
+        sink = self.ListSink()
+        service = NotificationsService(sink)
+        # Claimed by another dispatcher that is still sending them
+        Notification.objects.update(claim=uuid.uuid4(), next_attempt_date=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(service.dispatch(), 0)
+
+        # The claim expired, the dispatcher stopped
+        Notification.objects.update(next_attempt_date=timezone.now())
+        depth = len(connections['default'].atomic_blocks)
+        self.assertEqual(service.dispatch(), 1)
+        self.assertEqual(sink.messages, [('Wick', [('Lab 0', 50)])])
+        self.assertEqual(sink.atomic_depths, [depth])
+        self.assertIsNotNone(Notification.objects.get().sent_date)
+
+    def test_wake_schedules_retry_only(self):
+        self._mark({self.works[0].id: 50})
+        service = NotificationsService(self.ListSink(fail=True))
+        with mock.patch('assessment.services.notifications_service.get_executor', return_value=InlineExecutor()), \
+                mock.patch('assessment.services.notifications_service.get_scheduler') as scheduler, \
+                self.assertLogs('assessment.services.notifications_service', 'WARNING'):
+            service.wake()
+        job = scheduler.return_value.add_job
+        job.assert_called_once()
+        self.assertEqual(job.call_args.kwargs['trigger'].run_date, Notification.objects.get().next_attempt_date)
+
+        service = NotificationsService(self.ListSink())
+        with mock.patch('assessment.services.notifications_service.get_executor', return_value=InlineExecutor()), \
+                mock.patch('assessment.services.notifications_service.get_scheduler') as scheduler:
+            Notification.objects.update(next_attempt_date=timezone.now())
+            service.wake()
+        scheduler.assert_not_called()
+
+    def test_file_sink(self):
+        self._mark({self.works[1].id: 80})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notifications.log')
+            NotificationsService(FileNotificationSink(path)).drain()
+            with open(path, encoding='utf-8') as file:
+                content = file.read()
+        self.assertIn("Студенту Wick", content)
+        self.assertIn("Lab 1: 80", content)
+
+
+class AsyncViewsTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.work = PracticalWork(student_id=self.student.id, title="Test title", file='Uploaded Files/test_work.txt')
+        self.work.save()
+
+    async def test_retrieve(self):
+        response = await self.async_client.get(f'/async/works/{self.work.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), json.loads(json.dumps(WorkSerializer(self.work).data, cls=JSONEncoder)))
+
+        response = await self.async_client.get(f'/async/works/{uuid.uuid4()}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = await self.async_client.get(f'/async/students/{self.student.id}')
+        self.assertEqual(response.json()['last_name'], 'Wick')
+
+        response = await self.async_client.get(f'/async/students/{uuid.uuid4()}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_work(self):
+        response = await self.async_client.post('/async/works', {
+            'student_id': str(self.student.id), 'title': 'Async', 'file': SimpleUploadedFile('async.txt', b'async'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['title'], 'Async')
+        student = await Student.objects.aget(id=self.student.id)
+        self.assertEqual(student.submitted_works_count, 1)
+
+        response = await self.async_client.post('/async/works', {
+            'student_id': str(uuid.uuid4()), 'title': 'Async', 'file': SimpleUploadedFile('async.txt', b'async'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_create_work_without_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.post('/async/works', {
+            'student_id': str(self.student.id), 'title': 'Async', 'file': SimpleUploadedFile('async.txt', b'async'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_works_status(self):
+        op_id = uuid.uuid4()
+        service = OperationsService()
+        await sync_to_async(service.store.save)(Operation(op_id))
+        await sync_to_async(service.finish_operation)(op_id, [])
+
+        response = await self.async_client.get('/async/works/status', {'id': str(op_id)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'id': str(op_id), 'done': True, 'result': [], 'next_cursor': None,
+                                           'failed': False, 'error': None})
+
+        response = await self.async_client.get('/async/works/status', {'id': str(uuid.uuid4())})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_works_status_from_database_store(self):
+        operation = Operation(uuid.uuid4(), done=True, result=[])
+
+        class DatabaseStore(OperationStore):
+            # Queries like a database cache backend would, which the event loop does not allow
+            def get(self, op_id):
+                Student.objects.exists()
+                return operation if op_id == operation.id else None
+
+        with mock.patch.object(async_views.operations_service, 'store', DatabaseStore()):
+            response = await self.async_client.get('/async/works/status', {'id': str(operation.id)})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.json()['done'])
+
+            response = await self.async_client.get('/works/status/stream', {'id': str(operation.id)})
+            events = [chunk async for chunk in response.streaming_content]
+            self.assertIn(b'"done":true', events[0])
+
+    async def test_works_status_wait(self):
+        op_id = uuid.uuid4()
+        service = async_views.operations_service
+        with mock.patch.object(service, 'store', InMemoryOperationStore()):
+            service.store.save(Operation(op_id))
+            threading.Timer(0.1, service.finish_operation, (op_id, [])).start()
+
+            response = await self.async_client.get('/async/works/status', {'id': str(op_id), 'wait': 10})
+        self.assertTrue(response.json()['done'])
+
+    async def test_works_status_stream(self):
+        op_id = uuid.uuid4()
+        service = async_views.operations_service
+        with mock.patch.object(service, 'store', InMemoryOperationStore()):
+            service.store.save(Operation(op_id))
+            threading.Timer(0.1, service.finish_operation, (op_id, [])).start()
+
+            response = await self.async_client.get('/works/status/stream', {'id': str(op_id)})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            events = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(events), 2)
+        self.assertIn(b'"done":false', events[0])
+        self.assertIn(b'"done":true', events[1])
+        self.assertTrue(events[1].startswith(b'event: operation\ndata: '))
+
+
+class ObjectCacheTests(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.service = StudentsService()
+
+    def test_read_through(self):
+        hits, misses = student_cache.hits, student_cache.misses
+        self.service.get_student(self.student.id)
+        with self.assertNumQueries(0):
+            student = self.service.get_student(self.student.id)
+        self.assertEqual(student.last_name, 'Wick')
+        self.assertEqual((student_cache.hits - hits, student_cache.misses - misses), (1, 1))
+
+    def test_invalidated_on_change(self):
+        self.service.get_student(self.student.id)
+        self.student.last_name = 'Rock'
+        self.student.save()
+        self.assertEqual(self.service.get_student(self.student.id).last_name, 'Rock')
+
+        WorkCheckService().add_work(PracticalWork(student_id=self.student.id, title="Counted"))
+        self.assertEqual(self.service.get_student(self.student.id).submitted_works_count, 1)
+
+        work = PracticalWork.objects.get(student_id=self.student.id)
+        WorkCheckService().get_work_by_id(work.id)
+        with mock.patch.object(NotificationsService, 'wake'):
+            WorkCheckService().mark_works({work.id: 42})
+        self.assertEqual(WorkCheckService().get_work_by_id(work.id).mark, 42)
+
+        self.service.delete_student(self.student.id)
+        with self.assertRaises(Student.DoesNotExist):
+            self.service.get_student(self.student.id)
+        with self.assertRaises(PracticalWork.DoesNotExist):
+            WorkCheckService().get_work_by_id(work.id)
+
+    def test_retrieve_not_modified(self):
+        request = self.factory.get(f'/students/{self.student.id}')
+        response = StudentsViewSet.as_view({'get': 'retrieve'})(request, self.student.id)
+        etag = response['ETag']
+
+        request = self.factory.get(f'/students/{self.student.id}', HTTP_IF_NONE_MATCH=etag)
+        response = StudentsViewSet.as_view({'get': 'retrieve'})(request, self.student.id)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.student.name = 'Johnny'
+        self.student.save()
+        response = StudentsViewSet.as_view({'get': 'retrieve'})(request, self.student.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class StudentStatsTests(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.service = WorkCheckService()
+        self.wake = mock.patch.object(NotificationsService, 'wake')
+        self.wake.start()
+
+    def tearDown(self):
+        self.wake.stop()
+
+    def _stats(self) -> dict:
+        request = self.factory.get(f'/students/{self.student.id}/stats')
+        response = StudentsViewSet.as_view({'get': 'stats'})(request, id=self.student.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_stats_follow_works(self):
+        self.assertEqual(self._stats()['works_count'], 0)
+
+        first = self.service.add_work(PracticalWork(student_id=self.student.id, title="First"))
+        second = self.service.add_work(PracticalWork(student_id=self.student.id, title="Second"))
+        self.service.add_works([PracticalWork(student_id=self.student.id, title="Imported", mark=30)])
+        self.service.mark_work(first.id, 50)
+        self.service.mark_works({first.id: 70, second.id: 80})
+
+        stats = self._stats()
+        self.assertEqual((stats['works_count'], stats['marked_count'], stats['unmarked_count']), (3, 3, 0))
+        self.assertEqual(stats['average_mark'], 60)
+        imported = PracticalWork.objects.get(title="Imported")
+        self.assertEqual(parse_datetime(stats['last_submitted_date']), imported.submitting_date)
+
+        imported.delete()
+        stats = self._stats()
+        self.assertEqual((stats['works_count'], stats['average_mark']), (2, 75))
+        second.refresh_from_db()
+        self.assertEqual(StudentStats.objects.get(student=self.student).last_submitted_date, second.submitting_date)
+
+    def test_student_deleted(self):
+        self.service.add_work(PracticalWork(student_id=self.student.id, title="First"))
+        StudentsService().delete_student(self.student.id)
+        self.assertFalse(StudentStats.objects.exists())
+
+
+@override_settings(METRICS={'ENABLED': True})
+class MetricsTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        reset_metrics()
+        self.wake = mock.patch.object(NotificationsService, 'wake')
+        self.wake.start()
+        self.student = Student(name='John', last_name='Wick')
+        self.student.save()
+        self.work = WorkCheckService().add_work(PracticalWork(student_id=self.student.id, title="Work"))
+
+    def tearDown(self):
+        self.wake.stop()
+
+    def test_view_metrics(self):
+        with self.assertMaxQueries(1) as context:
+            self.client.get('/students')
+        queries = len(context)
+        self.client.get('/students')
+
+        metrics = self.client.get('/metrics').content.decode()
+        self.assertIn('http_requests_total{view="assessment:students",method="GET",status="200"} 2', metrics)
+        self.assertIn(f'http_request_db_queries_sum{{view="assessment:students",method="GET"}} {float(2 * queries)}',
+                      metrics)
+        self.assertIn('http_request_duration_seconds_count{view="assessment:students",method="GET"} 2', metrics)
+        self.assertIn('http_request_render_duration_seconds_bucket{view="assessment:students",method="GET",'
+                      'le="+Inf"} 2', metrics)
+        self.assertIn('object_cache_hits_total{cache="student"}', metrics)
+        self.assertIn('# TYPE operations_executor_in_flight gauge', metrics)
+
+    def test_query_budgets(self):
+        with self.assertMaxQueries(1):
+            self.client.get(f'/works/{self.work.id}')
+        with self.assertMaxQueries(1):
+            self.client.get(f'/students/{self.student.id}/stats')
+        with self.assertMaxQueries(8):
+            response = self.client.patch(f'/works/{self.work.id}', {'mark': 90}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_budget_exceeded(self):
+        with self.assertRaises(AssertionError), self.assertMaxQueries(0):
+            self.client.get('/students')
+
+
+class DatabaseConfigTests(APITestCase):
+    def test_sqlite_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tuned.sqlite3')
+            handler = ConnectionHandler({'default': database_config({'SQLITE_PATH': path})})
+            connection = handler['default']
+            try:
+                with connection.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                connection.close()
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000,
+                                   'mmap_size': 256 * 1024 * 1024})
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_postgresql_profile(self):
+        environ = {'DB_ENGINE': 'postgresql', 'DB_NAME': 'works', 'DB_HOST': 'db', 'DB_CONN_MAX_AGE': '300'}
+        config = database_config(environ)
+        self.assertEqual((config['ENGINE'], config['NAME'], config['HOST']),
+                         ('django.db.backends.postgresql', 'works', 'db'))
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (300, True))
+
+        config = database_config({**environ, 'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '20'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10})
+
+    def test_invalid_environment(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'DB_ENGINE': 'oracle'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'DB_CONN_MAX_AGE': 'forever'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'SQLITE_JOURNAL_MODE': 'WAL; DROP TABLE assessment_student'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'SQLITE_SYNCHRONOUS': 'sometimes'})
+        config = database_config({'SQLITE_SYNCHRONOUS': 'full'})
+        self.assertIn('PRAGMA synchronous=FULL', config['OPTIONS']['init_command'])
+
+
+@override_settings(REPORTS={'AUTOSTART': False, 'LEASE_TTL': 60, 'KEEP': 2,
+                            'SCHEDULES': {'ungraded_works': {'hour': 5, 'minute': 0}}})
+class ReportsTests(APITestCase):
+    def setUp(self):
+        # Paused, so jobs are only persisted and never run by the scheduler thread
+        self.scheduler = BackgroundScheduler(jobstores={'default': DjangoJobStore()})
+        self.scheduler.start(paused=True)
+        self.addCleanup(self.scheduler.shutdown, wait=False)
+        patcher = mock.patch('assessment.services.reports_service.get_reports_scheduler',
+                             return_value=self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, ReportsService, '_leading', False)
+        self.addCleanup(setattr, ReportsService, '_lease', None)
+        student = Student.objects.create(name='Ivan', last_name='Ivanov')
+        for mark in (None, None, 5):
+            PracticalWork.objects.create(student=student, title='Work', mark=mark)
+        self.student = student
+
+    def test_server_modules_do_not_start_reports_by_default(self):
+        with override_settings(REPORTS=project_settings.REPORTS), \
+                mock.patch.object(ReportsService, 'start') as start:
+            for module in ('distance_education_system.wsgi', 'distance_education_system.asgi'):
+                importlib.reload(importlib.import_module(module))
+        start.assert_not_called()
+
+    def test_job_store_persists_jobs(self):
+        run_date = timezone.now() + timedelta(days=1)
+        self.scheduler.add_job(run_report, 'date', run_date=run_date, args=['ungraded_works'], id='job')
+        with self.assertRaises(ConflictingIdError):
+            self.scheduler.add_job(run_report, 'date', run_date=run_date, args=['ungraded_works'], id='job')
+
+        store = DjangoJobStore()
+        store.start(self.scheduler, 'default')
+        job = store.lookup_job('job')
+        self.assertEqual(job.func, run_report)
+        self.assertEqual(job.args, ('ungraded_works',))
+        self.assertEqual(store.get_next_run_time(), run_date)
+        self.assertEqual(store.get_due_jobs(run_date - timedelta(seconds=1)), [])
+        self.assertEqual([job.id for job in store.get_due_jobs(run_date)], ['job'])
+
+        self.scheduler.modify_job('job', args=['other'])
+        self.assertEqual(list(store.lookup_job('job').args), ['other'])
+        self.scheduler.remove_job('job')
+        self.assertFalse(ScheduledJob.objects.exists())
+        with self.assertRaises(JobLookupError):
+            store.remove_job('job')
+
+    def test_due_job_claimed_once(self):
+        run_date = timezone.now() - timedelta(seconds=1)
+        self.scheduler.add_job(run_report, 'date', run_date=run_date, args=['ungraded_works'], id='job')
+        first, second = DjangoJobStore(claim_timeout=60), DjangoJobStore(claim_timeout=60)
+        first.start(self.scheduler, 'default')
+        second.start(self.scheduler, 'default')
+
+        now = timezone.now()
+        self.assertEqual([job.id for job in first.get_due_jobs(now)], ['job'])
+        self.assertEqual(second.get_due_jobs(now), [])
+        # The first scheduler stopped before running the job
+        self.assertEqual([job.id for job in second.get_due_jobs(now + timedelta(seconds=61))], ['job'])
+
+    def test_scheduler_threads_close_old_connections(self):
+        scheduler = DatabaseScheduler(jobstores={'default': DjangoJobStore()})
+        with mock.patch('assessment.scheduler.close_old_connections') as close:
+            scheduler._process_jobs()
+        self.assertEqual(close.call_count, 2)
+
+        with mock.patch('assessment.services.reports_service.close_old_connections') as close, \
+                mock.patch.object(ReportsService, 'elect') as elect:
+            ReportsService()._renew()
+        elect.assert_called_once()
+        self.assertEqual(close.call_count, 2)
+
+    def test_lease_is_taken_over_after_expiry(self):
+        first = LeaderLease('reports', ttl=60, owner='first')
+        second = LeaderLease('reports', ttl=60, owner='second')
+        self.assertTrue(first.acquire())
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+
+        SchedulerLease.objects.filter(name='reports').update(expires_date=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.acquire())
+        second.release()
+        self.assertTrue(first.acquire())
+
+    def test_elect_resumes_scheduler_of_leader_only(self):
+        service = ReportsService()
+        with mock.patch.object(self.scheduler, 'resume') as resume, \
+                mock.patch.object(self.scheduler, 'pause') as pause:
+            self.assertTrue(service.elect())
+            self.assertTrue(ScheduledJob.objects.filter(id='report:ungraded_works').exists())
+            resume.assert_called_once()
+
+            SchedulerLease.objects.update(owner='other', expires_date=timezone.now() + timedelta(minutes=1))
+            self.assertFalse(service.elect())
+            pause.assert_called_once()
+
+    def test_generate_report_keeps_latest_results(self):
+        service = ReportsService()
+        for _ in range(3):
+            result = service.generate_report('ungraded_works')
+        self.assertEqual(ReportResult.objects.count(), 2)
+        result = ReportResult.objects.get(id=result.id)
+        self.assertEqual(result.data[0]['student_id'], str(self.student.id))
+        self.assertEqual(result.data[0]['ungraded_count'], 2)
+
+    def test_latest_result(self):
+        response = self.client.get('/reports/ungraded_works')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/reports/missing').status_code, status.HTTP_404_NOT_FOUND)
+
+        result = ReportsService().generate_report('ungraded_works')
+        response = self.client.get('/reports/ungraded_works')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], str(result.id))
+        self.assertEqual(response.data['data'][0]['ungraded_count'], 2)
+
+        response = self.client.get('/reports')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['name'], 'ungraded_works')
+        self.assertIsNotNone(response.data[0]['last_generated_date'])
+
+    def test_schedule_report(self):
+        run_date = timezone.now() + timedelta(hours=1)
+        response = self.client.post('/reports/ungraded_works/schedule', {'run_date': run_date.isoformat()},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ScheduledJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.next_run_time, run_date)
+
+        response = self.client.post('/reports/ungraded_works/schedule', {'run_date': 'tomorrow'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
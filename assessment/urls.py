@@ -3,7 +3,7 @@ from django.conf.urls.static import static
 from django.urls import path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
-from . import views
+from . import async_views, views
 
 app_name = 'assessment'
 
@@ -14,13 +14,39 @@ urlpatterns = [
          views.StudentsViewSet.as_view(
              {'post': 'create', 'get': 'list'}
          ), name='students'),
+    path('students/bulk', views.StudentsViewSet.as_view({'post': 'bulk_create', 'delete': 'bulk_destroy'}), name='students-bulk'),
+    path('students/<str:id>/stats', views.StudentsViewSet.as_view({'get': 'stats'}), name='student-stats'),
     path('students/<str:id>',
          views.StudentsViewSet.as_view(
              {'get': 'retrieve', 'delete': 'destroy'}
          ), name='student-detail'),
+    path('reports', views.ReportsViewSet.as_view({'get': 'list'}), name='reports'),
+    path('reports/<str:name>', views.ReportsViewSet.as_view({'get': 'retrieve'}), name='report-detail'),
+    path('reports/<str:name>/schedule', views.ReportsViewSet.as_view({'post': 'schedule'}), name='report-schedule'),
+    path('metrics', views.MetricsViewSet.as_view({'get': 'list'}), name='metrics'),
+    path('cache/stats', views.CacheViewSet.as_view({'get': 'stats'}), name='cache-stats'),
     path('works', views.WorksViewSet.as_view({'post': 'create'}), name='works'),
+    path('works/bulk', views.WorksViewSet.as_view({'post': 'bulk_create', 'patch': 'bulk_mark'}), name='works-bulk'),
+    path('works/uploads', views.WorkUploadsViewSet.as_view({'post': 'create'}), name='work-uploads'),
+    path('works/uploads/<str:id>',
+         views.WorkUploadsViewSet.as_view(
+             {'get': 'retrieve', 'delete': 'destroy'}
+         ), name='work-upload-detail'),
+    path('works/uploads/<str:id>/chunks/<int:index>',
+         views.WorkUploadsViewSet.as_view({'put': 'upload_chunk'}), name='work-upload-chunk'),
+    path('works/uploads/<str:id>/finalize',
+         views.WorkUploadsViewSet.as_view({'post': 'finalize'}), name='work-upload-finalize'),
     path('works/request', views.WorksViewSet.as_view({'get': 'request_works'}), name='request-works'),
+    path('works/export', views.WorksViewSet.as_view({'get': 'export_works'}), name='export-works'),
+    path('works/archive', views.WorksViewSet.as_view({'get': 'archive_works'}), name='works-archive'),
+    path('works/archive/<uuid:id>', views.WorksViewSet.as_view({'get': 'download_archive'}), name='works-archive-download'),
     path('works/status', views.WorksViewSet.as_view({'get': 'list'}), name='works-status'),
+    path('async/works', async_views.create_work, name='async-works'),
+    path('async/works/status', async_views.works_status, name='async-works-status'),
+    path('works/status/stream', async_views.works_status_stream, name='works-status-stream'),
+    path('async/works/<uuid:id>', async_views.retrieve_work, name='async-work-detail'),
+    path('async/students/<uuid:id>', async_views.retrieve_student, name='async-student-detail'),
+    path('works/<str:id>/file', views.WorksViewSet.as_view({'get': 'download'}), name='work-download'),
     path('works/<str:id>', views.WorksViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update'}), name='work-detail'),
 ]
 
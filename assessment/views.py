@@ -1,5 +1,8 @@
+from io import BytesIO
 from uuid import UUID
 
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema_view, extend_schema
 from rest_framework import status
@@ -9,14 +12,35 @@ from rest_framework.response import Response
 from rest_framework.utils.serializer_helpers import ReturnDict
 from rest_framework.viewsets import ViewSet
 
-from assessment.models import PracticalWork, Student
+from assessment.archives import ARCHIVE_OPERATION, archive_entries, entries_to_zip
+from assessment.downloads import work_file_response
+from assessment.executors import OperationRejected
+from assessment.exports import works_to_ndjson, works_to_csv
+from assessment.fast_serializers import FastWorkSerializer, FastStudentSerializer
+from assessment.imports import read_rows, row_errors, row_uuids
+from assessment.metrics import render_metrics
+from assessment.models import PracticalWork, Student, WorkUpload
+from assessment.object_cache import cache_stats, etag_matches, representation_etag
 from assessment.serializers import WorkSerializer, StudentSerializer, MarkWorkQuerySerializer, WorkRequestSerializer, \
-    GetWorksQuerySerializer, OperationSerializer, GetOperationQuerySerializer, NewStudentSerializer
+    GetWorksQuerySerializer, OperationSerializer, GetOperationQuerySerializer, NewStudentSerializer, \
+    ExportWorksQuerySerializer, BulkWorkSerializer, GetStudentsQuerySerializer, StudentsPageSerializer, \
+    NewUploadSerializer, UploadSerializer, FilterWorksQuerySerializer, BulkMarkSerializer, StudentStatsSerializer, \
+    BulkDeleteStudentsSerializer, ReportSerializer, ReportResultSerializer, ScheduleReportSerializer, \
+    ScheduledReportSerializer
 from assessment.services.operations_service import OperationsService
+from assessment.services.reports_service import ReportsService
 from assessment.services.students_service import StudentsService
+from assessment.services.uploads_service import UploadsService
 from assessment.services.work_check_service import WorkCheckService
 
 
+def _conditional_response(request, data) -> Response:
+    etag = representation_etag(data)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return Response(data=data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+
 @extend_schema_view(
     create=extend_schema(
         summary="Post new work",
@@ -27,11 +51,22 @@ from assessment.services.work_check_service import WorkCheckService
         },
         auth=False,
     ),
+    bulk_create=extend_schema(
+        summary="Import works from JSON array or CSV file",
+        request=BulkWorkSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: None,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_422_UNPROCESSABLE_ENTITY: None,
+        },
+        auth=False,
+    ),
     retrieve=extend_schema(
         summary="Get work by id",
         responses={
             status.HTTP_200_OK: WorkSerializer,
             status.HTTP_204_NO_CONTENT: None,
+            status.HTTP_304_NOT_MODIFIED: None,
         },
         auth=False,
     ),
@@ -44,16 +79,79 @@ from assessment.services.work_check_service import WorkCheckService
         },
         auth=False,
     ),
+    bulk_mark=extend_schema(
+        summary="Mark works in bulk",
+        request={'application/json': {
+            'type': 'object',
+            'additionalProperties': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+            'description': "Marks by work id",
+        }},
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_404_NOT_FOUND: None,
+            status.HTTP_422_UNPROCESSABLE_ENTITY: None,
+        },
+        auth=False,
+    ),
+    download=extend_schema(
+        summary="Download work file (supports Range and If-None-Match)",
+        responses={
+            (status.HTTP_200_OK, 'application/octet-stream'): bytes,
+            (status.HTTP_206_PARTIAL_CONTENT, 'application/octet-stream'): bytes,
+            status.HTTP_304_NOT_MODIFIED: None,
+            status.HTTP_404_NOT_FOUND: None,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: None,
+        },
+        auth=False,
+    ),
     request_works=extend_schema(
         summary="Request get works operation",
         responses={
             status.HTTP_200_OK: OperationSerializer,
             status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_503_SERVICE_UNAVAILABLE: None,
+        },
+        auth=False,
+    ),
+    export_works=extend_schema(
+        summary="Export works as NDJSON or CSV stream",
+        parameters=[ExportWorksQuerySerializer],
+        responses={
+            (status.HTTP_200_OK, 'application/x-ndjson'): str,
+            (status.HTTP_200_OK, 'text/csv'): str,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+        },
+        auth=False,
+    ),
+    archive_works=extend_schema(
+        summary="Download works files as ZIP stream",
+        description="Small archives are streamed right away. Archives over WORKS_ARCHIVE['SYNC_LIMIT'] works "
+                    "start an operation; the ZIP is then streamed from /works/archive/<operation id>",
+        parameters=[FilterWorksQuerySerializer],
+        responses={
+            (status.HTTP_200_OK, 'application/zip'): bytes,
+            status.HTTP_202_ACCEPTED: OperationSerializer,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_503_SERVICE_UNAVAILABLE: None,
+        },
+        auth=False,
+    ),
+    download_archive=extend_schema(
+        summary="Download prepared works archive",
+        operation_id='works_archive_download',
+        responses={
+            (status.HTTP_200_OK, 'application/zip'): bytes,
+            status.HTTP_202_ACCEPTED: None,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_404_NOT_FOUND: None,
         },
         auth=False,
     ),
     list=extend_schema(
         summary="Get works list",
+        description="With `wait` the response is held until the operation is done or `wait` seconds pass",
+        parameters=[GetOperationQuerySerializer],
         responses={
             status.HTTP_200_OK: WorkSerializer(many=True),
             status.HTTP_400_BAD_REQUEST: ReturnDict,
@@ -64,6 +162,7 @@ from assessment.services.work_check_service import WorkCheckService
 )
 class WorksViewSet(ViewSet):
     work_service = WorkCheckService()
+    students_service = StudentsService()
     operations_service = OperationsService()
 
     def create(self, request):
@@ -74,10 +173,29 @@ class WorksViewSet(ViewSet):
         self.work_service.add_work(PracticalWork(**body.validated_data))
         return Response(status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['POST'])
+    def bulk_create(self, request):
+        try:
+            rows = read_rows(request)
+        except ValueError as e:
+            return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data={'detail': str(e)})
+        student_ids = self.students_service.get_existing_ids(row_uuids(rows, 'student_id'))
+        body = BulkWorkSerializer(data=rows, many=True, context={'student_ids': student_ids})
+        if not body.is_valid():
+            return Response(data=row_errors(body.errors), status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        works = [
+            PracticalWork(**row, mark_date=now if row.get('mark') is not None else None)
+            for row in body.validated_data
+        ]
+        created = self.work_service.add_works(works)
+        return Response(data={'created': len(created)}, status=status.HTTP_201_CREATED)
+
     def retrieve(self, request, id: UUID = None):
         try:
             work: PracticalWork = self.work_service.get_work_by_id(id)
-            return Response(data=WorkSerializer(work).data, status=status.HTTP_200_OK)
+            return _conditional_response(request, WorkSerializer(work).data)
         except NotFound:
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -92,29 +210,206 @@ class WorksViewSet(ViewSet):
         except ValueError as e:
             return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data={'detail': str(e)})
 
+    @action(detail=False, methods=['PATCH'])
+    def bulk_mark(self, request):
+        marks = BulkMarkSerializer().run_validation(request.data)
+
+        try:
+            marked = self.work_service.mark_works(marks)
+            return Response(data={'marked': marked}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data={'detail': str(e)})
+
+    @action(detail=True, methods=['GET'])
+    def download(self, request, id: UUID = None):
+        try:
+            work: PracticalWork = self.work_service.get_work_by_id(id)
+        except PracticalWork.DoesNotExist:
+            raise NotFound('Работа не найдена')
+        if not work.file:
+            raise NotFound('У работы нет файла')
+        try:
+            return work_file_response(request, work)
+        except FileNotFoundError:
+            raise NotFound('Файл работы не найден')
+
     @action(detail=False, methods=['GET'])
     def request_works(self, request):
         query = GetWorksQuerySerializer(data=request.query_params)
         if not query.is_valid():
             raise ValidationError(query.errors)
-        operation_id = self.operations_service.execute_operation(self.work_service.get_submitted_works, timezone.now(),
-                                                                 query.validated_data)
+        try:
+            operation_id = self.operations_service.execute_operation(self.work_service.get_submitted_works_page,
+                                                                     timezone.now(),
+                                                                     {**query.validated_data, 'values': True},
+                                                                     serializer_class=FastWorkSerializer)
+        except OperationRejected as e:
+            return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE, data={'detail': str(e)},
+                            headers={'Retry-After': '1'})
         operation = self.operations_service.get_operation(operation_id)
 
         return Response(data=OperationSerializer(operation).data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['GET'])
+    def export_works(self, request):
+        query = ExportWorksQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            raise ValidationError(query.errors)
+
+        filters = dict(query.validated_data)
+        export_format = filters.pop('export_format')
+        works = self.work_service.filter_submitted_works(**filters)
+        if export_format == 'csv':
+            response = StreamingHttpResponse(works_to_csv(works), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(works_to_ndjson(works), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="works.{export_format}"'
+        return response
+
+    @action(detail=False, methods=['GET'])
+    def archive_works(self, request):
+        query = FilterWorksQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            raise ValidationError(query.errors)
+
+        works = self.work_service.filter_submitted_works(**query.validated_data)
+        if works.count() <= settings.WORKS_ARCHIVE['SYNC_LIMIT']:
+            return self._zip_response(archive_entries(works))
+
+        try:
+            operation_id = self.operations_service.execute_operation(self.work_service.get_archive_manifest,
+                                                                     args=query.validated_data,
+                                                                     kind=ARCHIVE_OPERATION)
+        except OperationRejected as e:
+            return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE, data={'detail': str(e)},
+                            headers={'Retry-After': '1'})
+        operation = self.operations_service.get_operation(operation_id)
+
+        return Response(data=OperationSerializer(operation).data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': f'{request.path}/{operation_id}'})
+
+    @action(detail=True, methods=['GET'])
+    def download_archive(self, request, id: UUID = None):
+        operation = self.operations_service.get_operation(id)
+        if operation is None or operation.kind != ARCHIVE_OPERATION:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not operation.done:
+            return Response(status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '1'})
+        if operation.failed:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'detail': operation.error})
+
+        return self._zip_response(operation.result)
+
+    @staticmethod
+    def _zip_response(entries) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(entries_to_zip(entries), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="works.zip"'
+        return response
+
     def list(self, request):
         query = GetOperationQuerySerializer(data=request.query_params)
         if not query.is_valid():
             raise ValidationError(query.errors)
 
-        operation = self.operations_service.get_operation(UUID(query.data.get("id")))
+        wait = query.validated_data.get('wait')
+        if wait:
+            operation = self.operations_service.wait_operation(query.validated_data['id'], wait)
+        else:
+            operation = self.operations_service.get_operation(query.validated_data['id'])
         if operation is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         return Response(data=OperationSerializer(operation).data, status=status.HTTP_200_OK)
 
 
+@extend_schema_view(
+    create=extend_schema(
+        summary="Start chunked work upload",
+        request=NewUploadSerializer,
+        responses={
+            status.HTTP_201_CREATED: UploadSerializer,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+        },
+        auth=False,
+    ),
+    retrieve=extend_schema(
+        summary="Get chunked upload status",
+        responses={
+            status.HTTP_200_OK: UploadSerializer,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
+    upload_chunk=extend_schema(
+        summary="Upload chunk of work file",
+        description="Raw chunk bytes in the body, SHA-256 of the chunk in the X-Chunk-SHA256 header",
+        request={'application/octet-stream': bytes},
+        responses={
+            status.HTTP_200_OK: UploadSerializer,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
+    finalize=extend_schema(
+        summary="Finish chunked upload and create work",
+        request=None,
+        responses={
+            status.HTTP_201_CREATED: WorkSerializer,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
+    destroy=extend_schema(
+        summary="Cancel chunked upload",
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
+)
+class WorkUploadsViewSet(ViewSet):
+    uploads_service = UploadsService()
+
+    def create(self, request):
+        body = NewUploadSerializer(data=request.data)
+        if not body.is_valid():
+            raise ValidationError(body.errors)
+
+        upload = self.uploads_service.init_upload(WorkUpload(**body.validated_data))
+        return Response(data=UploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, id: UUID = None):
+        upload = self.uploads_service.get_upload(id)
+        return Response(data=UploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['PUT'])
+    def upload_chunk(self, request, id: UUID = None, index: int = None):
+        checksum = request.headers.get('X-Chunk-SHA256')
+        if not checksum:
+            raise ValidationError({'X-Chunk-SHA256': "Заголовок обязателен"})
+
+        try:
+            upload = self.uploads_service.write_chunk(id, index, request.stream or BytesIO(), checksum)
+            return Response(data=UploadSerializer(upload).data, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'detail': str(e)})
+
+    @action(detail=True, methods=['POST'])
+    def finalize(self, request, id: UUID = None):
+        try:
+            work = self.uploads_service.finalize_upload(id)
+            return Response(data=WorkSerializer(work).data, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'detail': str(e)})
+
+    def destroy(self, request, id: UUID = None):
+        self.uploads_service.delete_upload(id)
+        return Response(status=status.HTTP_200_OK)
+
+
 @extend_schema_view(
     create=extend_schema(
         summary="Post new student",
@@ -125,18 +420,38 @@ class WorksViewSet(ViewSet):
         },
         auth=False,
     ),
+    bulk_create=extend_schema(
+        summary="Import students from JSON array or CSV file",
+        request=NewStudentSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: None,
+            status.HTTP_422_UNPROCESSABLE_ENTITY: ReturnDict,
+        },
+        auth=False,
+    ),
     retrieve=extend_schema(
         summary="Get student by id",
         responses={
             status.HTTP_200_OK: StudentSerializer,
+            status.HTTP_304_NOT_MODIFIED: None,
             status.HTTP_404_NOT_FOUND: None
         },
         auth=False,
     ),
+    stats=extend_schema(
+        summary="Get student grade statistics",
+        responses={
+            status.HTTP_200_OK: StudentStatsSerializer,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
     list=extend_schema(
         summary="Get students list",
+        parameters=[GetStudentsQuerySerializer],
         responses={
-            status.HTTP_200_OK: StudentSerializer(many=True),
+            status.HTTP_200_OK: StudentsPageSerializer,
+            status.HTTP_400_BAD_REQUEST: ReturnDict,
         },
         auth=False,
     ),
@@ -147,6 +462,15 @@ class WorksViewSet(ViewSet):
         },
         auth=False,
     ),
+    bulk_destroy=extend_schema(
+        summary="Delete students with all their works",
+        request=BulkDeleteStudentsSerializer,
+        responses={
+            status.HTTP_200_OK: dict,
+            status.HTTP_422_UNPROCESSABLE_ENTITY: ReturnDict,
+        },
+        auth=False,
+    ),
 )
 class StudentsViewSet(ViewSet):
     students_service = StudentsService()
@@ -158,15 +482,126 @@ class StudentsViewSet(ViewSet):
         created_student: Student = self.students_service.add_student(Student(**body.validated_data))
         return Response(data=StudentSerializer(created_student).data, status=status.HTTP_201_CREATED)
 
-    def retrieve(self, _, id: UUID = None):
+    @action(detail=False, methods=['POST'])
+    def bulk_create(self, request):
+        try:
+            rows = read_rows(request)
+        except ValueError as e:
+            return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data={'detail': str(e)})
+        body = NewStudentSerializer(data=rows, many=True)
+        if not body.is_valid():
+            return Response(data=row_errors(body.errors), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        created = self.students_service.add_students([Student(**row) for row in body.validated_data])
+        return Response(data={'created': len(created)}, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, id: UUID = None):
         student: Student = self.students_service.get_student(id)
-        return Response(data=StudentSerializer(student).data, status=status.HTTP_200_OK)
+        return _conditional_response(request, StudentSerializer(student).data)
 
+    @action(detail=True, methods=['GET'])
+    def stats(self, _, id: UUID = None):
+        stats = self.students_service.get_student_stats(id)
+        return Response(data=StudentStatsSerializer(stats).data, status=status.HTTP_200_OK)
 
-    def list(self, _):
-        students = self.students_service.get_all_students()
-        return Response(data=StudentSerializer(students, many=True).data, status=status.HTTP_200_OK)
+    def list(self, request):
+        query = GetStudentsQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            raise ValidationError(query.errors)
+
+        fields = query.validated_data.get('fields')
+        page = self.students_service.get_students_page(**query.validated_data)
+        return Response(data={
+            'results': FastStudentSerializer(page.items, many=True, fields=fields).data,
+            'next_cursor': page.next_cursor,
+        }, status=status.HTTP_200_OK)
 
     def destroy(self, _, id: UUID = None):
         self.students_service.delete_student(id)
         return Response(status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['DELETE'])
+    def bulk_destroy(self, request):
+        body = BulkDeleteStudentsSerializer(data=request.data)
+        if not body.is_valid():
+            return Response(data=body.errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        deleted = self.students_service.delete_students(body.validated_data['ids'])
+        return Response(data={'deleted': deleted}, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    stats=extend_schema(
+        summary="Get object cache hit and miss counters",
+        responses={
+            status.HTTP_200_OK: dict,
+        },
+        auth=False,
+    ),
+)
+class CacheViewSet(ViewSet):
+
+    @action(detail=False, methods=['GET'])
+    def stats(self, _):
+        return Response(data=cache_stats(), status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Get request, operations and cache metrics in Prometheus text format",
+        responses={
+            (status.HTTP_200_OK, 'text/plain'): str,
+        },
+        auth=False,
+    ),
+)
+class MetricsViewSet(ViewSet):
+
+    def list(self, _):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Get reports with their schedules",
+        responses={
+            status.HTTP_200_OK: ReportSerializer(many=True),
+        },
+        auth=False,
+    ),
+    retrieve=extend_schema(
+        summary="Get the latest precomputed result of a report",
+        responses={
+            status.HTTP_200_OK: ReportResultSerializer,
+            status.HTTP_304_NOT_MODIFIED: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        auth=False,
+    ),
+    schedule=extend_schema(
+        summary="Schedule a one-off run of a report",
+        request=ScheduleReportSerializer,
+        responses={
+            status.HTTP_202_ACCEPTED: ScheduledReportSerializer,
+            status.HTTP_404_NOT_FOUND: None,
+            status.HTTP_422_UNPROCESSABLE_ENTITY: ReturnDict,
+        },
+        auth=False,
+    ),
+)
+class ReportsViewSet(ViewSet):
+    reports_service = ReportsService()
+
+    def list(self, _):
+        return Response(data=ReportSerializer(self.reports_service.get_reports(), many=True).data,
+                        status=status.HTTP_200_OK)
+
+    def retrieve(self, request, name: str = None):
+        result = self.reports_service.get_latest_result(name)
+        return _conditional_response(request, ReportResultSerializer(result).data)
+
+    @action(detail=True, methods=['POST'])
+    def schedule(self, request, name: str = None):
+        body = ScheduleReportSerializer(data=request.data)
+        if not body.is_valid():
+            return Response(data=body.errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        job = self.reports_service.schedule_report(name, body.validated_data.get('run_date'))
+        return Response(data=ScheduledReportSerializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,26 @@
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_name: str | Path = None, media_root: str | Path = None) -> None:
+    """
+    Configures Django for a standalone benchmark script.
+    `db_name` points the default SQLite database at a separate file
+    and `media_root` stores files in a separate directory
+    so benchmarks never touch the development data.
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'distance_education_system.settings')
+
+    import django
+    from django.conf import settings
+
+    # Other engines are configured through the DB_* environment variables
+    if db_name is not None and settings.DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        settings.DATABASES['default']['NAME'] = db_name
+    if media_root is not None:
+        settings.MEDIA_ROOT = str(media_root)
+    django.setup()
@@ -0,0 +1,101 @@
+"""
+Concurrent-connection capacity of the sync DRF views against the async views
+under uvicorn. The server runs in a separate process, every client connection
+sends keep-alive requests in a loop for `--duration` seconds.
+
+    python -m benchmarks.asgi_load --connections 10 100 500 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import BASE_DIR, setup_django
+from benchmarks.http_client import fetch_json, request, start_server
+
+
+async def _client(port: int, path: str, deadline: float, latencies: list[float], errors: list[int]) -> None:
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        errors.append(0)
+        return
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, path)
+            if status >= 500:
+                errors.append(status)
+            latencies.append(time.perf_counter() - started)
+    except (OSError, asyncio.IncompleteReadError):
+        errors.append(0)
+    finally:
+        writer.close()
+
+
+async def _load(port: int, path: str, connections: int, duration: float) -> dict:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_client(port, path, deadline, latencies, errors) for _ in range(connections)))
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float('nan')] * 99
+    return {
+        'rps': len(latencies) / duration,
+        'p50': quantiles[49] * 1000,
+        'p99': quantiles[98] * 1000,
+        'errors': len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--works', type=int, default=10_000)
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--db', default=str(BASE_DIR / 'benchmark.sqlite3'))
+    args = parser.parse_args()
+
+    db = BASE_DIR / args.db
+    db.unlink(missing_ok=True)
+    setup_django(db)
+
+    from django.core.management import call_command
+
+    from assessment.models import PracticalWork
+    from benchmarks.seed import seed
+
+    call_command('migrate', verbosity=0)
+    call_command('createcachetable', verbosity=0)
+    student_id = seed(args.students, args.works)[0]
+    work_id = PracticalWork.objects.values_list('id', flat=True).first()
+
+    endpoints = [
+        ('sync  GET /works/<id>', f'/works/{work_id}'),
+        ('async GET /async/works/<id>', f'/async/works/{work_id}'),
+        ('sync  GET /students/<id>', f'/students/{student_id}'),
+        ('async GET /async/students/<id>', f'/async/students/{student_id}'),
+    ]
+
+    server = start_server(db, args.port)
+    try:
+        # Operations live in the server process, so one is requested over HTTP for the status polling
+        operation_id = asyncio.run(fetch_json(args.port, '/works/request?limit=10'))['id']
+        endpoints += [
+            ('sync  GET /works/status', f'/works/status?id={operation_id}'),
+            ('async GET /async/works/status', f'/async/works/status?id={operation_id}'),
+        ]
+        print(f'{"endpoint":<32} {"conns":>6} {"req/s":>10} {"p50 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        for name, path in endpoints:
+            for connections in args.connections:
+                result = asyncio.run(_load(args.port, path, connections, args.duration))
+                print(f'{name:<32} {connections:>6} {result["rps"]:>10,.0f} {result["p50"]:>9.1f} '
+                      f'{result["p99"]:>9.1f} {result["errors"]:>7}')
+    finally:
+        server.terminate()
+        server.wait()
+        db.unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    main()
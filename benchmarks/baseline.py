@@ -0,0 +1,71 @@
+"""
+JSON baselines of benchmark results and regression checks against them.
+"""
+import json
+import platform
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """
+    p50 / p95 / p99 of `samples` in milliseconds.
+    """
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else float('nan')
+        return {'p50': value, 'p95': value, 'p99': value}
+    quantiles = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': quantiles[49] * 1000, 'p95': quantiles[94] * 1000, 'p99': quantiles[98] * 1000}
+
+
+def save_baseline(path: str | Path, results: dict[str, dict], params: dict) -> None:
+    """
+    Writes `results` of named cases with the parameters they were measured with.
+    """
+    Path(path).write_text(json.dumps({
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'results': results,
+    }, indent=2, sort_keys=True) + '\n')
+
+
+def load_baseline(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def find_regressions(baseline: dict, results: dict[str, dict], metrics: tuple[str, ...],
+                     threshold: float) -> list[tuple[str, str, float, float]]:
+    """
+    Returns `(case, metric, baseline value, current value)` for every metric
+    that grew by more than `threshold` (0.2 is 20 %) over the baseline.
+    Cases missing from either side are skipped.
+    """
+    regressions = []
+    for case, current in results.items():
+        previous = baseline['results'].get(case)
+        if previous is None:
+            continue
+        for metric in metrics:
+            if metric in previous and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append((case, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def report_regressions(baseline: dict, results: dict[str, dict], params: dict, metrics: tuple[str, ...],
+                       threshold: float) -> bool:
+    """
+    Prints the comparison with the baseline and returns whether anything regressed.
+    """
+    regressions = find_regressions(baseline, results, metrics, threshold)
+    print(f'\nCompared with the baseline of {baseline["created"]} (threshold {threshold:.0%}):')
+    if baseline['params'] != params:
+        print(f'warning: the baseline was measured with {baseline["params"]}')
+    if not regressions:
+        print('no regressions')
+        return False
+    for case, metric, previous, current in regressions:
+        print(f'REGRESSION {case} {metric}: {previous:.3f} -> {current:.3f} (+{current / previous - 1:.0%})')
+    return True
@@ -0,0 +1,86 @@
+"""
+Minimal keep-alive HTTP/1.1 client and a uvicorn server process for the HTTP benchmarks.
+
+    python -m benchmarks.http_client <db> <port> [<media root>]
+"""
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import BASE_DIR, setup_django
+
+
+def serve(db: str, port: int, media_root: str = None) -> None:
+    setup_django(db, media_root)
+
+    import uvicorn
+
+    from distance_education_system.asgi import application
+
+    uvicorn.run(application, port=port, log_level='warning', lifespan='off', backlog=4096)
+
+
+def start_server(db: str | Path, port: int, media_root: str | Path = None, quiet: bool = False) -> subprocess.Popen:
+    """
+    Runs the ASGI application on `port` in a separate process and waits until it accepts connections.
+    `quiet` drops the server output, e.g. notifications written to the console.
+    """
+    command = [sys.executable, '-m', 'benchmarks.http_client', str(db), str(port)]
+    if media_root is not None:
+        command.append(str(media_root))
+    server = subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL if quiet else None)
+    try:
+        wait_for_server(port)
+    except OSError:
+        server.terminate()
+        raise
+    return server
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str,
+                  method: str = 'GET', json_body=None) -> tuple[int, bytes]:
+    body = b'' if json_body is None else json.dumps(json_body).encode()
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n'
+    if json_body is not None:
+        head += 'Content-Type: application/json\r\n'
+    writer.write(head.encode() + b'\r\n' + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return int(lines[0].split()[1]), await reader.readexactly(length)
+
+
+async def fetch_json(port: int, path: str):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return json.loads((await request(reader, writer, path))[1])
+    finally:
+        writer.close()
+
+
+def wait_for_server(port: int, timeout: float = 30) -> None:
+    async def ping() -> None:
+        _, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.close()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            asyncio.run(ping())
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1], int(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else None)
@@ -0,0 +1,104 @@
+"""
+Query plans and timings of the works listing queries
+before and after the `0002_practicalwork_indexes` migration.
+
+    python -m benchmarks.indexes --works 1000000
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks import BASE_DIR, setup_django
+
+
+def _time_query(queryset, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def _queries(student_id) -> dict:
+    from django.db.models import Count, Q
+    from django.utils import timezone
+
+    from assessment.services.work_check_service import WorkCheckService
+
+    service = WorkCheckService()
+    today = timezone.localdate()
+    works = service.filter_submitted_works()
+    middle = works[works.count() // 2]
+
+    return {
+        'student + date range': service.filter_submitted_works(
+            student_id=student_id, from_date=today - timedelta(days=30), to_date=today)[:10],
+        'date range': service.filter_submitted_works(
+            from_date=today - timedelta(days=31), to_date=today - timedelta(days=30))[:10],
+        'deep keyset page': works.filter(
+            Q(submitting_date__gt=middle.submitting_date) | Q(submitting_date=middle.submitting_date,
+                                                              id__gt=middle.id),
+            submitting_date__gte=middle.submitting_date)[:10],
+        'unmarked works': service.filter_submitted_works(marked=False)[:10],
+        'student unmarked count': service.filter_submitted_works(student_id=student_id, marked=False)
+        .order_by().values('student_id').annotate(count=Count('id')),
+    }
+
+
+def _report(title: str, queries: dict, repeat: int) -> dict[str, float]:
+    print(f'\n=== {title}')
+    timings = {}
+    for name, queryset in queries.items():
+        timings[name] = _time_query(queryset, repeat)
+        print(f'\n-- {name}: {timings[name]:.2f} ms')
+        print(queryset.explain())
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--works', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', default=str(BASE_DIR / 'benchmark.sqlite3'))
+    args = parser.parse_args()
+
+    db = BASE_DIR / args.db
+    db.unlink(missing_ok=True)
+    setup_django(db)
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.seed import seed
+
+    call_command('migrate', verbosity=0)
+    call_command('migrate', 'assessment', '0001', verbosity=0)
+
+    started = time.perf_counter()
+    # StudentStats does not exist before the later migrations
+    student_ids = seed(args.students, args.works, stats=False)
+    print(f'Seeded {args.students} students and {args.works} works in {time.perf_counter() - started:.1f} s')
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    queries = _queries(student_ids[0])
+    before = _report('Without indexes (0001_initial)', queries, args.repeat)
+
+    call_command('migrate', 'assessment', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    queries = _queries(student_ids[0])
+    after = _report('With indexes (0002_practicalwork_indexes)', queries, args.repeat)
+
+    print('\n=== Summary')
+    for name in before:
+        print(f'{name:<25} {before[name]:>10.2f} ms {after[name]:>10.2f} ms {before[name] / after[name]:>8.1f}x')
+
+    db.unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Micro benchmarks of WorkCheckService, StudentsService and OperationsService calls
+on a seeded database. Every case is warmed up and then timed for `--rounds` calls,
+results are min / median / mean / stddev in milliseconds and calls per second.
+`--save` writes them to a JSON baseline, `--compare` flags cases whose median
+grew by more than `--threshold` and exits with 1.
+
+    python -m benchmarks.micro --students 1000 --works 10000 --save benchmarks/micro.json
+    python -m benchmarks.micro --students 1000 --works 10000 --compare benchmarks/micro.json
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks import BASE_DIR, setup_django
+from benchmarks.baseline import load_baseline, report_regressions, save_baseline
+
+
+def bench(func: Callable[[], object], rounds: int, warmup: int) -> dict[str, float]:
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    mean = statistics.fmean(timings)
+    return {
+        'min': min(timings) * 1000,
+        'median': statistics.median(timings) * 1000,
+        'mean': mean * 1000,
+        'stddev': (statistics.stdev(timings) if len(timings) > 1 else 0.0) * 1000,
+        'ops': 1 / mean,
+    }
+
+
+def _cases(student_ids: list, rng: random.Random) -> list[tuple[str, Callable[[], object]]]:
+    from assessment.fast_serializers import FastWorkSerializer
+    from assessment.models import PracticalWork
+    from assessment.services.operations_service import OperationsService
+    from assessment.services.students_service import StudentsService
+    from assessment.services.work_check_service import WorkCheckService
+
+    works = WorkCheckService()
+    students = StudentsService()
+    operations = OperationsService()
+    work_ids = list(PracticalWork.objects.values_list('id', flat=True))
+    file_name = PracticalWork.objects.values_list('file', flat=True).first()
+    operation_id = operations.execute_operation(works.get_submitted_works_page, args={'limit': 50, 'values': True},
+                                                serializer_class=FastWorkSerializer)
+    operations.wait_operation(operation_id, 10)
+
+    def request_works_page():
+        op_id = operations.execute_operation(works.get_submitted_works_page, args={'limit': 50, 'values': True},
+                                             serializer_class=FastWorkSerializer)
+        return operations.wait_operation(op_id, 10)
+
+    return [
+        ('works: first page', lambda: works.get_submitted_works_page(limit=50)),
+        ('works: student page', lambda: works.get_submitted_works_page(limit=50, student_id=rng.choice(student_ids))),
+        ('works: unmarked page (values)', lambda: works.get_submitted_works_page(limit=50, marked=False, values=True)),
+        ('works: get by id', lambda: works.get_work_by_id(rng.choice(work_ids))),
+        ('works: add_work', lambda: works.add_work(
+            PracticalWork(student_id=rng.choice(student_ids), title='Benchmark', file=file_name))),
+        ('works: mark_work', lambda: works.mark_work(rng.choice(work_ids), rng.randrange(101))),
+        ('works: mark_works x100', lambda: works.mark_works(
+            {id: rng.randrange(101) for id in rng.sample(work_ids, 100)})),
+        ('students: first page', lambda: students.get_students_page(limit=50)),
+        ('students: name search', lambda: students.get_students_page(limit=50, name='Name1')),
+        ('students: get by id', lambda: students.get_student(rng.choice(student_ids))),
+        ('students: stats', lambda: students.get_student_stats(rng.choice(student_ids))),
+        ('operations: get_operation', lambda: operations.get_operation(operation_id)),
+        ('operations: execute + wait', request_works_page),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--works', type=int, default=10_000)
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="write the results to this JSON baseline")
+    parser.add_argument('--compare', help="flag regressions against this JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--db', default=str(BASE_DIR / 'benchmark.sqlite3'))
+    args = parser.parse_args()
+
+    db = BASE_DIR / args.db
+    db.unlink(missing_ok=True)
+    media = tempfile.TemporaryDirectory()
+    setup_django(db, media.name)
+
+    from django.core.management import call_command
+
+    from assessment.services.notifications_service import NotificationsService
+    from benchmarks.seed import seed
+
+    # Marks still write the outbox, but delivery would run in the background and skew the timings
+    NotificationsService.wake = lambda self: None
+    call_command('migrate', verbosity=0)
+    call_command('createcachetable', verbosity=0)
+    rng = random.Random(args.seed)
+    student_ids = seed(args.students, args.works, files=args.files, rng=rng)
+
+    params = {'students': args.students, 'works': args.works, 'files': args.files, 'rounds': args.rounds}
+    results = {}
+    print(f'{"case":<32} {"min ms":>9} {"median ms":>10} {"mean ms":>9} {"stddev":>9} {"ops/s":>10}')
+    try:
+        for name, func in _cases(student_ids, rng):
+            results[name] = result = bench(func, args.rounds, args.warmup)
+            print(f'{name:<32} {result["min"]:>9.3f} {result["median"]:>10.3f} {result["mean"]:>9.3f} '
+                  f'{result["stddev"]:>9.3f} {result["ops"]:>10,.0f}')
+    finally:
+        db.unlink(missing_ok=True)
+        media.cleanup()
+
+    if args.save:
+        save_baseline(args.save, results, params)
+    if args.compare and report_regressions(load_baseline(args.compare), results, params, ('median',),
+                                           args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
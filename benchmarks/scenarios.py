@@ -0,0 +1,184 @@
+"""
+HTTP load scenarios against the API under uvicorn, in the spirit of locust:
+`--users` simulated users each pick weighted tasks (browse students, request
+a works page and wait for it, grade a work, download a file...) in a loop for
+`--duration` seconds. Latency p50 / p95 / p99 and throughput are reported per
+request name. `--save` writes them to a JSON baseline, `--compare` flags
+requests whose p95 or p99 grew by more than `--threshold` and exits with 1.
+
+    python -m benchmarks.scenarios --users 50 --duration 30 --save benchmarks/scenarios.json
+    python -m benchmarks.scenarios --users 50 --duration 30 --compare benchmarks/scenarios.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+from benchmarks import BASE_DIR, setup_django
+from benchmarks.baseline import load_baseline, percentiles, report_regressions, save_baseline
+from benchmarks.http_client import request, start_server
+
+
+class User:
+    """
+    One keep-alive connection running tasks; timings are collected by request name.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: dict,
+                 rng: random.Random, samples: dict[str, list[float]], errors: dict[str, int]) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.data = data
+        self.rng = rng
+        self.samples = samples
+        self.errors = errors
+
+    async def call(self, name: str, path: str, method: str = 'GET', json_body=None) -> tuple[int, bytes]:
+        started = time.perf_counter()
+        status, body = await request(self.reader, self.writer, path, method, json_body)
+        self.samples.setdefault(name, []).append(time.perf_counter() - started)
+        if status >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return status, body
+
+
+async def list_students(user: User) -> None:
+    await user.call('GET /students', '/students?limit=50')
+
+
+async def get_student(user: User) -> None:
+    await user.call('GET /students/<id>', f'/students/{user.rng.choice(user.data["student_ids"])}')
+
+
+async def student_stats(user: User) -> None:
+    await user.call('GET /students/<id>/stats', f'/students/{user.rng.choice(user.data["student_ids"])}/stats')
+
+
+async def get_work(user: User) -> None:
+    await user.call('GET /works/<id>', f'/works/{user.rng.choice(user.data["work_ids"])}')
+
+
+async def request_works(user: User) -> None:
+    status, body = await user.call('GET /works/request', '/works/request?limit=50')
+    if status == 200:
+        await user.call('GET /works/status?wait', f'/works/status?id={json.loads(body)["id"]}&wait=5')
+
+
+async def grade_work(user: User) -> None:
+    work_id = user.rng.choice(user.data['work_ids'])
+    await user.call('PATCH /works/<id>', f'/works/{work_id}', 'PATCH', {'mark': user.rng.randrange(101)})
+
+
+async def download_work(user: User) -> None:
+    await user.call('GET /works/<id>/file', f'/works/{user.rng.choice(user.data["work_ids"])}/file')
+
+
+# Task and weight, roughly the mix of a teacher-facing session
+TASKS: list[tuple[Callable[[User], Awaitable[None]], int]] = [
+    (list_students, 3),
+    (get_student, 3),
+    (student_stats, 2),
+    (get_work, 4),
+    (request_works, 2),
+    (grade_work, 2),
+    (download_work, 1),
+]
+
+
+async def _user(port: int, deadline: float, data: dict, seed: int, samples: dict, errors: dict) -> None:
+    rng = random.Random(seed)
+    tasks, weights = zip(*TASKS)
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        errors['connect'] = errors.get('connect', 0) + 1
+        return
+    user = User(reader, writer, data, rng, samples, errors)
+    try:
+        while time.perf_counter() < deadline:
+            await rng.choices(tasks, weights)[0](user)
+    except (OSError, asyncio.IncompleteReadError):
+        errors['connection lost'] = errors.get('connection lost', 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(port: int, users: int, duration: float, data: dict, seed: int) -> dict[str, dict]:
+    samples, errors = {}, {}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_user(port, deadline, data, seed + i, samples, errors) for i in range(users)))
+    results = {}
+    for name, timings in sorted(samples.items()):
+        results[name] = {
+            'count': len(timings),
+            'rps': len(timings) / duration,
+            'errors': errors.get(name, 0),
+            **percentiles(timings),
+        }
+    for name, count in errors.items():
+        if name not in samples:
+            results[name] = {'count': 0, 'rps': 0.0, 'errors': count, **percentiles([])}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--works', type=int, default=10_000)
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--save', help="write the results to this JSON baseline")
+    parser.add_argument('--compare', help="flag regressions against this JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--db', default=str(BASE_DIR / 'benchmark.sqlite3'))
+    args = parser.parse_args()
+
+    db = BASE_DIR / args.db
+    db.unlink(missing_ok=True)
+    media = tempfile.TemporaryDirectory()
+    setup_django(db, media.name)
+
+    from django.core.management import call_command
+
+    from assessment.models import PracticalWork
+    from benchmarks.seed import seed
+
+    call_command('migrate', verbosity=0)
+    call_command('createcachetable', verbosity=0)
+    data = {
+        'student_ids': seed(args.students, args.works, files=args.files, rng=random.Random(args.seed)),
+        'work_ids': list(PracticalWork.objects.values_list('id', flat=True)),
+    }
+
+    server = start_server(db, args.port, media.name, quiet=True)
+    try:
+        results = asyncio.run(run(args.port, args.users, args.duration, data, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+        db.unlink(missing_ok=True)
+        media.cleanup()
+
+    print(f'{"request":<28} {"count":>8} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}')
+    for name, result in results.items():
+        print(f'{name:<28} {result["count"]:>8} {result["rps"]:>9,.1f} {result["p50"]:>9.1f} '
+              f'{result["p95"]:>9.1f} {result["p99"]:>9.1f} {result["errors"]:>7}')
+
+    params = {'students': args.students, 'works': args.works, 'files': args.files, 'users': args.users,
+              'duration': args.duration}
+    if args.save:
+        save_baseline(args.save, results, params)
+    if args.compare and report_regressions(load_baseline(args.compare), results, params, ('p95', 'p99'),
+                                           args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
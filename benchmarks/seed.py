@@ -0,0 +1,100 @@
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from assessment.models import Student, PracticalWork, FileBlob, StudentStats
+from assessment.storage import works_storage
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def _keep_submitting_date():
+    # bulk_create runs pre_save, which would stamp every row with now()
+    field = PracticalWork._meta.get_field('submitting_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_files(count: int, size: int = 4096, rng: random.Random = None) -> list[str]:
+    """
+    Stores `count` distinct files of `size` bytes in the works storage and returns their names.
+    """
+    rng = rng or random.Random(0)
+    storage = works_storage()
+    with transaction.atomic():
+        return [storage.save('Uploaded Files/seed.txt', ContentFile(rng.randbytes(size))) for _ in range(count)]
+
+
+def seed(students: int, works: int, days: int = 180, marked_ratio: float = 0.7,
+         file_name: str = 'Uploaded Files/seed.txt', files: int = 0, file_size: int = 4096, stats: bool = True,
+         rng: random.Random = None) -> list[uuid.UUID]:
+    """
+    Inserts `students` students and `works` works spread evenly
+    over the last `days` days; `marked_ratio` of the works get a mark.
+    With `files` the works share that many stored files of `file_size` bytes
+    instead of the missing `file_name`. `stats` fills `StudentStats`.
+    Returns ids of the created students.
+    """
+    rng = rng or random.Random(0)
+    now = timezone.now()
+    student_ids = [uuid.uuid4() for _ in range(students)]
+    file_names = seed_files(files, file_size, rng) if files else [file_name]
+    refcounts = {}
+
+    with transaction.atomic():
+        Student.objects.bulk_create(
+            (Student(id=id, name=f'Name{i}', last_name=f'LastName{i}') for i, id in enumerate(student_ids)),
+            batch_size=BATCH_SIZE,
+        )
+
+    with _keep_submitting_date():
+        for start in range(0, works, BATCH_SIZE):
+            batch = []
+            for i in range(start, min(start + BATCH_SIZE, works)):
+                submitting_date = now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+                marked = rng.random() < marked_ratio
+                name = rng.choice(file_names)
+                refcounts[name] = refcounts.get(name, 0) + 1
+                batch.append(PracticalWork(
+                    student_id=rng.choice(student_ids),
+                    submitting_date=submitting_date,
+                    title=f'Work {i}',
+                    file=name,
+                    mark=rng.randrange(101) if marked else None,
+                    mark_date=submitting_date + timedelta(days=1) if marked else None,
+                ))
+            with transaction.atomic():
+                PracticalWork.objects.bulk_create(batch)
+
+    counts = {}
+    for student_id in PracticalWork.objects.values_list('student_id', flat=True).iterator(chunk_size=BATCH_SIZE):
+        counts[student_id] = counts.get(student_id, 0) + 1
+    with transaction.atomic():
+        Student.objects.bulk_update(
+            [Student(id=id, submitted_works_count=counts.get(id, 0)) for id in student_ids],
+            ['submitted_works_count'], batch_size=BATCH_SIZE,
+        )
+        if files:
+            # Saving the files created their blobs with no references
+            FileBlob.objects.bulk_create((FileBlob(name=name, refcount=count) for name, count in refcounts.items()),
+                                         batch_size=BATCH_SIZE, update_conflicts=True, update_fields=['refcount'],
+                                         unique_fields=['name'])
+        if stats:
+            rows = PracticalWork.objects.values('student_id').annotate(
+                works_count=models.Count('id'),
+                marked_count=models.Count('mark'),
+                marks_sum=Coalesce(models.Sum('mark'), 0),
+                last_submitted_date=models.Max('submitting_date'),
+            ).order_by()
+            StudentStats.objects.bulk_create((StudentStats(**row) for row in rows.iterator()), batch_size=BATCH_SIZE)
+    return student_ids
@@ -0,0 +1,68 @@
+"""
+Throughput of the DRF serializers against the fast-path serializers
+for a payload of `--works` works and `--students` students.
+
+    python -m benchmarks.serializers --works 10000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import BASE_DIR, setup_django
+
+
+def _measure(func, rows: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return rows / statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=10_000)
+    parser.add_argument('--works', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', default=str(BASE_DIR / 'benchmark.sqlite3'))
+    args = parser.parse_args()
+
+    db = BASE_DIR / args.db
+    db.unlink(missing_ok=True)
+    setup_django(db)
+
+    from django.core.management import call_command
+
+    from assessment.fast_serializers import FastWorkSerializer, FastStudentSerializer
+    from assessment.models import PracticalWork, Student
+    from assessment.serializers import WorkSerializer, StudentSerializer
+    from benchmarks.seed import seed
+
+    call_command('migrate', verbosity=0)
+    seed(args.students, args.works)
+
+    works = PracticalWork.objects.order_by('submitting_date', 'id')
+    students = Student.objects.order_by('last_name', 'id')
+    assert FastWorkSerializer(works, many=True).data == WorkSerializer(works, many=True).data
+    assert FastStudentSerializer(students, many=True).data == StudentSerializer(students, many=True).data
+
+    work_instances = list(works)
+    student_instances = list(students)
+    cases = [
+        ('works: query + DRF', lambda: WorkSerializer(works.all(), many=True).data, args.works),
+        ('works: query + fast (values_list)', lambda: FastWorkSerializer(works.all(), many=True).data, args.works),
+        ('works: instances + DRF', lambda: WorkSerializer(work_instances, many=True).data, args.works),
+        ('works: instances + fast', lambda: FastWorkSerializer(work_instances, many=True).data, args.works),
+        ('students: query + DRF', lambda: StudentSerializer(students.all(), many=True).data, args.students),
+        ('students: query + fast (values_list)', lambda: FastStudentSerializer(students.all(), many=True).data,
+         args.students),
+    ]
+    for name, func, rows in cases:
+        print(f'{name:<40} {_measure(func, rows, args.repeat):>12,.0f} rows/s')
+
+    db.unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    main()
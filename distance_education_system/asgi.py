@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'distance_education_system.settings')
 
 application = get_asgi_application()
+
+# Opt-in: every server process then competes for running the scheduled reports, see REPORTS in settings
+from assessment.services.reports_service import ReportsService  # noqa: E402
+
+reports_service = ReportsService()
+if reports_service.autostart:
+    reports_service.start()
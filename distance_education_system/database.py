@@ -0,0 +1,119 @@
+"""
+Database settings built from environment variables.
+
+`DB_ENGINE` selects the profile:
+
+- `sqlite` (default): `SQLITE_PATH` file in WAL mode with `synchronous=NORMAL`,
+  a busy timeout and memory-mapped reads. Write transactions start with
+  `BEGIN IMMEDIATE`, so concurrent writers wait for the lock instead of
+  failing with "database is locked" when a read transaction is upgraded.
+- `postgresql`: `DB_NAME`, `DB_USER`, `DB_PASSWORD`, `DB_HOST`, `DB_PORT`
+  with persistent connections (`DB_CONN_MAX_AGE`) or, with `DB_POOL=true`,
+  a psycopg connection pool of `DB_POOL_MIN_SIZE` to `DB_POOL_MAX_SIZE` connections.
+  Pooling suits ASGI, where persistent connections are not reused across requests.
+"""
+import os
+from collections.abc import Mapping
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    # Milliseconds
+    'SQLITE_BUSY_TIMEOUT': '5000',
+    # Bytes of the file read through mmap
+    'SQLITE_MMAP_SIZE': str(256 * 1024 * 1024),
+    'SQLITE_TRANSACTION_MODE': 'IMMEDIATE',
+}
+
+# Values are interpolated into PRAGMA statements, so only the documented ones pass
+SQLITE_CHOICES = {
+    'SQLITE_JOURNAL_MODE': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'SQLITE_SYNCHRONOUS': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'SQLITE_TRANSACTION_MODE': ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'),
+}
+
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _int(environ: Mapping[str, str], name: str, default: int) -> int:
+    value = environ.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} must be an integer, got {value!r}")
+
+
+def _choice(options: Mapping[str, str], name: str) -> str:
+    value = options[name].strip().upper()
+    if value not in SQLITE_CHOICES[name]:
+        raise ImproperlyConfigured(f"{name} must be one of {', '.join(SQLITE_CHOICES[name])}, got {options[name]!r}")
+    return value
+
+
+def sqlite_config(environ: Mapping[str, str], base_dir: Path) -> dict:
+    options = {name: environ.get(name, default) for name, default in SQLITE_DEFAULTS.items()}
+    for name in SQLITE_CHOICES:
+        options[name] = _choice(options, name)
+    busy_timeout = _int(options, 'SQLITE_BUSY_TIMEOUT', 5000)
+    pragmas = [
+        f"PRAGMA journal_mode={options['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={options['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={busy_timeout}",
+        f"PRAGMA mmap_size={_int(options, 'SQLITE_MMAP_SIZE', 0)}",
+    ]
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': environ.get('SQLITE_PATH') or base_dir / 'db.sqlite3',
+        'CONN_MAX_AGE': _int(environ, 'DB_CONN_MAX_AGE', 0),
+        'OPTIONS': {
+            # Seconds, the driver waits for locks itself before the busy handler
+            'timeout': busy_timeout / 1000,
+            'transaction_mode': options['SQLITE_TRANSACTION_MODE'],
+            'init_command': ';'.join(pragmas),
+        },
+    }
+
+
+def postgresql_config(environ: Mapping[str, str]) -> dict:
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('DB_NAME', 'distance_education_system'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', ''),
+        'PORT': environ.get('DB_PORT', ''),
+        'OPTIONS': {},
+    }
+    if _bool(environ.get('DB_POOL', 'false')):
+        # Django refuses persistent connections together with a pool
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': _int(environ, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': _int(environ, 'DB_POOL_MAX_SIZE', 10),
+            'timeout': _int(environ, 'DB_POOL_TIMEOUT', 10),
+        }
+    else:
+        config['CONN_MAX_AGE'] = _int(environ, 'DB_CONN_MAX_AGE', 60)
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+def database_config(environ: Mapping[str, str] = None, base_dir: Path = None) -> dict:
+    """
+    Settings of the default database for the `DB_ENGINE` profile.
+    """
+    environ = os.environ if environ is None else environ
+    base_dir = base_dir or Path(__file__).resolve().parent.parent
+    engine = environ.get('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        return sqlite_config(environ, base_dir)
+    if engine == 'postgresql':
+        return postgresql_config(environ)
+    raise ImproperlyConfigured(f"Unknown DB_ENGINE {engine!r}, expected 'sqlite' or 'postgresql'")
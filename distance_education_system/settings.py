@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 
+from distance_education_system.database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,7 +47,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'assessment.metrics.TimedJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
         'rest_framework.renderers.MultiPartRenderer'
     ],
@@ -57,6 +59,7 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'assessment.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,12 +93,10 @@ WSGI_APPLICATION = 'distance_education_system.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+# Profile and tuning come from DB_* / SQLITE_* environment variables, see database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(base_dir=BASE_DIR),
 }
 
 
@@ -144,3 +145,142 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Uploaded files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Work files are deduplicated by content
+    'works': {
+        'BACKEND': 'assessment.storage.ContentAddressedStorage',
+    },
+}
+
+
+# Operations store
+# Operations are kept in the 'operations' database cache, so every worker process sees them
+# (`manage.py createcachetable` creates its table). InMemoryOperationStore with `max_size`
+# only suits a single process; a Redis cache can replace the database one for heavy polling.
+OPERATIONS_STORE = {
+    'BACKEND': 'assessment.operation_store.CacheOperationStore',
+    'OPTIONS': {
+        'cache_alias': 'operations',
+        'ttl': 60 * 60,
+    },
+}
+
+# Operations executors
+# Thread pools running background operations.
+# Jobs over MAX_WORKERS + MAX_QUEUE wait QUEUE_TIMEOUT seconds and are rejected after that.
+OPERATIONS_EXECUTORS = {
+    'default': {
+        'MAX_WORKERS': 4,
+        'MAX_QUEUE': 100,
+        'QUEUE_TIMEOUT': 0,
+    },
+}
+
+# Work files downloads
+# How work files are sent: 'python' streams them from the app (sendfile when the server supports it),
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) hand the transfer over to the front proxy
+WORK_FILES_SERVE = {
+    'MODE': 'python',
+    'X_ACCEL_PREFIX': '/protected/',
+}
+
+# Resumable uploads
+# Files of up to MAX_SIZE bytes; uploads not finalized within EXPIRY seconds are removed with their part files
+UPLOADS = {
+    'MAX_SIZE': 1024 * 1024 * 1024,
+    'EXPIRY': 24 * 60 * 60,
+}
+
+# Works ZIP archives
+# Archives of up to SYNC_LIMIT works are streamed right away, larger ones are prepared as an operation first
+WORKS_ARCHIVE = {
+    'SYNC_LIMIT': 500,
+}
+
+# Mark notifications
+# Outbox rows are delivered to SINK in batches of BATCH_SIZE right after marks commit, and every INTERVAL seconds
+# by the dispatch_notifications command. A batch is claimed for CLAIM_TIMEOUT seconds while it is sent.
+# Failed deliveries are retried after RETRY_DELAY * 2 ** attempts seconds, MAX_ATTEMPTS times at most.
+NOTIFICATIONS = {
+    'SINK': {
+        'BACKEND': 'assessment.notifications.ConsoleNotificationSink',
+        'OPTIONS': {},
+    },
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'INTERVAL': 10,
+    'CLAIM_TIMEOUT': 300,
+}
+
+# Operations long-polling and SSE
+# Waiters re-read the store every POLL_INTERVAL seconds to notice operations finished by other workers,
+# SSE streams send a comment every HEARTBEAT seconds to keep idle connections open
+OPERATIONS_WAIT = {
+    'POLL_INTERVAL': 1,
+    'HEARTBEAT': 15,
+}
+
+# Caches
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'objects': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'objects',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'operations': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'operations_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# Read-through cache of students and works looked up by id, invalidated by model signals
+OBJECT_CACHE = {
+    'CACHE_ALIAS': 'objects',
+    'TTL': 300,
+}
+
+# Background removal of stored files released by deleted works, after the transaction commits.
+# Files are queued in the database, so removals pending in a stopped process are done by the next one.
+# Failed deletions are retried after RETRY_DELAY * 2 ** attempt seconds
+FILE_CLEANUP = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 5,
+}
+
+# Per view latency, SQL queries and rendering time histograms served at /metrics with executor and cache counters.
+# Request histograms are only collected while ENABLED
+METRICS = {
+    'ENABLED': False,
+}
+
+# Scheduled reports
+# Jobs are stored in the database and run by the one server process holding the reports lease,
+# renewed every LEASE_TTL / 3 seconds. SCHEDULES are cron fields per report, results are precomputed
+# so they are ready before graders arrive; the last KEEP results of each report are kept.
+# `manage.py run_reports` runs the jobs in a dedicated process; with AUTOSTART every WSGI/ASGI server process
+# competes for the lease instead, starting a scheduler thread when the application module is imported
+REPORTS = {
+    'AUTOSTART': False,
+    'LEASE_TTL': 60,
+    'KEEP': 7,
+    'SCHEDULES': {
+        'ungraded_works': {'hour': 5, 'minute': 0},
+    },
+}